@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Uyarlanabilir Kontrol Zamanlayıcısı
+Bakiyenin geçmişte hangi saatlerde değiştiğini öğrenip daemon modunda bir sonraki
+kontrolün zamanını belirler: sessiz saatlerde (örn. gece) aralık uzar, bakiyenin sık
+değiştiği saatlerde kısalır.
+
+- Profil: haftanın her saati için (7 x 24 = 168 kova) değişiklik sayısı; eski değişikliklerin
+  ağırlığı SCHEDULER_HALF_LIFE_DAYS ile azalır, komşu saatler birbirine yumuşatılır
+- Aralık: günlük istek bütçesi önümüzdeki 24 saate aktiviteyle orantılı dağıtılır,
+  sonuç SCHEDULER_MIN_INTERVAL ile SCHEDULER_MAX_INTERVAL arasında tutulur
+- Bekleme sırasında daha aktif bir saate girilecekse kontrol o saatin başına çekilir
+- Son 24 saatte bütçe dolduysa en eski kontrol pencereden çıkana kadar beklenir
+- Her karar ekrana ve SCHEDULER_LOG_FILE dosyasına (JSONL) yazılır
+- SCHEDULER_* ayarları config üzerinden okunur; daemon .env değişince zamanlayıcıyı yeniden kurar
+
+Kullanım: python3 shell_auto_checker.py --daemon --adaptive
+          python3 adaptive_scheduler.py profile [kart_numarası]   # Profili ve sıradaki kararı göster
+"""
+
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+
+import config
+
+# .env, ayarlarını import anında okuyan modüllerden (BALANCE_DB, RUN_LOG_FILE) önce yüklenir
+config.preload()
+
+import balance_history
+import run_log
+
+BUCKETS = 7 * 24
+DAY = 86400.0
+HOUR = 3600.0
+
+# Hiç değişiklik görülmemiş saatler de sıfır ağırlık almasın (aksi halde aralık hep en uzun olur)
+PRIOR_WEIGHT = 0.05
+# Bekleme sırasında aktivitesi bu kat fazla olan bir saate girilirse kontrol öne çekilir
+ACTIVITY_JUMP = 2.0
+
+WEEKDAYS = ['Pzt', 'Sal', 'Çar', 'Per', 'Cum', 'Cmt', 'Paz']
+
+def bucket_of(ts):
+    """Timestamp'in haftanın hangi saatine düştüğü (0 = Pazartesi 00:00, yerel saat)"""
+    moment = datetime.fromtimestamp(ts)
+    return moment.weekday() * 24 + moment.hour
+
+def change_timestamps(card_number=None, since=None, conn=None):
+    """
+    Bakiyenin değiştiği anlar (değişikliğin ilk görüldüğü kontrol zamanı)
+    Geçmiş değişiklik olayı olarak saklandığından kartın ilk kaydı hariç her satır bir değişikliktir.
+    card_number None ise tüm kartlar kullanılır.
+    """
+    conn = conn or balance_history.connect()
+    since = float('-inf') if since is None else since
+    query = (
+        "SELECT r.timestamp FROM readings r "
+        "WHERE r.timestamp >= ? AND r.timestamp > "
+        "(SELECT MIN(f.timestamp) FROM readings f WHERE f.card_number = r.card_number)"
+    )
+    params = [since]
+    if card_number:
+        query += " AND r.card_number = ?"
+        params.append(card_number)
+    return [row[0] for row in conn.execute(query, params)]
+
+def build_profile(timestamps, now=None, half_life_days=None):
+    """Haftanın 168 saati için ağırlıklı aktivite (eski değişikliklerin ağırlığı azalır)"""
+    now = time.time() if now is None else now
+    half_life = (config.current().scheduler_half_life_days if half_life_days is None else half_life_days) * DAY
+
+    counts = [0.0] * BUCKETS
+    for ts in timestamps:
+        age = max(0.0, now - ts)
+        counts[bucket_of(ts)] += 0.5 ** (age / half_life) if half_life > 0 else 1.0
+
+    # Komşu saatleri yumuşat: 10:55'te görülen değişiklik 11:00'i de etkilesin
+    smoothed = [
+        0.25 * counts[(b - 1) % BUCKETS] + 0.5 * counts[b] + 0.25 * counts[(b + 1) % BUCKETS]
+        for b in range(BUCKETS)
+    ]
+    prior = PRIOR_WEIGHT * max(1.0, sum(smoothed)) / BUCKETS
+    return [weight + prior for weight in smoothed]
+
+class AdaptiveScheduler:
+    """Daemon için sıradaki kontrol zamanını seçer"""
+
+    def __init__(self, card_number=None, min_interval=None, max_interval=None, daily_budget=None,
+                 lookback_days=None, log_file=None):
+        settings = config.current()
+        self.card_number = card_number
+        self.min_interval = settings.scheduler_min_interval if min_interval is None else min_interval
+        self.max_interval = settings.scheduler_max_interval if max_interval is None else max_interval
+        self.daily_budget = settings.scheduler_daily_budget if daily_budget is None else daily_budget
+        self.lookback_days = settings.scheduler_lookback_days if lookback_days is None else lookback_days
+        self.log_file = settings.scheduler_log_file if log_file is None else log_file
+        # Son 24 saatteki kontroller (çalıştırma günlüğünden; az önce biten kontrol de dahil)
+        self.recent_checks = self._load_recent_checks()
+
+    def _load_recent_checks(self):
+        since = time.time() - DAY
+        try:
+            return [
+                record['started_at'] for record in run_log.iter_records(since=since)
+                if not self.card_number or record.get('card_number') == self.card_number
+            ]
+        except Exception as e:
+            print(f"⚠️  Çalıştırma günlüğü okunamadı, bütçe sıfırdan başlıyor: {e}")
+            return []
+
+    def record_check(self, ts=None):
+        """Yapılan kontrolü bütçeye ekle"""
+        self.recent_checks.append(time.time() if ts is None else ts)
+
+    def profile(self, now=None):
+        now = time.time() if now is None else now
+        timestamps = change_timestamps(self.card_number, since=now - self.lookback_days * DAY)
+        return build_profile(timestamps, now), len(timestamps)
+
+    def decide(self, now=None):
+        """
+        Sıradaki kontrol kararını ver
+        Dönüş: {'next_run', 'interval', 'reason', 'activity', 'used', 'budget', ...}
+        interval, 'now' anından itibaren saniye cinsindendir.
+        """
+        now = time.time() if now is None else now
+        self.recent_checks = [ts for ts in self.recent_checks if ts > now - DAY]
+        weights, changes = self.profile(now)
+        mean_weight = sum(weights) / BUCKETS
+
+        current = bucket_of(now)
+        horizon = sum(weights[(current + offset) % BUCKETS] for offset in range(24))
+        # Bütçe önümüzdeki 24 saate aktiviteyle orantılı dağıtılır
+        checks_per_hour = max(self.daily_budget, 1) * weights[current] / horizon
+        interval = HOUR / checks_per_hour
+        reason = 'profile'
+
+        if interval < self.min_interval:
+            interval, reason = self.min_interval, 'min'
+        elif interval > self.max_interval:
+            interval, reason = self.max_interval, 'max'
+
+        # Bekleme sırasında belirgin şekilde daha aktif bir saate giriliyorsa o saatin başında kontrol et
+        hour_start = now - (now % HOUR)
+        boundary = hour_start + HOUR
+        while boundary < now + interval:
+            if weights[bucket_of(boundary)] >= ACTIVITY_JUMP * weights[current]:
+                interval, reason = max(self.min_interval, boundary - now), 'upcoming_activity'
+                break
+            boundary += HOUR
+
+        # Günlük bütçe dolduysa en eski kontrol 24 saatlik pencereden çıkana kadar bekle
+        used = len(self.recent_checks)
+        if used >= self.daily_budget and self.recent_checks:
+            budget_wait = min(self.recent_checks) + DAY - now
+            if budget_wait > interval:
+                interval, reason = budget_wait, 'budget'
+
+        return {
+            'ts': datetime.fromtimestamp(now).strftime('%Y-%m-%dT%H:%M:%S'),
+            'card_number': self.card_number,
+            'next_run': datetime.fromtimestamp(now + interval).strftime('%Y-%m-%dT%H:%M:%S'),
+            'interval': round(interval),
+            'reason': reason,
+            'bucket': f"{WEEKDAYS[current // 24]} {current % 24:02d}:00",
+            'activity': round(weights[current] / mean_weight, 2),
+            'changes': changes,
+            'used': used,
+            'budget': self.daily_budget,
+        }
+
+    def initial_wait(self, now=None):
+        """
+        Daemon yeniden başladığında ilk kontrolden önce beklenecek süre
+        Son kontrol çalıştırma günlüğünden okunur ve karar o kontrolün bitiminde verilmiş
+        gibi hesaplanır; çökme döngüsünde (Restart=on-failure) bütçe ve en kısa aralık aşılmaz.
+        Dönüş: (saniye, karar) - son 24 saatte kontrol yoksa (0, None)
+        """
+        now = time.time() if now is None else now
+        if not self.recent_checks:
+            return 0, None
+        last = max(self.recent_checks)
+        decision = self.decide(last)
+        wait = max(0, last + decision['interval'] - now)
+        decision.update(ts=datetime.fromtimestamp(now).strftime('%Y-%m-%dT%H:%M:%S'), interval=round(wait))
+        return wait, decision
+
+    def log(self, decision):
+        """Kararı ekrana ve JSONL günlüğüne yaz"""
+        reasons = {
+            'profile': 'aktivite profili',
+            'min': 'en kısa aralık sınırı',
+            'max': 'en uzun aralık sınırı',
+            'upcoming_activity': 'aktif saat yaklaşıyor',
+            'budget': 'günlük bütçe doldu',
+        }
+        print(f"🧭 Zamanlayıcı: {decision['interval'] // 60} dk sonra ({reasons.get(decision['reason'], decision['reason'])}; "
+              f"{decision['bucket']} aktivite x{decision['activity']}, "
+              f"son 24 saat {decision['used']}/{decision['budget']} kontrol)")
+        if not self.log_file:
+            return
+        try:
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(decision, ensure_ascii=False, separators=(',', ':')) + '\n')
+        except OSError as e:
+            print(f"⚠️  Zamanlayıcı günlüğü yazılamadı: {e}")
+
+def print_profile(weights):
+    """Haftalık aktivite tablosu (satırlar günler, sütunlar saatler)"""
+    shades = ' .:-=+*#%@'
+    peak = max(weights)
+    print("      " + ''.join(f"{hour:<3d}" for hour in range(0, 24)))
+    for day in range(7):
+        row = weights[day * 24:(day + 1) * 24]
+        cells = ''.join(shades[min(len(shades) - 1, int(weight / peak * (len(shades) - 1)))] * 2 + ' '
+                        for weight in row)
+        print(f"{WEEKDAYS[day]:<5} {cells}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Uyarlanabilir kontrol zamanlayıcısı")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    profile_parser = subparsers.add_parser('profile', help="Aktivite profilini ve sıradaki kararı göster")
+    profile_parser.add_argument('card_number', nargs='?', help="Varsayılan: tüm kartlar")
+    args = parser.parse_args(argv)
+
+    try:
+        config.current()
+    except config.ConfigError as e:
+        print(f"❌ {e}")
+        return 2
+
+    scheduler = AdaptiveScheduler(args.card_number, log_file='')
+    weights, changes = scheduler.profile()
+    print(f"📊 Son {scheduler.lookback_days:g} günde {changes} bakiye değişikliği")
+    print_profile(weights)
+    print()
+    scheduler.log(scheduler.decide())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Bakiye Analizi (NumPy)
+Bakiye geçmişinden harcama hızını, bakiyenin biteceği tarihi ve olağandışı
+düşüşleri hesaplar. Tüm hesaplamalar NumPy dizileri üzerinde vektörel yapılır;
+yüz binlerce okuma Raspberry Pi'de bile bir saniyenin altında işlenir.
+
+- Harcama: ardışık okumalar arasındaki düşüşlerin toplamı (yüklemeler ayrıca toplanır)
+- Bitiş tahmini: son N günün ortalama günlük harcamasıyla mevcut bakiyenin tükeneceği tarih
+- Anomali: düşüş tutarının önceki W düşüşe göre kayan z-skoru eşiği aşarsa işaretlenir
+
+Kullanım: python3 balance_analytics.py report <kart_numarası> [--days 14] [--weeks 8] [--json]
+          python3 balance_analytics.py bench [--readings 500000]
+Gereksinim: pip install numpy
+"""
+
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+
+import config
+
+# .env, ayarlarını import anında okuyan modüllerden (BALANCE_DB) önce yüklenir
+config.preload()
+
+import balance_history
+
+# Gün/hafta sınırları yerel saate göre (DST geçişlerinde bir saatlik kayma önemsiz)
+UTC_OFFSET = datetime.now().astimezone().utcoffset().total_seconds()
+
+DAY = 86400.0
+
+def _numpy():
+    import numpy as np
+    return np
+
+def load_series(card_number, start_ts=None, end_ts=None, conn=None):
+    """
+    Okumaları NumPy dizileri olarak yükle: (timestamp'ler, bakiyeler, son kontrol zamanı)
+    Satırlar Python listesine dönüştürülmeden doğrudan diziye aktarılır.
+    Geçmiş değişiklik olayı olarak saklandığından her satır bir bakiye değişimidir;
+    değişmeyen kontroller farkları etkilemediği için diziye alınmaz. Kartın en son ne
+    zaman kontrol edildiği (last_seen_ts) ayrıca döner; kayıt yoksa None.
+    start_ts verilirse o anda geçerli olan bakiye, start_ts zamanlı ilk okuma olarak eklenir.
+    """
+    import itertools
+
+    np = _numpy()
+    conn = conn or balance_history.connect()
+    end_ts = float('inf') if end_ts is None else end_ts
+
+    # Aralık başlamadan önce görülen ve başlangıçta hâlâ geçerli olan bakiye
+    head = []
+    if start_ts is not None:
+        row = conn.execute(
+            "SELECT balance, last_seen_ts FROM readings WHERE card_number = ? AND timestamp < ? "
+            "ORDER BY timestamp DESC LIMIT 1",
+            (card_number, start_ts)
+        ).fetchone()
+        if row is not None:
+            head = [(start_ts, row[0], row[1])]
+    start_ts = float('-inf') if start_ts is None else start_ts
+
+    count, last_seen = conn.execute(
+        "SELECT COUNT(*), MAX(last_seen_ts) FROM readings WHERE card_number = ? AND timestamp >= ? AND timestamp <= ?",
+        (card_number, start_ts, end_ts)
+    ).fetchone()
+    if head and last_seen is None:
+        last_seen = head[0][2]
+    cursor = conn.execute(
+        "SELECT timestamp, balance FROM readings WHERE card_number = ? AND timestamp >= ? AND timestamp <= ? "
+        "ORDER BY timestamp",
+        (card_number, start_ts, end_ts)
+    )
+    rows = itertools.chain(((ts, balance) for ts, balance, _ in head), cursor)
+    flat = np.fromiter(itertools.chain.from_iterable(rows), dtype=np.float64, count=(count + len(head)) * 2)
+    pairs = flat.reshape(-1, 2)
+    if last_seen is not None:
+        last_seen = min(last_seen, end_ts)
+    return pairs[:, 0].copy(), pairs[:, 1].copy(), last_seen
+
+def day_index(timestamps):
+    """Timestamp'leri yerel gün numarasına çevir (1970-01-01'den beri)"""
+    np = _numpy()
+    return np.floor((timestamps + UTC_OFFSET) / DAY).astype(np.int64)
+
+def spend_by_period(timestamps, balances, period_days=1):
+    """
+    Dönem başına harcama ve yükleme toplamları
+    period_days=1: günlük, 7: haftalık (Pazartesi başlangıçlı)
+    Dönüş: (dönem başlangıç timestamp'leri, harcamalar, yüklemeler)
+    """
+    np = _numpy()
+    if len(timestamps) < 2:
+        empty = np.zeros(0)
+        return empty, empty, empty
+
+    deltas = np.diff(balances)
+    days = day_index(timestamps[1:])
+    if period_days == 7:
+        # 1970-01-01 Perşembe; +3 ile haftalar Pazartesi başlar
+        buckets = (days + 3) // 7
+        bucket_start_day = buckets * 7 - 3
+    else:
+        buckets = days // period_days
+        bucket_start_day = buckets * period_days
+
+    first = buckets.min()
+    index = buckets - first
+    spend = np.bincount(index, weights=np.where(deltas < 0, -deltas, 0.0))
+    topup = np.bincount(index, weights=np.where(deltas > 0, deltas, 0.0))
+
+    start_days = np.arange(len(spend)) * (7 if period_days == 7 else period_days) + bucket_start_day.min()
+    starts = start_days * DAY - UTC_OFFSET
+    return starts, spend, topup
+
+def daily_rate(timestamps, balances, window_days=14, end_ts=None):
+    """
+    end_ts'ye kadarki son window_days gündeki ortalama günlük harcama (TL/gün)
+    end_ts verilmezse son değişiklik; son değişiklikten beri harcama olmadıysa
+    (kart boşta) pencere şimdiye kadar uzatılmalıdır, yoksa eski hız raporlanır.
+    """
+    np = _numpy()
+    if len(timestamps) < 2:
+        return 0.0
+
+    end_ts = timestamps[-1] if end_ts is None else max(end_ts, timestamps[-1])
+    start = end_ts - window_days * DAY
+    mask = timestamps[1:] >= start
+    deltas = np.diff(balances)[mask]
+    spent = abs(deltas[deltas < 0].sum())  # Harcama yoksa -0.0 yazılmasın
+    # Kısa geçmişte pencere ilk okumadan başlar
+    span_days = (end_ts - max(start, timestamps[0])) / DAY
+    return float(spent / span_days) if span_days > 0 else 0.0
+
+def forecast_depletion(timestamps, balances, window_days=14, end_ts=None):
+    """
+    Mevcut harcama hızıyla bakiyenin sıfırlanacağı zaman (end_ts'den itibaren)
+    Dönüş: (timestamp veya None, günlük harcama)
+    """
+    rate = daily_rate(timestamps, balances, window_days, end_ts)
+    if rate <= 0 or not len(balances):
+        return None, rate
+    end_ts = timestamps[-1] if end_ts is None else max(end_ts, timestamps[-1])
+    return float(end_ts + balances[-1] / rate * DAY), rate
+
+def detect_anomalies(timestamps, balances, window=30, threshold=3.0, min_amount=1.0):
+    """
+    Olağandışı düşüşleri bul (kayan ortalama ve standart sapma ile z-skoru)
+    Her düşüş kendinden önceki `window` düşüşle karşılaştırılır.
+    Dönüş: [(timestamp, düşüş tutarı, z-skoru), ...]
+    """
+    np = _numpy()
+    if len(timestamps) < 2:
+        return []
+
+    deltas = np.diff(balances)
+    drop_mask = deltas < 0
+    drops = -deltas[drop_mask]
+    drop_times = timestamps[1:][drop_mask]
+    if len(drops) <= window:
+        return []
+
+    # Kümülatif toplamlarla önceki `window` elemanın ortalaması ve varyansı (O(n))
+    csum = np.concatenate(([0.0], np.cumsum(drops)))
+    csum_sq = np.concatenate(([0.0], np.cumsum(drops * drops)))
+    idx = np.arange(window, len(drops))
+    window_sum = csum[idx] - csum[idx - window]
+    window_sum_sq = csum_sq[idx] - csum_sq[idx - window]
+    mean = window_sum / window
+    std = np.sqrt(np.maximum(window_sum_sq / window - mean * mean, 0.0))
+
+    values = drops[idx]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.where(std > 0, (values - mean) / std, 0.0)
+    flagged = (z >= threshold) & (values >= min_amount)
+
+    return [
+        (float(ts), float(amount), float(score))
+        for ts, amount, score in zip(drop_times[idx][flagged], values[flagged], z[flagged])
+    ]
+
+def build_report(timestamps, balances, days=14, weeks=8, window=30, threshold=3.0, last_seen=None, now=None):
+    """
+    Rapor verisini sözlük olarak üret (metin veya JSON çıktısı için)
+    last_seen: son kontrol zamanı (verilmezse son değişiklik)
+    now: harcama hızı penceresinin bitişi; max(last_seen, now) kullanılır
+    """
+    if last_seen is None and len(timestamps):
+        last_seen = float(timestamps[-1])
+    end_ts = max(last_seen, now) if last_seen is not None and now is not None else last_seen
+    daily_starts, daily_spend, daily_topup = spend_by_period(timestamps, balances, 1)
+    weekly_starts, weekly_spend, weekly_topup = spend_by_period(timestamps, balances, 7)
+    depletion_ts, rate = forecast_depletion(timestamps, balances, days, end_ts)
+
+    def fmt_day(ts):
+        return datetime.fromtimestamp(ts).strftime('%Y-%m-%d')
+
+    return {
+        'readings': int(len(timestamps)),
+        'first_reading': fmt_day(timestamps[0]) if len(timestamps) else None,
+        'last_reading': datetime.fromtimestamp(last_seen).strftime('%Y-%m-%d %H:%M') if last_seen is not None else None,
+        'balance': float(balances[-1]) if len(balances) else None,
+        'daily_rate': round(rate, 2),
+        'rate_window_days': days,
+        'depletion_date': fmt_day(depletion_ts) if depletion_ts else None,
+        'daily': [
+            {'day': fmt_day(ts), 'spend': round(float(spend), 2), 'topup': round(float(topup), 2)}
+            for ts, spend, topup in list(zip(daily_starts, daily_spend, daily_topup))[-days:]
+        ],
+        'weekly': [
+            {'week': fmt_day(ts), 'spend': round(float(spend), 2), 'topup': round(float(topup), 2)}
+            for ts, spend, topup in list(zip(weekly_starts, weekly_spend, weekly_topup))[-weeks:]
+        ],
+        'anomalies': [
+            {'time': datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M'), 'drop': round(amount, 2), 'z': round(z, 1)}
+            for ts, amount, z in detect_anomalies(timestamps, balances, window, threshold)
+        ],
+    }
+
+def print_report(card_number, report):
+    print("=" * 60)
+    print(f"📈 BAKİYE ANALİZİ - {card_number}")
+    print("=" * 60)
+    if not report['readings']:
+        print("ℹ️  Kayıt bulunamadı")
+        return
+
+    print(f"📋 {report['readings']:,} okuma ({report['first_reading']} - {report['last_reading']})")
+    print(f"💰 Güncel bakiye: {report['balance']:,.2f} TL")
+    print(f"🔥 Ortalama harcama (son {report['rate_window_days']} gün): {report['daily_rate']:,.2f} TL/gün")
+    if report['depletion_date']:
+        print(f"⏳ Tahmini bitiş tarihi: {report['depletion_date']}")
+    else:
+        print("⏳ Tahmini bitiş tarihi: - (harcama yok)")
+
+    print(f"\n📅 Günlük ({len(report['daily'])} gün)")
+    for row in report['daily']:
+        topup = f"  (+{row['topup']:,.2f} yükleme)" if row['topup'] else ''
+        print(f"   {row['day']}  {row['spend']:>12,.2f} TL{topup}")
+
+    print(f"\n🗓️  Haftalık ({len(report['weekly'])} hafta, Pazartesi başlangıçlı)")
+    for row in report['weekly']:
+        topup = f"  (+{row['topup']:,.2f} yükleme)" if row['topup'] else ''
+        print(f"   {row['week']}  {row['spend']:>12,.2f} TL{topup}")
+
+    print(f"\n⚠️  Olağandışı düşüşler ({len(report['anomalies'])})")
+    for row in report['anomalies'][-20:]:
+        print(f"   {row['time']}  -{row['drop']:,.2f} TL  (z={row['z']})")
+    print("=" * 60)
+
+def synthetic_series(count, interval=900, seed=42):
+    """Ölçüm için sentetik geçmiş: 15 dakikada bir kontrol, ara sıra harcama ve yükleme"""
+    np = _numpy()
+    rng = np.random.default_rng(seed)
+    timestamps = time.time() - interval * np.arange(count, 0, -1, dtype=np.float64)
+    spend = np.where(rng.random(count) < 0.03, rng.gamma(2.0, 150.0, count), 0.0)
+    spend[rng.random(count) < 0.0005] *= 20  # Olağandışı büyük harcamalar
+    topup = np.where(rng.random(count) < 0.002, 5000.0, 0.0)
+    balances = np.maximum(20000.0 + np.cumsum(topup - spend), 0.0)
+    return timestamps, balances
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bakiye geçmişi analizi")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    report_parser = subparsers.add_parser('report', help="Kartın harcama raporu")
+    report_parser.add_argument('card_number')
+    report_parser.add_argument('--since', type=balance_history._parse_time, help="Başlangıç tarihi")
+    report_parser.add_argument('--days', type=int, default=14, help="Günlük tablo ve harcama hızı penceresi")
+    report_parser.add_argument('--weeks', type=int, default=8, help="Haftalık tablodaki hafta sayısı")
+    report_parser.add_argument('--window', type=int, default=30, help="Anomali için önceki düşüş sayısı")
+    report_parser.add_argument('--threshold', type=float, default=3.0, help="Anomali z-skoru eşiği")
+    report_parser.add_argument('--json', action='store_true', help="JSON çıktısı")
+
+    bench_parser = subparsers.add_parser('bench', help="Sentetik veriyle hız ölçümü")
+    bench_parser.add_argument('--readings', type=int, default=500000)
+
+    args = parser.parse_args(argv)
+
+    try:
+        _numpy()
+    except ImportError:
+        print("❌ numpy bulunamadı! Kurulum: pip install numpy")
+        return 1
+
+    if args.command == 'bench':
+        timestamps, balances = synthetic_series(args.readings)
+        started = time.perf_counter()
+        report = build_report(timestamps, balances)
+        elapsed = time.perf_counter() - started
+        print(f"⏱️  {args.readings:,} okuma {elapsed * 1000:.1f} ms içinde analiz edildi "
+              f"({len(report['anomalies'])} anomali)")
+        return 0
+
+    started = time.perf_counter()
+    timestamps, balances, last_seen = load_series(args.card_number, args.since)
+    loaded = time.perf_counter()
+    report = build_report(timestamps, balances, args.days, args.weeks, args.window, args.threshold,
+                          last_seen=last_seen, now=time.time())
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 0
+
+    print_report(args.card_number, report)
+    print(f"⏱️  Yükleme {(loaded - started) * 1000:.0f} ms, analiz {(time.perf_counter() - loaded) * 1000:.0f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Bakiye Geçmişi Deposu (SQLite)
+Geçmiş, değişiklik olayları olarak saklanır: her satır bir bakiyenin ilk görüldüğü
+zamandan (timestamp) son görüldüğü zamana (last_seen_ts) kadar geçerlidir.
+Bakiye değişmemişse yeni satır eklenmez; son satırın last_seen_ts ve check_count
+alanları güncellenir (run-length sıkıştırma). balance_at() herhangi bir andaki
+bakiyeyi bu aralıklardan bulur.
+WAL modu sayesinde cron, daemon ve diğer okuyucular aynı anda güvenle erişebilir.
+
+Eski balance_<kart>.json dosyaları ilk açılışta otomatik olarak içe aktarılır.
+
+Kullanım: python3 balance_history.py migrate [dizin]
+          python3 balance_history.py history <kart_numarası> [--since TARİH] [--until TARİH]
+          python3 balance_history.py at <kart_numarası> <TARİH>
+          python3 balance_history.py compact [kart_numarası]
+          python3 balance_history.py stats
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from datetime import datetime
+
+if __name__ == "__main__":
+    # Komut satırından çalışırken .env'deki BALANCE_DB de geçerli olsun (aşağıda import anında okunur)
+    import config
+    config.preload()
+
+# Veritabanı dosyası (çalışma dizinine göre)
+BALANCE_DB = os.getenv('BALANCE_DB', 'balance_history.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS readings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    card_number TEXT NOT NULL,
+    balance REAL NOT NULL,
+    card_type TEXT,
+    status TEXT,
+    checked_at TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    last_seen_ts REAL,
+    check_count INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_readings_card_ts ON readings (card_number, timestamp);
+
+-- Her kartın son okuması: get_last_balance tek satırlık birincil anahtar araması yapar
+-- (timestamp: son görülme zamanı)
+CREATE TABLE IF NOT EXISTS latest (
+    card_number TEXT PRIMARY KEY,
+    reading_id INTEGER NOT NULL,
+    balance REAL NOT NULL,
+    timestamp REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Thread başına bağlantı (sqlite3 bağlantıları thread'ler arasında paylaşılamaz)
+_local = threading.local()
+_initialized_paths = set()
+_init_lock = threading.Lock()
+
+def connect(db_path=None):
+    """
+    Veritabanı bağlantısını döndür (thread başına önbelleğe alınır)
+    İlk açılışta şema oluşturulur ve eski JSON dosyaları içe aktarılır.
+    """
+    db_path = os.path.abspath(db_path or BALANCE_DB)
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(db_path)
+    if conn is not None:
+        return conn
+
+    # isolation_level=None: transaction'ları açıkça yönetiyoruz (BEGIN IMMEDIATE)
+    conn = sqlite3.connect(db_path, timeout=10, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")  # WAL ile güvenli, SD kart yazımını azaltır
+    conn.execute("PRAGMA busy_timeout=10000")
+
+    with _init_lock:
+        if db_path not in _initialized_paths:
+            conn.executescript(SCHEMA)
+            _upgrade_schema(conn)
+            migrate_json_files(os.path.dirname(db_path), conn=conn)
+            _initialized_paths.add(db_path)
+
+    connections[db_path] = conn
+    return conn
+
+def _upgrade_schema(conn):
+    """Eski veritabanlarına run-length sütunlarını ekle"""
+    columns = {row['name'] for row in conn.execute("PRAGMA table_info(readings)")}
+    if 'last_seen_ts' not in columns:
+        conn.execute("ALTER TABLE readings ADD COLUMN last_seen_ts REAL")
+    if 'check_count' not in columns:
+        conn.execute("ALTER TABLE readings ADD COLUMN check_count INTEGER NOT NULL DEFAULT 1")
+    conn.execute("UPDATE readings SET last_seen_ts = timestamp WHERE last_seen_ts IS NULL")
+
+def _same_reading(row, balance, card_type, status):
+    return (round(row['balance'], 2) == round(balance, 2)
+            and row['card_type'] == card_type and row['status'] == status)
+
+def _row_to_dict(row):
+    return dict(row) if row is not None else None
+
+def _insert_reading(conn, card_number, balance, card_type, status, timestamp):
+    """
+    Okumayı ekle (açık bir transaction içinde çağrılmalı)
+    Son okumayla aynıysa yeni satır eklenmez, son satırın görülme aralığı uzatılır.
+    """
+    previous = conn.execute(
+        "SELECT r.* FROM latest l JOIN readings r ON r.id = l.reading_id WHERE l.card_number = ?",
+        (card_number,)
+    ).fetchone()
+    if (previous is not None and timestamp >= previous['last_seen_ts']
+            and _same_reading(previous, balance, card_type, status)):
+        conn.execute(
+            "UPDATE readings SET last_seen_ts = ?, check_count = check_count + 1 WHERE id = ?",
+            (timestamp, previous['id'])
+        )
+        conn.execute("UPDATE latest SET timestamp = ? WHERE card_number = ?", (timestamp, card_number))
+        return previous['id']
+
+    checked_at = datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+    cursor = conn.execute(
+        "INSERT INTO readings (card_number, balance, card_type, status, checked_at, timestamp, last_seen_ts) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (card_number, balance, card_type, status, checked_at, timestamp, timestamp)
+    )
+    # Geçmişe dönük (migration) kayıtlar daha yeni bir okumanın üzerine yazmamalı
+    conn.execute(
+        "INSERT INTO latest (card_number, reading_id, balance, timestamp) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (card_number) DO UPDATE SET "
+        "reading_id = excluded.reading_id, balance = excluded.balance, timestamp = excluded.timestamp "
+        "WHERE excluded.timestamp >= latest.timestamp",
+        (card_number, cursor.lastrowid, balance, timestamp)
+    )
+    return cursor.lastrowid
+
+def append_reading(card_number, balance, card_type=None, status=None, timestamp=None, conn=None):
+    """
+    Yeni bir bakiye okuması kaydet ve son okuma işaretçisini güncelle
+    Değişmeyen bakiye sadece son satırı günceller (bkz. _insert_reading).
+    """
+    conn = conn or connect()
+    timestamp = time.time() if timestamp is None else timestamp
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        reading_id = _insert_reading(conn, card_number, balance, card_type, status, timestamp)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    return reading_id
+
+def last_reading(card_number, conn=None):
+    """Kartın son okumasını döndür (yoksa None)"""
+    conn = conn or connect()
+    row = conn.execute(
+        "SELECT r.* FROM latest l JOIN readings r ON r.id = l.reading_id WHERE l.card_number = ?",
+        (card_number,)
+    ).fetchone()
+    return _row_to_dict(row)
+
+def latest_readings(conn=None):
+    """Tüm kartların son okumaları (kart numarasına göre sıralı)"""
+    conn = conn or connect()
+    rows = conn.execute(
+        "SELECT r.* FROM latest l JOIN readings r ON r.id = l.reading_id ORDER BY l.card_number"
+    )
+    return [dict(row) for row in rows]
+
+def readings_between(card_number, start_ts=None, end_ts=None, conn=None):
+    """
+    Verilen zaman aralığına dokunan bakiye aralıklarını eskiden yeniye döndür (indeksli sorgu)
+    Aralık başlamadan önce görülen ve aralık içinde hâlâ geçerli olan bakiye de dahildir.
+    """
+    conn = conn or connect()
+    start_ts = float('-inf') if start_ts is None else start_ts
+    end_ts = float('inf') if end_ts is None else end_ts
+    rows = conn.execute(
+        "SELECT * FROM readings WHERE card_number = ? AND timestamp <= ? AND last_seen_ts >= ? "
+        "ORDER BY timestamp",
+        (card_number, end_ts, start_ts)
+    )
+    return [dict(row) for row in rows]
+
+def balance_at(card_number, ts, conn=None):
+    """
+    Verilen andaki bakiye: o andan önce ilk görülen son değişiklik olayı
+    Dönüş: okuma sözlüğü veya None (o tarihten önce kayıt yoksa).
+    'observed' alanı, anın gerçekten kontrol edilmiş aralıkta (timestamp..last_seen_ts)
+    olup olmadığını gösterir; değilse bakiye bir sonraki değişikliğe kadar aynı varsayılır.
+    """
+    conn = conn or connect()
+    row = conn.execute(
+        "SELECT * FROM readings WHERE card_number = ? AND timestamp <= ? ORDER BY timestamp DESC LIMIT 1",
+        (card_number, ts)
+    ).fetchone()
+    if row is None:
+        return None
+    reading = dict(row)
+    reading['observed'] = ts <= reading['last_seen_ts']
+    return reading
+
+def compact(card_number=None, conn=None):
+    """
+    Geçmişteki ardışık aynı okumaları tek aralıkta birleştir (eski veritabanları için)
+    Yeni okumalar zaten kaydedilirken birleştirilir.
+    Dönüş: silinen satır sayısı
+    """
+    conn = conn or connect()
+    if card_number is None:
+        cards = [row[0] for row in conn.execute("SELECT DISTINCT card_number FROM readings")]
+    else:
+        cards = [card_number]
+
+    removed = 0
+    for card in cards:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            run = None
+            merged_ids = []
+            for row in conn.execute(
+                "SELECT * FROM readings WHERE card_number = ? ORDER BY timestamp, id", (card,)
+            ).fetchall():
+                if run is not None and _same_reading(run, row['balance'], row['card_type'], row['status']):
+                    run['last_seen_ts'] = max(run['last_seen_ts'], row['last_seen_ts'])
+                    run['check_count'] += row['check_count']
+                    merged_ids.append(row['id'])
+                    continue
+                if run is not None:
+                    conn.execute("UPDATE readings SET last_seen_ts = ?, check_count = ? WHERE id = ?",
+                                 (run['last_seen_ts'], run['check_count'], run['id']))
+                run = dict(row)
+            if run is not None:
+                conn.execute("UPDATE readings SET last_seen_ts = ?, check_count = ? WHERE id = ?",
+                             (run['last_seen_ts'], run['check_count'], run['id']))
+                conn.execute("UPDATE latest SET reading_id = ?, balance = ?, timestamp = ? WHERE card_number = ?",
+                             (run['id'], run['balance'], run['last_seen_ts'], card))
+            conn.executemany("DELETE FROM readings WHERE id = ?", [(reading_id,) for reading_id in merged_ids])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        removed += len(merged_ids)
+
+    return removed
+
+def stats(conn=None):
+    """Kart başına satır ve kontrol sayıları"""
+    conn = conn or connect()
+    return [dict(row) for row in conn.execute(
+        "SELECT card_number, COUNT(*) AS rows, SUM(check_count) AS checks, "
+        "MIN(timestamp) AS first_ts, MAX(last_seen_ts) AS last_ts FROM readings GROUP BY card_number"
+    )]
+
+def migrate_json_files(directory='.', conn=None):
+    """
+    Eski balance_<kart>.json dosyalarını içe aktar
+    Her dosya-zaman damgası çifti bir kez aktarılır; dosyalar silinmez.
+    """
+    conn = conn or connect()
+    imported = 0
+
+    for path in sorted(glob.glob(os.path.join(directory, 'balance_*.json'))):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            card_number = str(data.get('card_number') or os.path.basename(path)[len('balance_'):-len('.json')])
+            balance = float(data['balance'])
+            timestamp = float(data.get('timestamp') or os.path.getmtime(path))
+        except Exception as e:
+            print(f"⚠️  {path} içe aktarılamadı: {e}")
+            continue
+
+        key = f"migrated:{os.path.basename(path)}:{timestamp}"
+        if conn.execute("SELECT 1 FROM meta WHERE key = ?", (key,)).fetchone():
+            continue
+
+        # Okuma ve aktarım işareti aynı transaction'da: yarıda kalırsa tekrar aktarılmaz
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            _insert_reading(conn, card_number, balance, data.get('card_type'), data.get('status'), timestamp)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(time.time())))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        imported += 1
+        print(f"📥 {path} bakiye geçmişine aktarıldı")
+
+    return imported
+
+def _parse_time(value):
+    """'YYYY-MM-DD' veya 'YYYY-MM-DD HH:MM' biçimindeki tarihi timestamp'e çevir"""
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"Geçersiz tarih: {value}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bakiye geçmişi deposu")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    migrate_parser = subparsers.add_parser('migrate', help="balance_*.json dosyalarını içe aktar")
+    migrate_parser.add_argument('directory', nargs='?', default='.')
+
+    history_parser = subparsers.add_parser('history', help="Kartın bakiye geçmişini göster")
+    history_parser.add_argument('card_number')
+    history_parser.add_argument('--since', type=_parse_time)
+    history_parser.add_argument('--until', type=_parse_time)
+
+    at_parser = subparsers.add_parser('at', help="Kartın belirli bir andaki bakiyesi")
+    at_parser.add_argument('card_number')
+    at_parser.add_argument('time', type=_parse_time)
+
+    compact_parser = subparsers.add_parser('compact', help="Ardışık aynı okumaları birleştir")
+    compact_parser.add_argument('card_number', nargs='?')
+
+    subparsers.add_parser('stats', help="Kart başına kayıt ve kontrol sayıları")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'migrate':
+        count = migrate_json_files(args.directory)
+        print(f"✅ {count} dosya içe aktarıldı")
+        return 0
+
+    if args.command == 'compact':
+        removed = compact(args.card_number)
+        print(f"✅ {removed} tekrar eden okuma birleştirildi")
+        return 0
+
+    if args.command == 'stats':
+        for row in stats():
+            ratio = row['checks'] / row['rows'] if row['rows'] else 0
+            print(f"💳 {row['card_number']}: {row['checks']:,} kontrol, {row['rows']:,} kayıt "
+                  f"(x{ratio:.1f} sıkıştırma), "
+                  f"{datetime.fromtimestamp(row['first_ts']):%Y-%m-%d} - {datetime.fromtimestamp(row['last_ts']):%Y-%m-%d}")
+        return 0
+
+    if args.command == 'at':
+        reading = balance_at(args.card_number, args.time)
+        if reading is None:
+            print("ℹ️  Bu tarihten önce kayıt yok")
+            return 1
+        note = '' if reading['observed'] else ' (bu anda kontrol yapılmamış, sonraki değişikliğe kadar geçerli)'
+        print(f"💰 {reading['balance']:,.2f} TL - {reading['checked_at']} tarihinden beri{note}")
+        return 0
+
+    readings = readings_between(args.card_number, args.since, args.until)
+    if not readings:
+        print("ℹ️  Kayıt bulunamadı")
+        return 0
+
+    for reading in readings:
+        last_seen = datetime.fromtimestamp(reading['last_seen_ts']).strftime('%Y-%m-%d %H:%M:%S')
+        print(f"{reading['checked_at']} - {last_seen}  {reading['balance']:>12,.2f} TL  "
+              f"{reading['check_count']:>5}x  {reading['status'] or ''}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
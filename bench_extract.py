@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+HTML Çıkarım Performans Karşılaştırması
+Kaydedilmiş debug sayfaları üzerinde eski BeautifulSoup yaklaşımını ve
+html_extract backend'lerini karşılaştırır.
+
+Kullanım: python3 bench_extract.py [dosya.html ...] [--repeat 50]
+Dosya verilmezse debug deposundaki (debug_store.py) kayıtlar ve eski debug_*.html
+dosyaları kullanılır; hiç kayıt yoksa örnek bir sayfa üretilir.
+"""
+
+import re
+import sys
+import glob
+import time
+import argparse
+import importlib.util
+
+import debug_store
+import html_extract
+
+def build_sample_page(filler_rows=400):
+    """Gerçek sayfaya benzeyen örnek bir bakiye sorgulama sayfası üret"""
+    rows = '\n'.join(
+        f'<tr><td class="c">Satır {idx}</td><td><a href="/link/{idx}">Bağlantı {idx}</a></td>'
+        f'<td><img src="/img/icon_{idx}.png" alt="ikon"></td></tr>'
+        for idx in range(filler_rows)
+    )
+    return f"""<!DOCTYPE html>
+<html><head><title>Bakiye Sorgula</title>
+<script>var config = {{"a": 1, "b": [1, 2, 3]}};</script>
+<style>.c {{ color: red; }}</style></head>
+<body>
+<form action="/account/balanceinquiry" method="post">
+<input type="text" name="CardNumber" value="">
+<input type="hidden" name="DNTCaptchaText" value="CfDJ8NsvHJ3bQ4FDg1fQ2mV0x8xW8cA9b5t7oKpL">
+<input type="hidden" name="DNTCaptchaToken" value="CfDJ8NsvHJ3bQ4FDg1fQ2mV0x8xW8cA9b5t7oKpLtoken">
+<img id="dntCaptchaImg" src="/DNTCaptchaImage/Show?data=abc123" alt="captcha">
+<input type="text" name="DNTCaptchaInputText">
+</form>
+<table>{rows}</table>
+<div class="result">Bakiyeniz: 4.500,00 TL</div>
+</body></html>"""
+
+# Bakiye içermeyen yanıt; satır içi JS/CSS'teki "123 TL" bakiye olarak okunmamalı
+SCRIPT_ONLY_RESPONSE = """<html><head>
+<script>var limit = "123 TL"; if (a < b) { x = 1; }</script>
+<style>.tutar::after { content: "45 TL"; }</style></head>
+<body><div class="error">Kart bulunamadı</div></body></html>"""
+
+def check_script_text():
+    """Her backend script/style içeriğini sayfa metnine katmamalı; dönüş: hatalı backend sayısı"""
+    failures = 0
+    for backend in html_extract.available_backends():
+        text, balance = html_extract.extract_balance(SCRIPT_ONLY_RESPONSE, backend=backend)
+        if balance is not None or 'TL' in text:
+            print(f"   ⚠️  {backend}: script/style metni bakiye olarak okundu ({balance!r})")
+            failures += 1
+    return failures
+
+def legacy_page_fields(html):
+    """Eski yaklaşım: BeautifulSoup ağacı + iki ayrı find_all geçişi"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    fields = {'captcha_token': None, 'captcha_text': None, 'captcha_img_url': None}
+    for input_tag in soup.find_all('input'):
+        name = input_tag.get('name', '')
+        if name == 'DNTCaptchaToken':
+            fields['captcha_token'] = input_tag.get('value')
+        elif name == 'DNTCaptchaText':
+            fields['captcha_text'] = input_tag.get('value')
+    for img in soup.find_all('img'):
+        src = img.get('src', '')
+        if 'captcha' in src.lower() or 'captcha' in img.get('alt', '').lower():
+            fields['captcha_img_url'] = src
+            break
+    return fields
+
+def legacy_balance(html):
+    """Eski yaklaşım: BeautifulSoup get_text() + sırayla dört regex"""
+    from bs4 import BeautifulSoup
+
+    text = BeautifulSoup(html, 'html.parser').get_text()
+    for pattern in html_extract.BALANCE_PATTERNS:
+        match = re.search(pattern, text, re.I)
+        if match:
+            return match.group(0)
+    return None
+
+def measure(func, html, repeat):
+    """Fonksiyonun bir çağrısının en iyi süresini milisaniye olarak döndür"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(html)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML çıkarım performans karşılaştırması")
+    parser.add_argument('files', nargs='*', help="HTML dosyaları (varsayılan: debug deposu ve debug_*.html)")
+    parser.add_argument('--repeat', type=int, default=30, help="Her ölçüm için tekrar sayısı")
+    args = parser.parse_args()
+
+    files = args.files or sorted(glob.glob('debug_*.html'))
+    pages = []
+    for path in files:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            pages.append((path, f.read()))
+    if not args.files:
+        for entry in debug_store.load_index():
+            pages.append((entry['file'], debug_store.read(entry)))
+    if not pages:
+        print("ℹ️  Debug kaydı bulunamadı, örnek sayfa kullanılıyor")
+        pages.append(('örnek sayfa', build_sample_page()))
+
+    candidates = []
+    if importlib.util.find_spec('bs4') is not None:
+        candidates.append(('bs4 (eski)', legacy_page_fields, legacy_balance))
+    for backend in html_extract.available_backends():
+        candidates.append((
+            backend,
+            lambda html, b=backend: html_extract.extract_page_fields(html, backend=b),
+            lambda html, b=backend: html_extract.extract_balance(html, backend=b)[1],
+        ))
+
+    print("=" * 72)
+    print("⏱️  HTML ÇIKARIM KARŞILAŞTIRMASI (en iyi süre, ms)")
+    print("=" * 72)
+
+    for path, html in pages:
+        print(f"\n📄 {path} ({len(html) / 1024:.1f} KB)")
+        print(f"   {'backend':<14} {'sayfa alanları':>16} {'bakiye metni':>16}")
+        baseline = None
+        for name, page_func, balance_func in candidates:
+            page_ms = measure(page_func, html, args.repeat)
+            balance_ms = measure(balance_func, html, args.repeat)
+            total = page_ms + balance_ms
+            if baseline is None:
+                baseline = total
+            speedup = f"  x{baseline / total:.1f}" if total else ""
+            print(f"   {name:<14} {page_ms:>16.2f} {balance_ms:>16.2f}{speedup}")
+
+            # Sonuçlar eski yaklaşımla aynı olmalı
+            if candidates[0][0] == 'bs4 (eski)':
+                expected_fields = legacy_page_fields(html)
+                got_fields = page_func(html)
+                for key, value in expected_fields.items():
+                    if got_fields.get(key) != value:
+                        print(f"   ⚠️  {name}: {key} farklı ({got_fields.get(key)!r} != {value!r})")
+                if balance_func(html) != legacy_balance(html):
+                    print(f"   ⚠️  {name}: bakiye metni farklı")
+
+    print("\n" + "=" * 72)
+    return 1 if check_script_text() else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Uçtan Uca Performans Ölçümü (Çevrimdışı)
+fake_shell_server.py'yi başlatır ve shell_auto_checker.py'yi her turda ayrı bir süreç
+olarak çalıştırır. Ölçülenler:
+- uçtan uca süre (süreç başlangıcı dahil) ve main() süresi
+- faz süreleri (runs.jsonl kaydından: page, ocr, inquiry, persist, notify)
+- CPU süresi (user + sys) ve en yüksek RSS (os.wait4 ile alt süreçten)
+
+- sunucuya açılan TCP bağlantısı sayısı (kontrol başına)
+
+--daemon ile tüm kontroller tek süreçte art arda çalışır (daemon modu gibi: HTTP bağlantıları
+ve çerezler kontroller arasında korunur). --connect-latency her yeni bağlantıya TCP/TLS
+el sıkışması yerine gecikme ekler; bağlantı yeniden kullanımının kazancı böyle görülür.
+
+Sonuçlar git commit'i ile birlikte benchmarks.jsonl dosyasına eklenir;
+commit'ler arası karşılaştırma için: python3 benchmark.py --history
+
+Kullanım: python3 benchmark.py [--runs 10] [--response json|html] [--latency 20] [--connect-latency 100]
+                               [--daemon] [--ocr]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+
+import fake_shell_server
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BENCH_FILE = os.getenv('BENCH_FILE', os.path.join(ROOT, 'benchmarks.jsonl'))
+BENCH_CARD = '2400000000'
+
+def git_revision():
+    """Ölçülen kodun commit'i (çalışma ağacında değişiklik varsa '+dirty' eklenir)"""
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return revision + ('+dirty' if dirty else '')
+    except Exception:
+        return 'unknown'
+
+def _maxrss_mb(rusage):
+    # Linux'ta KB, macOS'ta byte
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return rusage.ru_maxrss / divisor
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+def _median(values):
+    return _percentile(values, 0.5)
+
+def run_once(workdir, env):
+    """shell_auto_checker.py'yi bir kez çalıştır ve süreç ölçümlerini döndür"""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'shell_auto_checker.py'), BENCH_CARD],
+        cwd=workdir, env=env, stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+    )
+    output = process.stdout.read()
+    _, status, rusage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    wall = time.perf_counter() - started
+
+    return {
+        'exit_code': process.returncode,
+        'wall': wall,
+        'cpu': rusage.ru_utime + rusage.ru_stime,
+        'peak_rss_mb': _maxrss_mb(rusage),
+        'output': output.decode('utf-8', errors='replace'),
+    }
+
+def run_daemon_once(workdir, env, checks):
+    """Tüm kontrolleri tek süreçte art arda çalıştır (daemon modu) ve süreç ölçümlerini döndür"""
+    code = (
+        f"import sys; sys.path.insert(0, {ROOT!r}); import shell_auto_checker as checker; "
+        f"sys.exit(max(checker.main() for _ in range({checks})))"
+    )
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-c', code],
+        cwd=workdir, env=env, stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+    )
+    output = process.stdout.read()
+    _, status, rusage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    wall = time.perf_counter() - started
+
+    return {
+        'exit_code': process.returncode,
+        'wall': wall,
+        'cpu': rusage.ru_utime + rusage.ru_stime,
+        'peak_rss_mb': _maxrss_mb(rusage),
+        'output': output.decode('utf-8', errors='replace'),
+    }
+
+def read_run_records(path):
+    records = []
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                records.append(json.loads(line))
+    return records
+
+def benchmark(args):
+    server, base_url = fake_shell_server.start_server(
+        response=args.response, latency=args.latency / 1000, spend=args.spend,
+        connect_latency=args.connect_latency / 1000, page_rows=args.page_rows,
+    )
+    workdir = tempfile.mkdtemp(prefix='shell-bench-')
+
+    env = dict(os.environ)
+    env.update({
+        'SHELL_BASE_URL': base_url,
+        'CARD_NUMBER': BENCH_CARD,
+        'TELEGRAM_ENABLED': 'false',
+        'EMAIL_ENABLED': 'false',
+        'WHATSAPP_ENABLED': 'false',
+        'RETRY_MAX_ATTEMPTS': '1',
+        'BALANCE_DB': os.path.join(workdir, 'balance_history.db'),
+        'RUN_LOG_FILE': os.path.join(workdir, 'runs.jsonl'),
+        'SHELL_COOKIE_FILE': os.path.join(workdir, 'shell_cookies.json'),
+        'TRACE_ENABLED': 'false',
+        'PYTHONUNBUFFERED': '1',
+    })
+    if args.low_memory:
+        env['LOW_MEMORY'] = 'true'
+    if args.ocr:
+        env.pop('CAPTCHA_CODE', None)
+    else:
+        env['CAPTCHA_CODE'] = fake_shell_server.CAPTCHA_TEXT
+
+    print(f"🧪 Sahte sunucu: {base_url} (yanıt: {args.response}, gecikme: {args.latency:g} ms, "
+          f"bağlantı gecikmesi: {args.connect_latency:g} ms, mod: {'daemon' if args.daemon else 'cron'}"
+          f"{', düşük bellek' if args.low_memory else ''})")
+    print(f"📁 Çalışma dizini: {workdir}")
+
+    samples = []
+    try:
+        if args.daemon:
+            sample = run_daemon_once(workdir, env, args.warmup + args.runs)
+            if sample['exit_code'] not in (0, 1):
+                print(sample['output'][-2000:])
+                print(f"❌ Daemon turu beklenmedik şekilde sonlandı (çıkış kodu: {sample['exit_code']})")
+                return None
+            samples.append(sample)
+            print(f"   {args.warmup + args.runs} kontrol: {sample['wall'] * 1000:8.1f} ms, "
+                  f"CPU {sample['cpu'] * 1000:7.1f} ms, RSS {sample['peak_rss_mb']:6.1f} MB")
+        for index in range(0 if args.daemon else args.warmup + args.runs):
+            sample = run_once(workdir, env)
+            if sample['exit_code'] not in (0, 1):
+                # 1: kontrol başarısız (örn. HTML yanıtta bakiye JSON'u yok) - yine de ölçülür
+                print(sample['output'][-2000:])
+                print(f"❌ Tur {index + 1} beklenmedik şekilde sonlandı (çıkış kodu: {sample['exit_code']})")
+                return None
+            if index >= args.warmup:
+                samples.append(sample)
+            status = '' if sample['exit_code'] == 0 else ' ❌'
+            print(f"   tur {index + 1:>3}: {sample['wall'] * 1000:8.1f} ms, CPU {sample['cpu'] * 1000:7.1f} ms, "
+                  f"RSS {sample['peak_rss_mb']:6.1f} MB{' (ısınma)' if index < args.warmup else ''}{status}")
+
+        records = read_run_records(env['RUN_LOG_FILE'])[args.warmup:]
+    finally:
+        server.shutdown()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    phase_names = []
+    for record in records:
+        for name in record.get('phases', {}):
+            if name not in phase_names:
+                phase_names.append(name)
+
+    if args.daemon:
+        # Tek süreç: kontrol başına uçtan uca süre yerine main() süresi kullanılır
+        walls = [record.get('duration', 0.0) for record in records]
+    else:
+        walls = [sample['wall'] for sample in samples]
+    outcomes = {}
+    for record in records:
+        outcomes[record.get('outcome')] = outcomes.get(record.get('outcome'), 0) + 1
+    durations = [record.get('duration', 0.0) for record in records]
+    return {
+        'ts': datetime.now().strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': git_revision(),
+        'python': sys.version.split()[0],
+        'config': {'runs': args.runs, 'response': args.response, 'latency_ms': args.latency, 'ocr': args.ocr,
+                   'connect_latency_ms': args.connect_latency, 'mode': 'daemon' if args.daemon else 'cron',
+                   'page_rows': args.page_rows, 'low_memory': args.low_memory},
+        'outcomes': outcomes,
+        'e2e_ms': {'p50': round(_median(walls) * 1000, 1), 'p95': round(_percentile(walls, 0.95) * 1000, 1)},
+        'main_ms': {'p50': round(_median(durations) * 1000, 1), 'p95': round(_percentile(durations, 0.95) * 1000, 1)},
+        'phases_ms': {
+            name: round(_median([record['phases'].get(name, 0.0) for record in records]) * 1000, 2)
+            for name in phase_names
+        },
+        'cpu_ms': round(_median([sample['cpu'] for sample in samples]) * 1000, 1),
+        'peak_rss_mb': round(max(sample['peak_rss_mb'] for sample in samples), 1),
+        'connections_per_check': round(server.RequestHandlerClass.state.connections / (args.warmup + args.runs), 2),
+    }
+
+def print_result(result):
+    print("\n" + "=" * 60)
+    print(f"📊 SONUÇ ({result['commit']}, {result['config']['runs']} tur, medyan)")
+    print("=" * 60)
+    print(f"   Uçtan uca:   p50 {result['e2e_ms']['p50']:8.1f} ms   p95 {result['e2e_ms']['p95']:8.1f} ms")
+    print(f"   main():      p50 {result['main_ms']['p50']:8.1f} ms   p95 {result['main_ms']['p95']:8.1f} ms")
+    print(f"   CPU:         {result['cpu_ms']:8.1f} ms")
+    print(f"   En yüksek RSS: {result['peak_rss_mb']:.1f} MB")
+    print(f"   Bağlantı:    kontrol başına {result['connections_per_check']:g} TCP bağlantısı")
+    print(f"   Sonuçlar:    {', '.join(f'{name}: {count}' for name, count in result['outcomes'].items())}")
+    for name, milliseconds in result['phases_ms'].items():
+        print(f"   faz {name:<10} {milliseconds:8.2f} ms")
+    print("=" * 60)
+
+def print_history(limit):
+    """Kaydedilmiş ölçümleri commit'lere göre karşılaştır"""
+    entries = read_run_records(BENCH_FILE)[-limit:]
+    if not entries:
+        print(f"ℹ️  {BENCH_FILE} içinde kayıt yok")
+        return 0
+
+    print(f"{'tarih':<20} {'commit':<14} {'yanıt':<5} {'e2e p50':>9} {'main p50':>9} {'CPU':>8} {'RSS MB':>7}")
+    previous = None
+    for entry in entries:
+        change = ''
+        if previous and previous['config'] == entry['config'] and previous['e2e_ms']['p50']:
+            change = f"  {(entry['e2e_ms']['p50'] / previous['e2e_ms']['p50'] - 1) * 100:+.1f}%"
+        print(f"{entry['ts']:<20} {entry['commit']:<14} {entry['config']['response']:<5} "
+              f"{entry['e2e_ms']['p50']:>9.1f} {entry['main_ms']['p50']:>9.1f} {entry['cpu_ms']:>8.1f} "
+              f"{entry['peak_rss_mb']:>7.1f}{change}")
+        previous = entry
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Çevrimdışı uçtan uca performans ölçümü")
+    parser.add_argument('--runs', type=int, default=10, help="Ölçülecek tur sayısı")
+    parser.add_argument('--warmup', type=int, default=1, help="Ölçüme katılmayan ısınma turu sayısı")
+    parser.add_argument('--response', choices=['json', 'html'], default='json', help="Sorgu yanıt formatı")
+    parser.add_argument('--latency', type=float, default=0.0, help="Sahte sunucu gecikmesi (ms)")
+    parser.add_argument('--spend', type=float, default=0.0, help="Her sorguda düşülecek bakiye (kayıt/bildirim yolu)")
+    parser.add_argument('--connect-latency', type=float, default=0.0,
+                        help="Her yeni bağlantıya eklenecek gecikme, TCP/TLS el sıkışması yerine (ms)")
+    parser.add_argument('--daemon', action='store_true', help="Kontrolleri tek süreçte art arda çalıştır")
+    parser.add_argument('--ocr', action='store_true', help="CAPTCHA_CODE yerine gerçek OCR kullan")
+    parser.add_argument('--page-rows', type=int, default=400,
+                        help="Sorgu sayfasındaki dolgu satırı sayısı (büyük sayfa için artırın)")
+    parser.add_argument('--low-memory', action='store_true', help="Düşük bellek modunda ölç (LOW_MEMORY=true)")
+    parser.add_argument('--keep', action='store_true', help="Çalışma dizinini silme")
+    parser.add_argument('--no-save', action='store_true', help=f"Sonucu {os.path.basename(BENCH_FILE)} dosyasına ekleme")
+    parser.add_argument('--history', type=int, nargs='?', const=20, help="Son N ölçümü karşılaştır")
+    args = parser.parse_args()
+
+    if args.history:
+        return print_history(args.history)
+
+    result = benchmark(args)
+    if result is None:
+        return 1
+
+    print_result(result)
+    if not args.no_save:
+        with open(BENCH_FILE, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(result, ensure_ascii=False) + '\n')
+        print(f"💾 Sonuç kaydedildi: {BENCH_FILE}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
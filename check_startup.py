@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Soğuk Başlangıç Bütçesi Kontrolü
+shell_auto_checker modülünün import süresini `python -X importtime` ile ölçer.
+Süre bütçeyi aşarsa veya ağır bağımlılıklar import anında yüklenirse hata verir.
+
+Kullanım: python3 check_startup.py [--budget-ms 150] [--runs 5]
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Import anında yüklenmemesi gereken modüller (sadece ihtiyaç duyulan yolda yüklenmeli)
+FORBIDDEN_MODULES = [
+    'requests',
+    'bs4',
+    'smtplib',
+    'email.mime',
+    'pytesseract',
+    'PIL',
+    'twilio',
+]
+
+# Varsayılan bütçe (milisaniye). Raspberry Pi gibi yavaş cihazlarda
+# STARTUP_BUDGET_MS ile yükseltilebilir.
+DEFAULT_BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS', '150'))
+
+def measure_import(module='shell_auto_checker'):
+    """
+    Modülü yeni bir yorumlayıcıda import et ve importtime çıktısını işle
+    Dönüş: (toplam süre ms, import edilen modül isimleri)
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=SCRIPT_DIR,
+        capture_output=True,
+        text=True,
+    )
+
+    if result.returncode != 0:
+        raise RuntimeError(f"{module} import edilemedi:\n{result.stderr}")
+
+    total_us = None
+    imported = []
+
+    # Satır formatı: "import time:  self [us] | cumulative | imported package"
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue  # Başlık satırı
+        name = parts[2].strip()
+        imported.append(name)
+        if name == module:
+            total_us = int(parts[1].strip())
+
+    if total_us is None:
+        raise RuntimeError(f"importtime çıktısında {module} bulunamadı")
+
+    return total_us / 1000.0, imported
+
+def main():
+    parser = argparse.ArgumentParser(description="Soğuk başlangıç bütçesi kontrolü")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"İzin verilen en fazla import süresi (varsayılan: {DEFAULT_BUDGET_MS:.0f} ms)")
+    parser.add_argument('--runs', type=int, default=5,
+                        help="Ölçüm tekrarı; en iyi sonuç kullanılır (varsayılan: 5)")
+    args = parser.parse_args()
+
+    timings = []
+    imported = []
+    for _ in range(max(1, args.runs)):
+        elapsed_ms, imported = measure_import()
+        timings.append(elapsed_ms)
+
+    # En iyi ölçüm gürültüden en az etkilenen ölçümdür
+    best_ms = min(timings)
+    failed = False
+
+    print("=" * 60)
+    print("⏱️  SOĞUK BAŞLANGIÇ KONTROLÜ")
+    print("=" * 60)
+    print(f"📊 Import süresi: {best_ms:.1f} ms (en iyi {len(timings)} ölçüm)")
+    print(f"🎯 Bütçe: {args.budget_ms:.1f} ms")
+
+    if best_ms > args.budget_ms:
+        print(f"❌ Bütçe aşıldı: {best_ms:.1f} ms > {args.budget_ms:.1f} ms")
+        failed = True
+    else:
+        print("✅ Bütçe içinde")
+
+    eager = sorted({
+        forbidden for name in imported
+        for forbidden in FORBIDDEN_MODULES
+        if name == forbidden or name.startswith(forbidden + '.')
+    })
+    if eager:
+        print("❌ Import anında yüklenmemesi gereken modüller yüklendi:")
+        for name in eager:
+            print(f"   - {name}")
+        failed = True
+    else:
+        print("✅ Ağır bağımlılıklar import anında yüklenmiyor")
+
+    print("=" * 60)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
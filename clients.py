@@ -0,0 +1,233 @@
+"""
+Paylaşılan Bağlantı İstemcileri
+Bildirim ve HTTP istemcilerini süreç boyunca yeniden kullanır:
+- API host'u başına tek bir keep-alive requests.Session
+- Oturum çerezlerinin dosyaya kaydedilip sonraki çalıştırmada (cron) geri yüklenmesi
+- Kimliği doğrulanmış, sağlık kontrolü yapılan ve gerektiğinde yeniden bağlanan SMTP bağlantısı
+- Kimlik bilgisi başına tek bir Twilio Client
+
+Daemon modunda veya birden fazla bildirimde TCP/TLS el sıkışması ve SMTP login tekrarlanmaz.
+Ağır kütüphaneler (requests, smtplib, twilio) ilk kullanımda import edilir.
+"""
+
+import os
+import json
+import time
+import atexit
+import threading
+
+_lock = threading.Lock()
+_http_sessions = {}
+_smtp_clients = {}
+_twilio_clients = {}
+
+# Twilio Client sınıfı (ilk kullanımda yüklenir, başarısız import da önbelleğe alınır)
+_twilio_client_class = None
+_twilio_import_failed = False
+
+def get_http_session(host, pool_maxsize=4):
+    """Host başına paylaşılan keep-alive requests.Session döndür"""
+    with _lock:
+        session = _http_sessions.get(host)
+        if session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _http_sessions[host] = session
+        return session
+
+def save_cookies(session, path):
+    """
+    Oturumun çerezlerini dosyaya yaz (sadece sahibi okuyabilir: 0600)
+    Dosya önce geçici adla yazılıp yerine taşınır; yarım dosya kalmaz.
+    """
+    now = time.time()
+    cookies = [
+        {
+            'name': cookie.name,
+            'value': cookie.value,
+            'domain': cookie.domain,
+            'path': cookie.path,
+            'expires': cookie.expires,
+            'secure': cookie.secure,
+            'rest': dict(getattr(cookie, '_rest', {})),
+        }
+        for cookie in session.cookies
+        if cookie.expires is None or cookie.expires > now
+    ]
+    tmp_path = f"{path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({'saved_at': now, 'cookies': cookies}, f)
+    os.replace(tmp_path, path)
+
+def load_cookies(session, path, session_ttl=1200):
+    """
+    Kaydedilmiş çerezleri oturuma yükle; süresi dolanlar atlanır
+    Son kullanma tarihi olmayan (oturum) çerezleri, dosya session_ttl saniyeden
+    eskiyse yüklenmez.
+    Dönüş: yüklenen çerez sayısı
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Çerez dosyası okunamadı, yeni oturum açılacak: {e}")
+        return 0
+
+    from requests.cookies import create_cookie
+
+    now = time.time()
+    session_cookies_valid = now - data.get('saved_at', 0) < session_ttl
+    loaded = 0
+    for item in data.get('cookies', []):
+        expires = item.get('expires')
+        if expires is not None and expires <= now:
+            continue
+        if expires is None and not session_cookies_valid:
+            continue
+        session.cookies.set_cookie(create_cookie(
+            item['name'], item['value'], domain=item.get('domain', ''), path=item.get('path', '/'),
+            expires=expires, secure=item.get('secure', False), rest=item.get('rest') or {},
+        ))
+        loaded += 1
+    return loaded
+
+class SMTPClient:
+    """
+    Yeniden kullanılabilir SMTP bağlantısı
+    Her gönderimden önce NOOP ile bağlantı kontrol edilir, kopmuşsa yeniden bağlanılır.
+    """
+
+    def __init__(self, server, port, username, password, timeout=30):
+        self.server = server
+        self.port = port
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        import smtplib
+
+        connection = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+        try:
+            connection.starttls()
+            connection.login(self.username, self.password)
+        except Exception:
+            connection.close()
+            raise
+        self._connection = connection
+
+    def _is_alive(self):
+        if self._connection is None:
+            return False
+        try:
+            return self._connection.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _close(self):
+        if self._connection is None:
+            return
+        try:
+            self._connection.quit()
+        except Exception:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+        self._connection = None
+
+    def send_message(self, msg, timeout=None):
+        """Mesajı gönder; bağlantı kopmuşsa bir kez yeniden bağlanıp tekrar dene"""
+        import smtplib
+
+        with self._lock:
+            if timeout is not None:
+                self.timeout = timeout
+            if not self._is_alive():
+                self._close()
+                self._connect()
+            elif self._connection.sock is not None:
+                self._connection.sock.settimeout(self.timeout)
+
+            try:
+                self._connection.send_message(msg)
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                # Sunucu NOOP ile gönderim arasında bağlantıyı kapatmış olabilir (mesaj kabul edilmedi).
+                # Reddedilen alıcı, DATA hatası veya zaman aşımında tekrar gönderilmez:
+                # sunucu mesajı almış olabilir, ikinci gönderim çift mail ve iki kat süre demektir.
+                self._close()
+                self._connect()
+                self._connection.send_message(msg)
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+def get_smtp_client(server, port, username, password, timeout=30):
+    """Ayar başına paylaşılan SMTPClient döndür"""
+    key = (server, port, username, password)
+    with _lock:
+        client = _smtp_clients.get(key)
+        if client is None:
+            client = SMTPClient(server, port, username, password, timeout)
+            _smtp_clients[key] = client
+        return client
+
+def load_twilio_client_class():
+    """Twilio Client sınıfını bir kez import et ve önbelleğe al (yoksa None)"""
+    global _twilio_client_class, _twilio_import_failed
+
+    if _twilio_client_class is None and not _twilio_import_failed:
+        try:
+            from twilio.rest import Client
+            _twilio_client_class = Client
+        except ImportError:
+            _twilio_import_failed = True
+
+    return _twilio_client_class
+
+def get_twilio_client(account_sid, auth_token, timeout=30):
+    """Kimlik bilgisi başına paylaşılan Twilio Client döndür (twilio yoksa None)"""
+    Client = load_twilio_client_class()
+    if Client is None:
+        return None
+
+    key = (account_sid, auth_token)
+    with _lock:
+        client = _twilio_clients.get(key)
+        if client is None:
+            from twilio.http.http_client import TwilioHttpClient
+
+            # TwilioHttpClient kendi içinde keep-alive requests.Session kullanır
+            client = Client(account_sid, auth_token, http_client=TwilioHttpClient(timeout=timeout))
+            _twilio_clients[key] = client
+        return client
+
+def close_all():
+    """Tüm açık bağlantıları kapat ve önbellekleri temizle"""
+    with _lock:
+        smtp_clients = list(_smtp_clients.values())
+        sessions = list(_http_sessions.values())
+        _smtp_clients.clear()
+        _http_sessions.clear()
+        _twilio_clients.clear()
+
+    for client in smtp_clients:
+        client.close()
+    for session in sessions:
+        try:
+            session.close()
+        except Exception:
+            pass
+
+atexit.register(close_all)
@@ -0,0 +1,415 @@
+"""
+Yapılandırma
+.env dosyası ve ortam değişkenlerinden tek seferde doğrulanmış, değiştirilemez (frozen)
+bir Config nesnesi üretir. Hatalı değerler (örn. port, sayı, eksik kimlik bilgisi)
+tek bir ConfigError içinde, hepsi birden listelenir.
+
+- Ortam değişkenleri .env'deki değerlere göre önceliklidir (load_dotenv ile aynı)
+- Bildirim kanallarının ayarları notifiers.validate() ile kontrol edilir; sorunlar hata değil
+  uyarıdır (channel_warnings): o kanal gönderim yapmaz, bakiye kontrolü ve kayıt sürer
+- Daemon modunda ConfigWatcher .env'in değişme zamanını (mtime) izler; yeni ayarlar
+  geçerliyse değiştirilir, geçersizse eskiler kullanılmaya devam eder
+
+Kullanım: python3 config.py   # Ayarları doğrula ve özetle
+"""
+
+import os
+import sys
+import threading
+from types import MappingProxyType
+from dataclasses import dataclass, field, replace
+
+ENV_FILE = os.getenv('ENV_FILE') or os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+
+# Süreç başladığındaki gerçek ortam değişkenleri (.env'den gelenler hariç)
+_BASE_ENVIRON = dict(os.environ)
+# .env'den os.environ'a aktarılan anahtarlar (yeniden yüklemede kaldırılanlar silinir)
+_exported_keys = set()
+
+_lock = threading.RLock()
+_current = None
+
+class ConfigError(Exception):
+    """Yapılandırma geçersiz; errors tüm sorunları içerir"""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__("Geçersiz yapılandırma:\n" + '\n'.join(f"  - {error}" for error in self.errors))
+
+@dataclass(frozen=True)
+class Config:
+    """Doğrulanmış ayarlar (değiştirilemez; yeniden yükleme yeni nesne üretir)"""
+    card_number: str = ''
+    shell_base_url: str = 'https://sfs.turkiyeshell.com'
+    shell_cookie_file: str = 'shell_cookies.json'
+    shell_session_cookie_ttl: int = 1200
+    shell_max_response_kb: int = 2048
+    captcha_code: str = ''
+    notify_channel_timeout: float = 15.0
+    notify_total_timeout: float = 30.0
+    notify_digest_minutes: float = 0.0
+    retry_max_attempts: int = 5
+    retry_backoff_base: float = 2.0
+    retry_backoff_max: float = 30.0
+    daemon_interval: int = 1800
+    daemon_adaptive: bool = False
+    scheduler_min_interval: int = 600
+    scheduler_max_interval: int = 10800
+    scheduler_daily_budget: int = 48
+    scheduler_lookback_days: float = 56.0
+    scheduler_half_life_days: float = 14.0
+    scheduler_log_file: str = 'scheduler.jsonl'
+    outbox_max_attempts: int = 8
+    outbox_backoff_base: float = 60.0
+    outbox_backoff_max: float = 3600.0
+    outbox_retention_days: int = 30
+    run_log_max_bytes: int = 1024 * 1024
+    run_log_max_age_days: float = 7.0
+    run_log_backups: int = 12
+    debug_dir: str = 'debug'
+    debug_max_bytes: int = 5 * 1024 * 1024
+    trace_enabled: bool = False
+    trace_file: str = 'trace.jsonl'
+    trace_format: str = 'jsonl'
+    profile_file: str = 'profile.pstats'
+    profile_top: int = 20
+    profile_sites: int = 3
+    html_extractor: str = 'auto'
+    # Eksik/hatalı kanal ayarları (kanal 'incomplete' sayılır, kontrol yine de çalışır)
+    channel_warnings: tuple = ()
+    status_server_host: str = '127.0.0.1'
+    status_server_port: int = 0
+    status_health_max_age: int = 5400
+    low_memory: bool = False
+    rss_budget_mb: float = 0.0
+    # Tüm ham değerler (kanal ayarları ve eklentiler buradan okur)
+    env: MappingProxyType = field(default_factory=lambda: MappingProxyType({}), repr=False)
+    # Sadece .env dosyasından gelen değerler (os.environ'a aktarılır)
+    file_values: MappingProxyType = field(default_factory=lambda: MappingProxyType({}), repr=False)
+    source: str = ''
+    mtime: float = 0.0
+
+    def get(self, key, default=''):
+        return self.env.get(key, default)
+
+    def enabled(self, key):
+        return self.env.get(key, 'false').strip().lower() == 'true'
+
+def _file_mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return 0.0
+
+def read_env_file(path=None):
+    """.env dosyasındaki değerler (dosya veya python-dotenv yoksa boş)"""
+    path = path or ENV_FILE
+    if not os.path.exists(path):
+        return {}
+    try:
+        from dotenv import dotenv_values
+    except ImportError:
+        print("⚠️  python-dotenv paketi bulunamadı!")
+        print("   Kurulum için: pip install python-dotenv")
+        print("   .env dosyası yüklenemedi, environment variable'lar kullanılacak")
+        return {}
+    return {key: value for key, value in dotenv_values(path).items() if value is not None}
+
+def export_env(values):
+    """
+    .env değerlerini os.environ'a aktar (gerçek ortam değişkenlerinin üzerine yazılmaz)
+    Ayarları import anında os.getenv ile okuyan modüller ve eklentiler için.
+    """
+    for key in _exported_keys - set(values):
+        os.environ.pop(key, None)
+    _exported_keys.clear()
+    for key, value in values.items():
+        if key in _BASE_ENVIRON:
+            continue
+        os.environ[key] = value
+        _exported_keys.add(key)
+
+def preload(path=None):
+    """.env'i doğrulamadan os.environ'a yükle (modüller import edilmeden önce)"""
+    export_env(read_env_file(path))
+
+class _Parser:
+    """Ham değerleri tipine çevirir, hataları toplar"""
+
+    def __init__(self, env):
+        self.env = env
+        self.errors = []
+
+    def text(self, key, default=''):
+        return self.env.get(key, default).strip()
+
+    def number(self, key, default, kind=int, minimum=None):
+        raw = self.env.get(key, '').strip()
+        if not raw:
+            return default
+        try:
+            value = kind(raw)
+        except ValueError:
+            self.errors.append(f"{key}={raw!r} bir sayı olmalı")
+            return default
+        if minimum is not None and value < minimum:
+            self.errors.append(f"{key}={raw} en az {minimum} olmalı")
+            return default
+        return value
+
+    def flag(self, key, default=False):
+        raw = self.env.get(key, '').strip().lower()
+        if not raw:
+            return default
+        if raw in ('true', '1', 'yes', 'on'):
+            return True
+        if raw in ('false', '0', 'no', 'off'):
+            return False
+        self.errors.append(f"{key}={raw!r} true veya false olmalı")
+        return default
+
+    def choice(self, key, choices, default):
+        raw = self.env.get(key, '').strip().lower()
+        if not raw:
+            return default
+        if raw not in choices:
+            self.errors.append(f"{key}={raw!r} şunlardan biri olmalı: {', '.join(choices)}")
+            return default
+        return raw
+
+def _status_server_values(parser, daemon_interval):
+    """Durum sunucusu ayarları: (host, port, sağlık için en fazla yaş)"""
+    port = parser.number('STATUS_SERVER_PORT', 0, minimum=0)
+    if port > 65535:
+        parser.errors.append(f"STATUS_SERVER_PORT={port} 0-65535 arasında olmalı (0: kapalı)")
+    # Varsayılan: üç kontrol aralığı boyunca başarı yoksa sağlıksız
+    health_max_age = parser.number('STATUS_HEALTH_MAX_AGE', 3 * daemon_interval, minimum=1)
+    return parser.text('STATUS_SERVER_HOST', '127.0.0.1'), port, health_max_age
+
+def _merged_env(path=None):
+    """.env değerleri ve (öncelikli) ortam değişkenleri"""
+    env = dict(read_env_file(path or ENV_FILE))
+    env.update(_BASE_ENVIRON)
+    return env
+
+def load(path=None):
+    """
+    .env ve ortam değişkenlerinden Config üret ve doğrula
+    Geçersizse ConfigError fırlatır (tüm sorunlar birlikte listelenir).
+    """
+    path = path or ENV_FILE
+    mtime = _file_mtime(path)
+    file_values = read_env_file(path)
+    env = dict(file_values)
+    env.update(_BASE_ENVIRON)
+
+    parser = _Parser(env)
+    card_number = parser.text('CARD_NUMBER')
+    if card_number and not card_number.isdigit():
+        parser.errors.append(f"CARD_NUMBER={card_number!r} sadece rakamlardan oluşmalı")
+    shell_base_url = parser.text('SHELL_BASE_URL', 'https://sfs.turkiyeshell.com').rstrip('/')
+    if not shell_base_url.startswith(('http://', 'https://')):
+        parser.errors.append(f"SHELL_BASE_URL={shell_base_url!r} http:// veya https:// ile başlamalı")
+
+    daemon_interval = parser.number('DAEMON_INTERVAL', 1800, minimum=1)
+    scheduler_min_interval = parser.number('SCHEDULER_MIN_INTERVAL', 600, minimum=1)
+    scheduler_max_interval = parser.number('SCHEDULER_MAX_INTERVAL', 10800, minimum=1)
+    if scheduler_max_interval < scheduler_min_interval:
+        parser.errors.append(f"SCHEDULER_MAX_INTERVAL={scheduler_max_interval} "
+                             f"SCHEDULER_MIN_INTERVAL={scheduler_min_interval} değerinden küçük olamaz")
+    status_server_host, status_server_port, status_health_max_age = _status_server_values(parser, daemon_interval)
+
+    config = Config(
+        card_number=card_number,
+        shell_base_url=shell_base_url,
+        shell_cookie_file=parser.text('SHELL_COOKIE_FILE', 'shell_cookies.json'),
+        shell_session_cookie_ttl=parser.number('SHELL_SESSION_COOKIE_TTL', 1200, minimum=0),
+        shell_max_response_kb=parser.number('SHELL_MAX_RESPONSE_KB', 2048, minimum=1),
+        captcha_code=parser.text('CAPTCHA_CODE'),
+        notify_channel_timeout=parser.number('NOTIFY_CHANNEL_TIMEOUT', 15.0, float, minimum=0.1),
+        notify_total_timeout=parser.number('NOTIFY_TOTAL_TIMEOUT', 30.0, float, minimum=0.1),
+        notify_digest_minutes=parser.number('NOTIFY_DIGEST_MINUTES', 0.0, float, minimum=0),
+        retry_max_attempts=parser.number('RETRY_MAX_ATTEMPTS', 5, minimum=1),
+        retry_backoff_base=parser.number('RETRY_BACKOFF_BASE', 2.0, float, minimum=0),
+        retry_backoff_max=parser.number('RETRY_BACKOFF_MAX', 30.0, float, minimum=0),
+        daemon_interval=daemon_interval,
+        daemon_adaptive=parser.flag('DAEMON_ADAPTIVE'),
+        scheduler_min_interval=scheduler_min_interval,
+        scheduler_max_interval=scheduler_max_interval,
+        scheduler_daily_budget=parser.number('SCHEDULER_DAILY_BUDGET', 48, minimum=1),
+        scheduler_lookback_days=parser.number('SCHEDULER_LOOKBACK_DAYS', 56.0, float, minimum=1),
+        scheduler_half_life_days=parser.number('SCHEDULER_HALF_LIFE_DAYS', 14.0, float, minimum=0),
+        scheduler_log_file=parser.text('SCHEDULER_LOG_FILE', 'scheduler.jsonl'),
+        outbox_max_attempts=parser.number('OUTBOX_MAX_ATTEMPTS', 8, minimum=1),
+        outbox_backoff_base=parser.number('OUTBOX_BACKOFF_BASE', 60.0, float, minimum=0),
+        outbox_backoff_max=parser.number('OUTBOX_BACKOFF_MAX', 3600.0, float, minimum=0),
+        outbox_retention_days=parser.number('OUTBOX_RETENTION_DAYS', 30, minimum=0),
+        run_log_max_bytes=parser.number('RUN_LOG_MAX_BYTES', 1024 * 1024, minimum=1),
+        run_log_max_age_days=parser.number('RUN_LOG_MAX_AGE_DAYS', 7.0, float, minimum=0),
+        run_log_backups=parser.number('RUN_LOG_BACKUPS', 12, minimum=0),
+        debug_dir=parser.text('DEBUG_DIR', 'debug'),
+        debug_max_bytes=parser.number('DEBUG_MAX_BYTES', 5 * 1024 * 1024, minimum=0),
+        trace_enabled=parser.flag('TRACE_ENABLED'),
+        trace_file=parser.text('TRACE_FILE', 'trace.jsonl'),
+        trace_format=parser.choice('TRACE_FORMAT', ('jsonl', 'otlp'), 'jsonl'),
+        profile_file=parser.text('PROFILE_FILE', 'profile.pstats'),
+        profile_top=parser.number('PROFILE_TOP', 20, minimum=1),
+        profile_sites=parser.number('PROFILE_SITES', 3, minimum=0),
+        html_extractor=parser.choice('HTML_EXTRACTOR', ('auto', 'selectolax', 'lxml', 'stdlib'), 'auto'),
+        status_server_host=status_server_host,
+        status_server_port=status_server_port,
+        status_health_max_age=status_health_max_age,
+        low_memory=parser.flag('LOW_MEMORY'),
+        rss_budget_mb=parser.number('RSS_BUDGET_MB', 0.0, float, minimum=0),
+        env=MappingProxyType(env),
+        file_values=MappingProxyType(file_values),
+        source=path,
+        mtime=mtime,
+    )
+
+    if parser.errors:
+        raise ConfigError(parser.errors)
+
+    # Kanal ayarları (eksik kimlik bilgisi, geçersiz port vb.) sadece o kanalı devre dışı bırakır
+    import notifiers
+    return replace(config, channel_warnings=tuple(notifiers.validate(config)))
+
+def print_warnings(config):
+    """Bildirim kanalı ayar sorunlarını uyarı olarak yazdır"""
+    for warning in config.channel_warnings:
+        print(f"⚠️  {warning} (bu kanala bildirim gönderilmeyecek)")
+
+@dataclass(frozen=True)
+class BotSettings:
+    """Telegram bot döngüsünün ayarları (get_chat_id.py)"""
+    token: str = ''
+    card_number: str = ''
+    allowed_chat_ids: tuple = ()
+    offset_file: str = 'telegram_offset.json'
+    poll_timeout: int = 50
+
+def load_bot(path=None):
+    """
+    Sadece bot ayarlarını oku ve doğrula
+    Bildirim kanalları doğrulanmaz; örn. eksik SMTP ayarları veya henüz girilmemiş
+    TELEGRAM_CHAT_ID botu durdurmaz. Geçersizse ConfigError fırlatır.
+    """
+    parser = _Parser(_merged_env(path))
+
+    # Bot komutlarına yanıt verilecek sohbetler (varsayılan: bildirimlerin gittiği sohbet)
+    allowed_raw = parser.text('TELEGRAM_ALLOWED_CHAT_IDS')
+    if not allowed_raw:
+        chat_id = parser.text('TELEGRAM_CHAT_ID')
+        allowed_raw = chat_id if chat_id.lstrip('-').isdigit() else ''
+    allowed_chat_ids = []
+    for item in allowed_raw.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        if item.lstrip('-').isdigit():
+            allowed_chat_ids.append(int(item))
+        else:
+            parser.errors.append(f"TELEGRAM_ALLOWED_CHAT_IDS içinde {item!r} sayısal bir chat id olmalı")
+
+    settings = BotSettings(
+        token=parser.text('TELEGRAM_BOT_TOKEN'),
+        card_number=parser.text('CARD_NUMBER'),
+        allowed_chat_ids=tuple(allowed_chat_ids),
+        offset_file=parser.text('TELEGRAM_OFFSET_FILE', 'telegram_offset.json'),
+        poll_timeout=parser.number('TELEGRAM_POLL_TIMEOUT', 50, minimum=1),
+    )
+    if parser.errors:
+        raise ConfigError(parser.errors)
+    return settings
+
+@dataclass(frozen=True)
+class StatusServerSettings:
+    """Tek başına çalışan durum sunucusunun ayarları (status_server.py)"""
+    host: str = '127.0.0.1'
+    port: int = 0
+    health_max_age: int = 5400
+    balance_db: str = 'balance_history.db'
+    run_log_file: str = 'runs.jsonl'
+
+def load_status_server(path=None):
+    """
+    Sadece durum sunucusunun okuduğu ayarları doğrula
+    Bildirim kanalları ve kontrolün diğer ayarları sunucuyu durdurmaz. Geçersizse ConfigError.
+    """
+    parser = _Parser(_merged_env(path))
+    daemon_interval = parser.number('DAEMON_INTERVAL', 1800, minimum=1)
+    host, port, health_max_age = _status_server_values(parser, daemon_interval)
+    settings = StatusServerSettings(
+        host=host,
+        port=port,
+        health_max_age=health_max_age,
+        balance_db=parser.text('BALANCE_DB', 'balance_history.db'),
+        run_log_file=parser.text('RUN_LOG_FILE', 'runs.jsonl'),
+    )
+    if parser.errors:
+        raise ConfigError(parser.errors)
+    return settings
+
+def current():
+    """Geçerli ayarlar (ilk çağrıda yüklenir; geçersizse ConfigError)"""
+    global _current
+    with _lock:
+        if _current is None:
+            _current = load()
+            export_env(_current.file_values)
+        return _current
+
+def set_current(config):
+    """Ayarları değiştir; sonraki current() çağrıları yeni nesneyi görür"""
+    global _current
+    with _lock:
+        _current = config
+        export_env(config.file_values)
+
+class ConfigWatcher:
+    """
+    .env dosyasını değişme zamanı (mtime) ile izler
+    inotify gerektirmez; daemon'un bekleme döngüsünde birkaç saniyede bir çağrılır.
+    """
+
+    def __init__(self, config):
+        self.path = config.source
+        self.mtime = config.mtime
+
+    def poll(self):
+        """
+        Dosya değiştiyse yeniden yükle
+        Dönüş: yeni Config veya None (değişiklik yok ya da yeni ayarlar geçersiz)
+        """
+        mtime = _file_mtime(self.path)
+        if mtime == self.mtime:
+            return None
+        # Geçersiz dosya her yoklamada tekrar raporlanmasın
+        self.mtime = mtime
+        try:
+            return load(self.path)
+        except ConfigError as e:
+            print(f"⚠️  {self.path} yeniden yüklenemedi, önceki ayarlar kullanılıyor")
+            print(e)
+            return None
+
+def main():
+    try:
+        config = load()
+    except ConfigError as e:
+        print(f"❌ {e}")
+        return 1
+
+    import notifiers
+
+    print(f"✅ Yapılandırma geçerli ({config.source if config.mtime else 'sadece ortam değişkenleri'})")
+    print_warnings(config)
+    for name in ('card_number', 'shell_base_url', 'retry_max_attempts', 'daemon_interval', 'daemon_adaptive'):
+        print(f"   {name}: {getattr(config, name)}")
+    notifiers.reset()
+    for channel in notifiers.channel_names():
+        print(f"   {channel}: {notifiers.get(channel).state()}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
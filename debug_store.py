@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Debug HTML Deposu
+Beklenmeyen sayfa ve yanıtları sıkıştırılmış olarak DEBUG_DIR dizinine kaydeder.
+
+- İçerik hash'i ile tekrar eden sayfalar bir kez saklanır (site düzeni değişince
+  her kontrolde aynı sayfa yazılmaz; sadece sayaç ve son görülme zamanı güncellenir)
+- zstandard kuruluysa zstd, değilse gzip ile sıkıştırılır
+- Toplam boyut DEBUG_MAX_BYTES'ı aşınca en eski kayıtlar silinir
+- index.json en son görülen farklı hatayı bulmayı kolaylaştırır
+
+Kullanım:
+    python3 debug_store.py list              # Kayıtları listele (yeniden eskiye)
+    python3 debug_store.py show [HASH]       # Kaydı aç (varsayılan: en yenisi)
+    python3 debug_store.py show --kind page  # Belirli türün en yenisi
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import contextlib
+import importlib.util
+from datetime import datetime
+
+import config
+
+# Dizin ve boyut sınırı (DEBUG_DIR, DEBUG_MAX_BYTES) her kullanımda config'den okunur
+
+INDEX_FILE = 'index.json'
+
+def _codec():
+    """Kullanılacak sıkıştırma: ('zst', modül) veya ('gz', modül)"""
+    if importlib.util.find_spec('zstandard') is not None:
+        import zstandard
+        return 'zst', zstandard
+    import gzip
+    return 'gz', gzip
+
+def _compress(data):
+    extension, module = _codec()
+    if extension == 'zst':
+        return extension, module.ZstdCompressor(level=10).compress(data)
+    return extension, module.compress(data, compresslevel=6)
+
+def _decompress(path, data):
+    if path.endswith('.zst'):
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    import gzip
+    return gzip.decompress(data)
+
+@contextlib.contextmanager
+def _locked(directory):
+    """Aynı anda çalışan cron ve daemon index'i bozmasın"""
+    try:
+        import fcntl
+    except ImportError:  # Windows
+        yield
+        return
+
+    with open(os.path.join(directory, '.lock'), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def load_index(directory=None):
+    """Index kayıtlarını eskiden yeniye (son görülme zamanına göre) döndür"""
+    path = os.path.join(directory or config.current().debug_dir, INDEX_FILE)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return sorted(entries, key=lambda entry: entry['last_seen'])
+
+def _write_index(directory, entries):
+    path = os.path.join(directory, INDEX_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(entries, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+def _evict(directory, entries, max_bytes):
+    """Toplam boyut sınırı aşılırsa en eski kayıtları sil (en yenisi her zaman kalır)"""
+    total = sum(entry['size'] for entry in entries)
+    while total > max_bytes and len(entries) > 1:
+        oldest = entries.pop(0)
+        total -= oldest['size']
+        try:
+            os.remove(os.path.join(directory, oldest['file']))
+        except OSError:
+            pass
+    return entries
+
+def save(kind, content, meta=None, directory=None, max_bytes=None):
+    """
+    Debug içeriğini kaydet
+    kind: 'page' (sorgu sayfası) veya 'response' (sorgu yanıtı) gibi kısa bir tür
+    Dönüş: (dosya yolu, yeni mi) - aynı içerik daha önce kaydedildiyse yeni=False
+    """
+    settings = config.current()
+    directory = directory or settings.debug_dir
+    max_bytes = settings.debug_max_bytes if max_bytes is None else max_bytes
+    data = content.encode('utf-8') if isinstance(content, str) else content
+    digest = hashlib.sha256(data).hexdigest()
+    now = time.time()
+
+    os.makedirs(directory, exist_ok=True)
+    with _locked(directory):
+        entries = load_index(directory)
+        for entry in entries:
+            if entry['hash'] == digest and os.path.exists(os.path.join(directory, entry['file'])):
+                entry['last_seen'] = now
+                entry['count'] += 1
+                if meta:
+                    entry['meta'] = meta
+                entries.sort(key=lambda item: item['last_seen'])
+                _write_index(directory, entries)
+                return os.path.join(directory, entry['file']), False
+
+        extension, compressed = _compress(data)
+        filename = f"{kind}_{datetime.fromtimestamp(now).strftime('%Y%m%d-%H%M%S')}_{digest[:12]}.html.{extension}"
+        with open(os.path.join(directory, filename), 'wb') as f:
+            f.write(compressed)
+
+        entries = [entry for entry in entries if entry['hash'] != digest]
+        entries.append({
+            'hash': digest,
+            'kind': kind,
+            'file': filename,
+            'size': len(compressed),
+            'raw_size': len(data),
+            'first_seen': now,
+            'last_seen': now,
+            'count': 1,
+            'meta': meta or {},
+        })
+        _write_index(directory, _evict(directory, entries, max_bytes))
+
+    return os.path.join(directory, filename), True
+
+def latest(kind=None, directory=None):
+    """En son görülen kaydı döndür (yoksa None)"""
+    for entry in reversed(load_index(directory)):
+        if kind is None or entry['kind'] == kind:
+            return entry
+    return None
+
+def read(entry, directory=None):
+    """Kaydın açılmış içeriğini metin olarak döndür"""
+    path = os.path.join(directory or config.current().debug_dir, entry['file'])
+    with open(path, 'rb') as f:
+        return _decompress(path, f.read()).decode('utf-8', errors='replace')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Debug HTML deposu")
+    parser.add_argument('--dir', default=None, help="Depo dizini (varsayılan: .env'deki DEBUG_DIR)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help="Kayıtları listele")
+    show = subparsers.add_parser('show', help="Kaydın içeriğini yazdır")
+    show.add_argument('hash', nargs='?', help="Hash veya hash başlangıcı (varsayılan: en yeni kayıt)")
+    show.add_argument('--kind', help="Sadece bu türden en yeni kayıt (page, response)")
+    args = parser.parse_args(argv)
+
+    try:
+        settings = config.current()
+    except config.ConfigError as e:
+        print(f"❌ {e}")
+        return 2
+
+    entries = load_index(args.dir)
+    if not entries:
+        print("ℹ️  Debug deposu boş")
+        return 0
+
+    if args.command == 'list':
+        total = sum(entry['size'] for entry in entries)
+        for entry in reversed(entries):
+            last_seen = datetime.fromtimestamp(entry['last_seen']).strftime('%Y-%m-%d %H:%M:%S')
+            print(f"{last_seen}  {entry['hash'][:12]}  {entry['kind']:<9} {entry['count']:>5}x  "
+                  f"{entry['raw_size'] / 1024:>8.1f} KB -> {entry['size'] / 1024:>6.1f} KB  {entry['file']}")
+        print(f"📦 {len(entries)} kayıt, {total / 1024:.1f} KB / {settings.debug_max_bytes / 1024:.0f} KB")
+        return 0
+
+    if args.hash:
+        matches = [entry for entry in entries if entry['hash'].startswith(args.hash)]
+        entry = matches[-1] if matches else None
+    else:
+        entry = latest(args.kind, args.dir)
+    if entry is None:
+        print("❌ Kayıt bulunamadı")
+        return 1
+
+    sys.stdout.write(read(entry, args.dir))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Sahte Shell Bakiye Sorgulama Sunucusu
+sfs.turkiyeshell.com'un kullandığımız üç ucunu yerelde taklit eder; gerçek siteye
+istek atmadan uçtan uca test ve performans ölçümü yapılabilir.
+
+- GET  /bakiye-sorgula             DNTCaptcha token'ları ve CAPTCHA görseli içeren sayfa
+- GET  /DNTCaptchaImage/Show       CAPTCHA görseli (PNG)
+- POST /account/balanceinquiry     JSON (varsayılan) veya HTML bakiye yanıtı
+
+HTTP/1.1 keep-alive destekler; --connect-latency her yeni bağlantıya TCP/TLS el sıkışmasını
+taklit eden bir gecikme ekler (bağlantı yeniden kullanımının etkisini ölçmek için).
+
+Kullanım:
+    python3 fake_shell_server.py [--port 8089] [--response json|html] [--latency 50] [--connect-latency 100]
+    SHELL_BASE_URL=http://127.0.0.1:8089 CAPTCHA_CODE=ABC123 python3 shell_auto_checker.py
+"""
+
+import sys
+import json
+import time
+import zlib
+import random
+import struct
+import argparse
+import threading
+from urllib.parse import parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from bench_extract import build_sample_page
+
+CAPTCHA_TEXT = 'A7K3Q9'
+
+def _blank_png(width=150, height=50):
+    """PIL yoksa kullanılacak düz beyaz PNG"""
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body) & 0xffffffff)
+
+    raw = b''.join(b'\x00' + b'\xff' * width for _ in range(height))
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw))
+            + chunk(b'IEND', b''))
+
+def build_captcha_png(text=CAPTCHA_TEXT):
+    """CAPTCHA metnini içeren PNG üret (OCR yolu da ölçülebilsin diye)"""
+    try:
+        import io
+        from PIL import Image, ImageDraw
+    except ImportError:
+        return _blank_png()
+
+    img = Image.new('L', (150, 50), 255)
+    ImageDraw.Draw(img).text((20, 18), ' '.join(text), fill=0)
+    buffer = io.BytesIO()
+    img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def build_balance_html(balance):
+    """HTML yanıt modu için bakiye sayfası"""
+    return build_sample_page(filler_rows=50).replace(
+        'Bakiyeniz: 4.500,00 TL', f"Bakiyeniz: {balance:,.2f} TL"
+    )
+
+class FakeShellState:
+    """Sunucu ayarları ve sayaçları (thread'ler arasında paylaşılır)"""
+
+    def __init__(self, response='json', latency=0.0, reject_rate=0.0, balance=4500.0, spend=0.0,
+                 page_rows=400, connect_latency=0.0):
+        self.response = response
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.reject_rate = reject_rate
+        self.balance = balance
+        self.spend = spend
+        self.page = build_sample_page(filler_rows=page_rows)
+        self.captcha_png = build_captcha_png()
+        self.requests = {}
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def count(self, path):
+        with self.lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def next_balance(self):
+        with self.lock:
+            balance = self.balance
+            self.balance = max(0.0, self.balance - self.spend)
+            return balance
+
+class FakeShellHandler(BaseHTTPRequestHandler):
+    # Keep-alive için (tüm yanıtlar Content-Length gönderir)
+    protocol_version = 'HTTP/1.1'
+    state = None
+    quiet = True
+
+    def setup(self):
+        super().setup()
+        with self.state.lock:
+            self.state.connections += 1
+        if self.state.connect_latency:
+            time.sleep(self.state.connect_latency)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, content_type, extra_headers=None):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (extra_headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _delay(self):
+        if self.state.latency:
+            time.sleep(self.state.latency)
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0]
+        self.state.count(path)
+        self._delay()
+
+        if path == '/bakiye-sorgula':
+            session_id = random.getrandbits(64)
+            self._send(200, self.state.page, 'text/html; charset=utf-8',
+                       {'Set-Cookie': f'.AspNetCore.Session={session_id:x}; Path=/; HttpOnly'})
+        elif path.startswith('/DNTCaptchaImage/'):
+            self._send(200, self.state.captcha_png, 'image/png')
+        else:
+            self._send(404, 'Not Found', 'text/plain')
+
+    def do_POST(self):
+        path = self.path.split('?', 1)[0]
+        self.state.count(path)
+        length = int(self.headers.get('Content-Length') or 0)
+        form = parse_qs(self.rfile.read(length).decode('utf-8'))
+        self._delay()
+
+        if path != '/account/balanceinquiry':
+            self._send(404, 'Not Found', 'text/plain')
+            return
+
+        if not form.get('DNTCaptchaToken') or not form.get('DNTCaptchaInputText'):
+            self._send(400, 'Bad Request', 'text/plain')
+            return
+
+        if random.random() < self.state.reject_rate:
+            result = {'result': False, 'message': 'Güvenlik kodu hatalı'}
+        else:
+            result = {
+                'result': True,
+                'message': 'İşlem başarılı',
+                'cardTypeName': 'Shell Filo Kart',
+                'balanceAmount': self.state.next_balance(),
+                'cardStatusName': 'Aktif',
+            }
+
+        if self.state.response == 'html':
+            self._send(200, build_balance_html(result.get('balanceAmount', 0.0)), 'text/html; charset=utf-8')
+        else:
+            self._send(200, json.dumps(result, ensure_ascii=False), 'application/json; charset=utf-8')
+
+def start_server(port=0, host='127.0.0.1', quiet=True, **options):
+    """
+    Sunucuyu arka plan thread'inde başlat
+    Dönüş: (server, base_url) - durdurmak için server.shutdown()
+    """
+    handler = type('Handler', (FakeShellHandler,), {'state': FakeShellState(**options), 'quiet': quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, name='fake-shell', daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Sahte Shell bakiye sorgulama sunucusu")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--response', choices=['json', 'html'], default='json', help="Sorgu yanıt formatı")
+    parser.add_argument('--latency', type=float, default=0.0, help="Her isteğe eklenecek gecikme (ms)")
+    parser.add_argument('--connect-latency', type=float, default=0.0,
+                        help="Her yeni bağlantıya eklenecek gecikme, TCP/TLS el sıkışması yerine (ms)")
+    parser.add_argument('--reject-rate', type=float, default=0.0, help="Reddedilecek sorgu oranı (0-1)")
+    parser.add_argument('--balance', type=float, default=4500.0, help="Başlangıç bakiyesi")
+    parser.add_argument('--spend', type=float, default=0.0, help="Her sorguda bakiyeden düşülecek tutar")
+    parser.add_argument('--page-rows', type=int, default=400, help="Sorgu sayfasına eklenecek dolgu satırı (sayfa boyutu)")
+    parser.add_argument('--verbose', action='store_true', help="İstekleri logla")
+    args = parser.parse_args()
+
+    server, base_url = start_server(
+        args.port, args.host, quiet=not args.verbose, response=args.response,
+        latency=args.latency / 1000, connect_latency=args.connect_latency / 1000, reject_rate=args.reject_rate, balance=args.balance, spend=args.spend,
+        page_rows=args.page_rows,
+    )
+    print(f"🧪 Sahte Shell sunucusu çalışıyor: {base_url}")
+    print(f"   SHELL_BASE_URL={base_url} CAPTCHA_CODE={CAPTCHA_TEXT} python3 shell_auto_checker.py")
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
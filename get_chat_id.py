@@ -1,89 +1,392 @@
 #!/usr/bin/env python3
 """
-Telegram Chat ID Alıcı
-Botunuza mesaj gönderdikten sonra Chat ID'nizi almak için bu script'i çalıştırın
+Telegram Bot (Komutlar + Chat ID Alıcı)
+Long polling ile botunuza gelen mesajları dinler ve komutlara yerel depodan anında yanıt verir.
+Shell sitesine istek atılmaz; yanıtlar son kontrolün kaydettiği bakiyelerden ve
+çalıştırma günlüğünden (runs.jsonl) üretilir, bu yüzden milisaniyeler içinde döner.
+
+- /balance [kart]          Son bakiye(ler) ve ne zaman kontrol edildiği
+- /history [kart] [gün]    Son bakiye değişiklikleri (varsayılan: 7 gün)
+- /status                  Son kontrolün sonucu, bekleyen bildirimler
+Türkçe karşılıkları: /bakiye, /gecmis, /durum
+
+Sadece TELEGRAM_ALLOWED_CHAT_IDS (varsayılan: TELEGRAM_CHAT_ID) sohbetlerine yanıt verilir.
+İzinsiz sohbetlerin Chat ID'leri konsolda gösterilir; ilk kurulumda Chat ID'nizi
+öğrenmek için botunuza mesaj gönderip bu script'i çalıştırmanız yeterli.
+Okunan son mesajın numarası (offset) TELEGRAM_OFFSET_FILE dosyasında saklanır;
+yeniden başlatmada aynı komut ikinci kez yanıtlanmaz.
+
+Kullanım: python3 get_chat_id.py          # Bot döngüsü (Ctrl+C ile durdurun)
+          python3 get_chat_id.py --once   # Bekleyen mesajlardaki Chat ID'leri göster ve çık
 """
 
-import requests
-import json
 import os
-from dotenv import load_dotenv
+import sys
+import json
+import html
+import time
+import signal
+import argparse
+from datetime import datetime
+
+import config
+
+# .env, ayarlarını import anında okuyan modüllerden (BALANCE_DB, RUN_LOG_FILE ...) önce yüklenir
+config.preload()
+
+import balance_history
+import clients
+import notification_digest
+import notification_outbox
+import run_log
+
+API_HOST = 'api.telegram.org'
+
+# /history varsayılan gün sayısı ve gösterilecek en fazla değişiklik
+HISTORY_DAYS = 7
+HISTORY_LIMIT = 10
+
+# Bağlantı hatalarında bekleme (saniye, her hatada iki katına çıkar)
+RETRY_BASE = 2
+RETRY_MAX = 60
+
+class TelegramError(Exception):
+    """Bot API'si ok=false döndürdü"""
+
+    def __init__(self, status_code, description):
+        self.status_code = status_code
+        super().__init__(f"HTTP {status_code}: {description}")
+
+def api_call(token, method, params=None, timeout=10):
+    """Bot API metodunu paylaşılan keep-alive oturumu ile çağır; dönüş: result alanı"""
+    session = clients.get_http_session(API_HOST)
+    response = session.post(f"https://{API_HOST}/bot{token}/{method}", json=params or {}, timeout=timeout)
+    try:
+        data = response.json()
+    except ValueError:
+        data = {'ok': False, 'description': response.text[:200]}
+    if not data.get('ok'):
+        raise TelegramError(response.status_code, data.get('description', 'bilinmeyen hata'))
+    return data['result']
+
+def load_offset(path):
+    """Sıradaki getUpdates offset'i (dosya yoksa None: bekleyen tüm mesajlar)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('offset')
+    except (OSError, ValueError):
+        return None
+
+def save_offset(path, offset):
+    """Offset'i dosyaya atomik olarak yaz (yarım yazılmış dosya kalmasın)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'offset': offset, 'updated_at': datetime.now().isoformat(timespec='seconds')}, f)
+    os.replace(tmp_path, path)
+
+def _ago(ts, now):
+    """Geçen süre: '45 sn', '12 dk', '3 sa', '2 gün'"""
+    seconds = max(0, now - ts)
+    if seconds < 60:
+        return f"{seconds:.0f} sn"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} dk"
+    if seconds < 86400:
+        return f"{seconds / 3600:.0f} sa"
+    return f"{seconds / 86400:.0f} gün"
+
+def _stamp(ts):
+    return datetime.fromtimestamp(ts).strftime('%d.%m %H:%M')
+
+def _parse_args(args):
+    """Komut argümanları: uzun sayı kart numarası, kısa sayı gün sayısı"""
+    card_number, days = None, None
+    for arg in args:
+        if arg.isdigit() and len(arg) >= 8:
+            card_number = arg
+        elif arg.isdigit():
+            days = int(arg)
+    return card_number, days
+
+def _default_card(card_number):
+    """Kart verilmediyse CARD_NUMBER, o da yoksa depodaki tek kart"""
+    # Ham değer (config.preload() ile yüklenir); tam doğrulama gerekmez
+    card_number = card_number or os.getenv('CARD_NUMBER', '').strip()
+    if card_number:
+        return card_number
+    readings = balance_history.latest_readings()
+    return readings[0]['card_number'] if len(readings) == 1 else None
+
+def balance_reply(args):
+    card_number, _ = _parse_args(args)
+    now = time.time()
+    if card_number:
+        reading = balance_history.last_reading(card_number)
+        readings = [reading] if reading else []
+    else:
+        readings = balance_history.latest_readings()
+    if not readings:
+        return "ℹ️ Henüz kayıtlı bakiye yok (ilk kontrol bekleniyor)"
+
+    lines = []
+    for reading in readings:
+        lines.append(
+            f"💳 <code>{reading['card_number']}</code>\n"
+            f"💰 <b>{reading['balance']:,.2f} TL</b> ({html.escape(reading['status'] or '-')})\n"
+            f"⏰ Son kontrol: {_stamp(reading['last_seen_ts'])} ({_ago(reading['last_seen_ts'], now)} önce)"
+        )
+    return '\n\n'.join(lines)
+
+def history_reply(args):
+    card_number, days = _parse_args(args)
+    card_number = _default_card(card_number)
+    if not card_number:
+        return "ℹ️ Birden fazla kart var, kart numarasını yazın: /history KART [gün]"
+    days = days or HISTORY_DAYS
+
+    readings = balance_history.readings_between(card_number, time.time() - days * 86400)
+    if not readings:
+        return f"ℹ️ <code>{card_number}</code> için son {days} günde kayıt yok"
+
+    lines = [f"📊 <code>{card_number}</code> son {days} gün"]
+    previous = None
+    rows = []
+    for reading in readings:
+        delta = f" ({reading['balance'] - previous:+,.2f})" if previous is not None else ''
+        rows.append(f"▫️ {_stamp(reading['timestamp'])}  {reading['balance']:,.2f} TL{delta}")
+        previous = reading['balance']
+    if len(rows) > HISTORY_LIMIT:
+        lines.append(f"… {len(rows) - HISTORY_LIMIT} eski değişiklik gösterilmedi")
+    lines.extend(rows[-HISTORY_LIMIT:])
+    return '\n'.join(lines)
+
+def status_reply(args):
+    now = time.time()
+    last = last_ok = None
+    counts = {}
+    # Günlük satır satır okunur; son 24 saatin kayıtları yeterli
+    for record in run_log.iter_records(since=now - 86400):
+        last = record
+        outcome = record.get('outcome', 'error')
+        counts[outcome] = counts.get(outcome, 0) + 1
+        if outcome == 'ok':
+            last_ok = record
 
-# .env dosyasından token'ı oku
-load_dotenv()
-BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+    lines = ["🩺 <b>Durum</b>"]
+    if last is None:
+        lines.append("ℹ️ Son 24 saatte kontrol kaydı yok")
+    else:
+        icon = '✅' if last.get('outcome') == 'ok' else '❌'
+        lines.append(f"{icon} Son kontrol: {_stamp(last['started_at'])} ({_ago(last['started_at'], now)} önce), "
+                     f"{html.escape(str(last.get('outcome')))}, {last.get('duration', 0):.1f} sn")
+        if last_ok is not None and last_ok is not last:
+            lines.append(f"✅ Son başarılı: {_stamp(last_ok['started_at'])} ({_ago(last_ok['started_at'], now)} önce)")
+        summary = ', '.join(f"{outcome}: {count}" for outcome, count in sorted(counts.items()))
+        lines.append(f"📈 Son 24 saat: {summary}")
+    lines.append(f"📨 Bekleyen bildirim: {notification_outbox.pending_count()}")
+    digest_pending = notification_digest.pending_count()
+    if digest_pending:
+        lines.append(f"🗂️ Özette bekleyen değişiklik: {digest_pending}")
+    return '\n'.join(lines)
+
+def help_reply(args):
+    return ("🚗 <b>Shell Kart Bakiye</b>\n"
+            "/balance [kart] - Son bakiye\n"
+            "/history [kart] [gün] - Bakiye değişiklikleri\n"
+            "/status - Son kontrolün durumu\n\n"
+            "Yanıtlar son kontrolün kayıtlarından gelir; yeni sorgu yapılmaz.")
+
+COMMANDS = {
+    '/balance': balance_reply,
+    '/bakiye': balance_reply,
+    '/history': history_reply,
+    '/gecmis': history_reply,
+    '/status': status_reply,
+    '/durum': status_reply,
+    '/start': help_reply,
+    '/help': help_reply,
+}
+
+def reply_for(text):
+    """Mesaj metnine verilecek yanıt (komut değilse None)"""
+    parts = text.split()
+    if not parts or not parts[0].startswith('/'):
+        return None
+    # Gruplarda komutlar /balance@BotAdi şeklinde gelir
+    command = parts[0].split('@', 1)[0].lower()
+    handler = COMMANDS.get(command)
+    if handler is None:
+        return f"❓ Bilinmeyen komut: {html.escape(command)}\n\n" + help_reply([])
+    return handler(parts[1:])
+
+def handle_update(token, update, allowed, reported):
+    """Tek bir mesajı işle; sadece izinli sohbetler yanıtlanır"""
+    message = update.get('message')
+    if not message or 'text' not in message:
+        return
+    chat = message['chat']
+    chat_id = chat['id']
+
+    if chat_id not in allowed:
+        if chat_id not in reported:
+            reported.add(chat_id)
+            name = chat.get('first_name') or chat.get('title') or ''
+            username = f" (@{chat['username']})" if chat.get('username') else ''
+            print(f"🔒 İzinsiz sohbet yanıtlanmadı: {name}{username}, Chat ID: {chat_id}")
+            print(f"   İzin vermek için .env: TELEGRAM_ALLOWED_CHAT_IDS={chat_id}")
+        return
+
+    started = time.perf_counter()
+    try:
+        reply = reply_for(message['text'])
+    except Exception as e:
+        # Depo okunamazsa bot durmasın, kullanıcı hatayı görsün
+        reply = f"⚠️ Yanıt üretilemedi: {html.escape(str(e))}"
+    if reply is None:
+        return
+    api_call(token, 'sendMessage', {'chat_id': chat_id, 'text': reply, 'parse_mode': 'HTML'})
+    command = message['text'].split()[0]
+    print(f"↩️  {command} → {chat_id} ({(time.perf_counter() - started) * 1000:.0f} ms)")
+
+def run_bot(settings):
+    """
+    getUpdates long polling döngüsü (KeyboardInterrupt/SIGTERM ile durur)
+    settings: config.load_bot() sonucu
+    """
+    import requests
+
+    token = settings.token
+    allowed = set(settings.allowed_chat_ids)
+    offset_file = settings.offset_file
+    offset = load_offset(offset_file)
+    reported = set()
+    failures = 0
 
-if not BOT_TOKEN:
     print("=" * 60)
-    print("❌ HATA: TELEGRAM_BOT_TOKEN bulunamadı!")
+    print("🤖 Telegram Bot (long polling)")
     print("=" * 60)
-    print("\n📝 .env dosyasına şunu ekleyin:")
-    print("TELEGRAM_BOT_TOKEN=your_bot_token_here")
-    print("\nBot token'ınızı @BotFather'dan alabilirsiniz.")
-    exit(1)
-
-print("=" * 60)
-print("🤖 Telegram Chat ID Alıcı")
-print("=" * 60)
-print(f"Token: {BOT_TOKEN[:20]}...")
-print("\n📱 ÖNCE botunuza bir mesaj gönderin!")
-print("   Telegram'da botunuza 'Merhaba' yazın")
-print("\n⏳ Son mesajları kontrol ediliyor...\n")
-
-try:
-    url = f"https://api.telegram.org/bot{BOT_TOKEN}/getUpdates"
-    response = requests.get(url, timeout=10)
-    
-    if response.status_code == 200:
-        data = response.json()
-        
-        if data.get('ok'):
-            updates = data.get('result', [])
-            
-            if updates:
-                # Tüm mesajları göster
-                print("✅ Mesajlar bulundu:\n")
-                chat_ids = set()
-                
-                for update in updates:
-                    if 'message' in update:
-                        msg = update['message']
-                        chat = msg['chat']
-                        chat_id = chat['id']
-                        chat_ids.add(chat_id)
-                        
-                        first_name = chat.get('first_name', '')
-                        username = chat.get('username', '')
-                        text = msg.get('text', '')
-                        
-                        print(f"👤 Kullanıcı: {first_name} (@{username})")
-                        print(f"💬 Mesaj: {text}")
-                        print(f"🆔 Chat ID: {chat_id}")
-                        print("-" * 60)
-                
-                if chat_ids:
-                    chat_id = list(chat_ids)[-1]  # Son chat ID
-                    print(f"\n✅ Chat ID'niz: {chat_id}")
-                    print("\n📝 .env dosyasına ekleyin:")
-                    print(f"TELEGRAM_CHAT_ID={chat_id}")
-                    print("\nVeya şu komutu çalıştırın:")
-                    print(f"echo 'TELEGRAM_CHAT_ID={chat_id}' >> .env")
-            else:
-                print("⚠️  Henüz mesaj bulunamadı.")
-                print("\n📱 Yapmanız gerekenler:")
-                print("1. Telegram'ı açın")
-                print("2. botunuza'u bulun")
-                print("3. Bot'a 'Merhaba' yazın")
-                print("4. Bu script'i tekrar çalıştırın")
-        else:
-            print(f"❌ API hatası: {data}")
+    print(f"Komutlar: {', '.join(command for command in COMMANDS if command not in ('/start', '/help'))}")
+    if allowed:
+        print(f"İzinli sohbetler: {', '.join(str(chat_id) for chat_id in sorted(allowed))}")
     else:
-        print(f"❌ HTTP hatası: {response.status_code}")
-        print(response.text)
-        
-except requests.exceptions.RequestException as e:
-    print(f"❌ Bağlantı hatası: {e}")
-    print("\nİnternet bağlantınızı kontrol edin.")
-except Exception as e:
-    print(f"❌ Hata: {e}")
+        print("⚠️  İzinli sohbet yok: hiçbir mesaj yanıtlanmaz, gönderenlerin Chat ID'leri gösterilir")
+    print("Durdurmak için Ctrl+C\n")
+
+    while True:
+        try:
+            params = {'timeout': settings.poll_timeout, 'allowed_updates': ['message']}
+            if offset is not None:
+                params['offset'] = offset
+            updates = api_call(token, 'getUpdates', params, timeout=settings.poll_timeout + 10)
+            failures = 0
+
+            for update in updates:
+                # Yanıtı gönderilemeyen komut tekrar işlenmez (en fazla bir kez yanıt)
+                offset = update['update_id'] + 1
+                try:
+                    handle_update(token, update, allowed, reported)
+                except (TelegramError, requests.exceptions.RequestException) as e:
+                    print(f"⚠️  Yanıt gönderilemedi: {e}")
+            if updates:
+                save_offset(offset_file, offset)
+        except TelegramError as e:
+            if e.status_code == 401:
+                print(f"❌ Bot token'ı geçersiz ({e})")
+                return 1
+            # 409: aynı token ile başka bir getUpdates döngüsü veya webhook çalışıyor
+            failures += 1
+            print(f"⚠️  Telegram API hatası: {e}")
+        except requests.exceptions.RequestException as e:
+            failures += 1
+            print(f"⚠️  Bağlantı hatası: {e}")
+
+        if failures:
+            time.sleep(min(RETRY_MAX, RETRY_BASE ** failures))
+
+def show_chat_ids(token):
+    """Bekleyen mesajlardaki Chat ID'leri göster (offset ilerletilmez)"""
+    print("=" * 60)
+    print("🤖 Telegram Chat ID Alıcı")
+    print("=" * 60)
+    print("\n📱 ÖNCE botunuza bir mesaj gönderin!")
+    print("   Telegram'da botunuza 'Merhaba' yazın")
+    print("\n⏳ Son mesajlar kontrol ediliyor...\n")
+
+    updates = api_call(token, 'getUpdates', timeout=10)
+    chat_ids = []
+    for update in updates:
+        if 'message' not in update:
+            continue
+        chat = update['message']['chat']
+        if chat['id'] not in chat_ids:
+            chat_ids.append(chat['id'])
+        print(f"👤 Kullanıcı: {chat.get('first_name', '')} (@{chat.get('username', '')})")
+        print(f"💬 Mesaj: {update['message'].get('text', '')}")
+        print(f"🆔 Chat ID: {chat['id']}")
+        print("-" * 60)
+
+    if not chat_ids:
+        print("⚠️  Henüz mesaj bulunamadı.")
+        print("\n📱 Yapmanız gerekenler:")
+        print("1. Telegram'ı açın ve botunuzu bulun")
+        print("2. Bot'a 'Merhaba' yazın")
+        print("3. Bu script'i tekrar çalıştırın")
+        return
+
+    chat_id = chat_ids[-1]  # Son chat ID
+    print(f"\n✅ Chat ID'niz: {chat_id}")
+    print("\n📝 .env dosyasına ekleyin:")
+    print(f"TELEGRAM_CHAT_ID={chat_id}")
+    print("\nVeya şu komutu çalıştırın:")
+    print(f"echo 'TELEGRAM_CHAT_ID={chat_id}' >> .env")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Telegram bot: bakiye komutları ve Chat ID alıcı")
+    parser.add_argument('--once', action='store_true',
+                        help="Bekleyen mesajlardaki Chat ID'leri göster ve çık (bot döngüsü başlamaz)")
+    args = parser.parse_args(argv)
+
+    # Sadece token gerekir; kanal ayarları (örn. henüz girilmemiş TELEGRAM_CHAT_ID) doğrulanmaz
+    token = os.getenv('TELEGRAM_BOT_TOKEN', '').strip()
+    if not token or token == 'your_bot_token_here':
+        print("=" * 60)
+        print("❌ HATA: TELEGRAM_BOT_TOKEN bulunamadı!")
+        print("=" * 60)
+        print("\n📝 .env dosyasına şunu ekleyin:")
+        print("TELEGRAM_BOT_TOKEN=your_bot_token_here")
+        print("\nBot token'ınızı @BotFather'dan alabilirsiniz.")
+        return 1
+
+    import requests
+
+    if args.once:
+        try:
+            show_chat_ids(token)
+        except (TelegramError, requests.exceptions.RequestException) as e:
+            print(f"❌ Bağlantı hatası: {e}")
+            print("\nİnternet bağlantınızı kontrol edin.")
+            return 1
+        return 0
+
+    try:
+        settings = config.load_bot()
+    except config.ConfigError as e:
+        print(f"❌ {e}")
+        return 2
+
+    # systemd/journald altında çıktının anında görünmesi için
+    try:
+        sys.stdout.reconfigure(line_buffering=True)
+    except AttributeError:
+        pass
+    # SIGTERM (systemctl stop) Ctrl+C gibi işlenir
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    try:
+        return run_bot(settings)
+    except KeyboardInterrupt:
+        print("\n🛑 Bot durduruldu")
+        return 0
 
+if __name__ == "__main__":
+    sys.exit(main())
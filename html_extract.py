@@ -0,0 +1,238 @@
+"""
+HTML Çıkarım Motoru
+Bakiye sorgulama sayfasından DNTCaptcha alanlarını ve CAPTCHA görsel adresini,
+sorgu yanıtından da bakiye metnini tek geçişte çıkarır.
+
+Backend seçimi (HTML_EXTRACTOR ayarı, varsayılan: auto):
+- selectolax: kuruluysa (en hızlı, C tabanlı)
+- lxml: kuruluysa
+- stdlib: Python'un html.parser.HTMLParser'ı ile akış (streaming) tabanlı yedek
+
+Performans karşılaştırması için: python3 bench_extract.py [debug_*.html]
+"""
+
+import re
+import importlib.util
+from html.parser import HTMLParser
+
+import config
+
+# Bakiye pattern'leri (öncelik sırasıyla). Tek bir regex'te birleştirilir;
+# metin bir kez taranır ve en yüksek öncelikli ilk eşleşme seçilir.
+BALANCE_PATTERNS = [
+    r'Bakiyeniz[:\s]+([0-9.,]+\s*TL)',
+    r'bakiye[:\s]+([0-9.,]+)',
+    r'Balance[:\s]+([0-9.,]+)',
+    r'([0-9]+)\s*TL',
+]
+_BALANCE_RE = re.compile(
+    '|'.join(f'(?P<p{idx}>{pattern})' for idx, pattern in enumerate(BALANCE_PATTERNS)),
+    re.I
+)
+
+def _is_captcha_image(src, alt):
+    return 'captcha' in src.lower() or 'captcha' in alt.lower()
+
+def find_balance_text(text):
+    """Metinde bakiye ifadesini ara; bulunamazsa None döndür"""
+    best_priority = None
+    best_match = None
+
+    for match in _BALANCE_RE.finditer(text):
+        priority = int(match.lastgroup[1:])
+        if best_priority is None or priority < best_priority:
+            best_priority = priority
+            best_match = match.group(0)
+            if priority == 0:
+                break
+
+    return best_match
+
+# ----------------------------------------------------------------------------
+# stdlib backend (tek geçiş, akış tabanlı)
+# ----------------------------------------------------------------------------
+
+class _PageFieldParser(HTMLParser):
+    """input ve img etiketlerini tek geçişte toplar"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.fields = {'captcha_token': None, 'captcha_text': None, 'captcha_img_url': None, 'img_srcs': []}
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'input':
+            attrs = dict(attrs)
+            name = attrs.get('name') or ''
+            if name == 'DNTCaptchaToken':
+                self.fields['captcha_token'] = attrs.get('value')
+            elif name == 'DNTCaptchaText':
+                self.fields['captcha_text'] = attrs.get('value')
+        elif tag == 'img':
+            attrs = dict(attrs)
+            src = attrs.get('src') or ''
+            self.fields['img_srcs'].append(src)
+            if self.fields['captcha_img_url'] is None and _is_captcha_image(src, attrs.get('alt') or ''):
+                self.fields['captcha_img_url'] = src
+
+    handle_startendtag = handle_starttag
+
+# Metni sayfa metnine katılmayan etiketler (satır içi JS/CSS'teki "123 TL" bakiye sanılmasın)
+_NON_TEXT_TAGS = ('script', 'style')
+
+class _TextParser(HTMLParser):
+    """Sayfanın düz metnini toplar (BeautifulSoup.get_text() karşılığı; script/style hariç)"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _NON_TEXT_TAGS:
+            self.skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in _NON_TEXT_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+def _stdlib_page_fields(html):
+    parser = _PageFieldParser()
+    parser.feed(html)
+    parser.close()
+    return parser.fields
+
+def _stdlib_text(html):
+    parser = _TextParser()
+    parser.feed(html)
+    parser.close()
+    return ''.join(parser.parts)
+
+# ----------------------------------------------------------------------------
+# selectolax backend
+# ----------------------------------------------------------------------------
+
+def _selectolax_parser_class():
+    # selectolax 1.0+ sadece lexbor backend'ini destekler; eski sürümlerde modest kullanılır
+    try:
+        from selectolax.lexbor import LexborHTMLParser
+        return LexborHTMLParser
+    except ImportError:
+        from selectolax.parser import HTMLParser as ModestHTMLParser
+        return ModestHTMLParser
+
+def _selectolax_page_fields(html):
+    SelectolaxParser = _selectolax_parser_class()
+
+    fields = {'captcha_token': None, 'captcha_text': None, 'captcha_img_url': None, 'img_srcs': []}
+    for node in SelectolaxParser(html).css('input, img'):
+        attrs = node.attributes
+        if node.tag == 'input':
+            name = attrs.get('name') or ''
+            if name == 'DNTCaptchaToken':
+                fields['captcha_token'] = attrs.get('value')
+            elif name == 'DNTCaptchaText':
+                fields['captcha_text'] = attrs.get('value')
+        else:
+            src = attrs.get('src') or ''
+            fields['img_srcs'].append(src)
+            if fields['captcha_img_url'] is None and _is_captcha_image(src, attrs.get('alt') or ''):
+                fields['captcha_img_url'] = src
+    return fields
+
+def _selectolax_text(html):
+    SelectolaxParser = _selectolax_parser_class()
+
+    tree = SelectolaxParser(html)
+    tree.strip_tags(list(_NON_TEXT_TAGS))
+    root = tree.root
+    return root.text(separator='') if root is not None else ''
+
+# ----------------------------------------------------------------------------
+# lxml backend
+# ----------------------------------------------------------------------------
+
+def _lxml_page_fields(html):
+    import lxml.html
+
+    fields = {'captcha_token': None, 'captcha_text': None, 'captcha_img_url': None, 'img_srcs': []}
+    for element in lxml.html.fromstring(html).iter('input', 'img'):
+        if element.tag == 'input':
+            name = element.get('name') or ''
+            if name == 'DNTCaptchaToken':
+                fields['captcha_token'] = element.get('value')
+            elif name == 'DNTCaptchaText':
+                fields['captcha_text'] = element.get('value')
+        else:
+            src = element.get('src') or ''
+            fields['img_srcs'].append(src)
+            if fields['captcha_img_url'] is None and _is_captcha_image(src, element.get('alt') or ''):
+                fields['captcha_img_url'] = src
+    return fields
+
+def _lxml_text(html):
+    import lxml.html
+
+    root = lxml.html.fromstring(html)
+    for element in list(root.iter(*_NON_TEXT_TAGS)):
+        element.drop_tree()  # Etiketten sonraki metin (tail) korunur
+    return root.text_content()
+
+# ----------------------------------------------------------------------------
+# Backend seçimi
+# ----------------------------------------------------------------------------
+
+BACKENDS = {
+    'selectolax': (_selectolax_page_fields, _selectolax_text),
+    'lxml': (_lxml_page_fields, _lxml_text),
+    'stdlib': (_stdlib_page_fields, _stdlib_text),
+}
+
+def available_backends():
+    """Bu sistemde kullanılabilen backend'leri tercih sırasıyla döndür"""
+    backends = []
+    if importlib.util.find_spec('selectolax') is not None:
+        backends.append('selectolax')
+    if importlib.util.find_spec('lxml') is not None:
+        backends.append('lxml')
+    backends.append('stdlib')
+    return backends
+
+# (HTML_EXTRACTOR değeri, seçilen backend); ayar yeniden yüklenip değişirse tekrar seçilir
+_selected_backend = (None, None)
+
+def get_backend():
+    """Kullanılacak backend adını döndür (HTML_EXTRACTOR ile zorlanabilir)"""
+    global _selected_backend
+
+    requested = config.current().html_extractor
+    if _selected_backend[0] != requested:
+        available = available_backends()
+        if requested in available:
+            backend = requested
+        else:
+            if requested != 'auto':
+                print(f"⚠️  HTML_EXTRACTOR={requested} kullanılamıyor, {available[0]} kullanılacak")
+            backend = available[0]
+        _selected_backend = (requested, backend)
+    return _selected_backend[1]
+
+def extract_page_fields(html, backend=None):
+    """
+    Sorgu sayfasından CAPTCHA alanlarını tek geçişte çıkar
+    Dönüş: {'captcha_token', 'captcha_text', 'captcha_img_url', 'img_srcs'}
+    """
+    page_fields, _ = BACKENDS[backend or get_backend()]
+    return page_fields(html)
+
+def extract_balance(html, backend=None):
+    """
+    Sorgu yanıtından bakiye ifadesini çıkar
+    Dönüş: (sayfa metni, bulunan bakiye ifadesi veya None)
+    """
+    _, page_text = BACKENDS[backend or get_backend()]
+    text = page_text(html)
+    return text, find_balance_text(text)
@@ -0,0 +1,153 @@
+"""
+Bildirim Özeti (Digest)
+Kart art arda kullanıldığında her bakiye değişikliği için ayrı Telegram/Email/WhatsApp
+mesajı göndermek yerine NOTIFY_DIGEST_MINUTES dakika içindeki değişiklikler tek bir
+özet mesajda birleştirilir: başlangıç bakiyesi, son bakiye ve her değişikliğin farkı.
+
+- Pencere ilk değişiklikle açılır; süresi dolunca sonraki çalıştırmada (cron) veya
+  daemon modunda zamanlayıcı ile gönderilir
+- Değişiklikler bakiye geçmişi ile aynı veritabanındaki digest tablosunda tutulur;
+  süreç yeniden başlasa da kaybolmaz
+- Özet, normal bildirimler gibi kalıcı kuyruk (outbox) üzerinden gönderilir
+"""
+
+import os
+import time
+import threading
+from datetime import datetime
+
+import balance_history
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS digest (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    card_number TEXT NOT NULL,
+    window_start REAL NOT NULL,  -- Pencereyi açan ilk değişikliğin zamanı
+    checked_at REAL NOT NULL,
+    previous_balance REAL NOT NULL,
+    balance REAL NOT NULL,
+    card_type TEXT,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_digest_window ON digest (card_number, window_start);
+"""
+
+_initialized_paths = set()
+_init_lock = threading.Lock()
+
+def _connect():
+    conn = balance_history.connect()
+    db_path = os.path.abspath(balance_history.BALANCE_DB)
+    if db_path not in _initialized_paths:
+        with _init_lock:
+            if db_path not in _initialized_paths:
+                conn.executescript(SCHEMA)
+                _initialized_paths.add(db_path)
+    return conn
+
+def add(card_number, previous_balance, balance, card_type, status, window_minutes, now=None):
+    """
+    Bakiye değişikliğini kartın açık penceresine ekle (yoksa yeni pencere aç)
+    Dönüş: pencerenin gönderileceği zaman (timestamp)
+    """
+    conn = _connect()
+    now = time.time() if now is None else now
+    window = window_minutes * 60
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(
+            "SELECT MAX(window_start) FROM digest WHERE card_number = ?", (card_number,)
+        ).fetchone()
+        window_start = row[0]
+        # Süresi dolmuş (henüz gönderilmemiş) pencereye yeni değişiklik eklenmez
+        if window_start is None or now >= window_start + window:
+            window_start = now
+        conn.execute(
+            "INSERT INTO digest (card_number, window_start, checked_at, previous_balance, balance, card_type, status) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (card_number, window_start, now, previous_balance, balance, card_type, status)
+        )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return window_start + window
+
+def due_windows(window_minutes, now=None):
+    """
+    Süresi dolan pencereler: [(kart, window_start), ...]
+    window_minutes 0 ise (özet kapatılmış) bekleyen tüm pencereler döner.
+    """
+    conn = _connect()
+    now = time.time() if now is None else now
+    rows = conn.execute(
+        "SELECT DISTINCT card_number, window_start FROM digest WHERE window_start + ? <= ? "
+        "ORDER BY window_start",
+        (window_minutes * 60, now)
+    ).fetchall()
+    return [(row['card_number'], row['window_start']) for row in rows]
+
+def next_due(window_minutes):
+    """En yakın pencerenin gönderileceği zaman (açık pencere yoksa None)"""
+    conn = _connect()
+    row = conn.execute("SELECT MIN(window_start) FROM digest").fetchone()
+    return None if row[0] is None else row[0] + window_minutes * 60
+
+def pending_count():
+    """Özette bekleyen değişiklik sayısı"""
+    conn = _connect()
+    return conn.execute("SELECT COUNT(*) FROM digest").fetchone()[0]
+
+def build_snapshot(card_number, window_start):
+    """
+    Penceredeki değişikliklerden bildirim anlık görüntüsü üret
+    Görüntü format_balance_result() ile aynı alanları taşır (eklenti kanallar da çalışır);
+    ek olarak 'digest' alanında başlangıç/son bakiye ve değişiklik listesi bulunur.
+    Dönüş: (snapshot, idempotency_key, son_id) veya pencere boşsa None
+    """
+    conn = _connect()
+    rows = conn.execute(
+        "SELECT * FROM digest WHERE card_number = ? AND window_start = ? ORDER BY id",
+        (card_number, window_start)
+    ).fetchall()
+    if not rows:
+        return None
+
+    first, last = rows[0], rows[-1]
+    changes = [
+        {
+            'checked_at': datetime.fromtimestamp(row['checked_at']).strftime('%Y-%m-%d %H:%M:%S'),
+            'balance': row['balance'],
+            'delta': round(row['balance'] - row['previous_balance'], 2),
+        }
+        for row in rows
+    ]
+    start_balance = first['previous_balance']
+    end_balance = last['balance']
+    snapshot = {
+        'success': True,
+        'card_number': card_number,
+        'card_type': last['card_type'],
+        'balance': end_balance,
+        'status': last['status'],
+        'message': (f"{len(changes)} bakiye değişikliği: {start_balance:,.2f} TL → {end_balance:,.2f} TL "
+                    f"({end_balance - start_balance:+,.2f} TL)"),
+        'checked_at': changes[-1]['checked_at'],
+        'digest': {
+            'start_balance': start_balance,
+            'end_balance': end_balance,
+            'changes': changes,
+        },
+    }
+    # Aynı pencere tekrar gönderilirse (örn. silmeden önce çökme) outbox mesajı çoğaltmaz
+    idempotency_key = f"digest:{card_number}:{window_start:.3f}:{last['id']}"
+    return snapshot, idempotency_key, last['id']
+
+def clear(card_number, window_start, last_id):
+    """Gönderilmek üzere kuyruğa alınan pencereyi sil"""
+    conn = _connect()
+    conn.execute(
+        "DELETE FROM digest WHERE card_number = ? AND window_start = ? AND id <= ?",
+        (card_number, window_start, last_id)
+    )
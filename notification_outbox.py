@@ -0,0 +1,166 @@
+"""
+Kalıcı Bildirim Kuyruğu (Outbox)
+Formatlanan bildirim mesajları göndermeden önce SQLite'a yazılır.
+Gönderim başarısız olursa mesaj kaybolmaz; sonraki çalıştırmada bakiye tekrar
+sorgulanmadan üstel geri çekilme (exponential backoff) ile yeniden denenir.
+
+Her mesajın bir idempotency anahtarı vardır: aynı mesaj iki kez kuyruğa girmez,
+gönderildi olarak işaretlenen mesaj tekrar gönderilmez.
+Kuyruk, bakiye geçmişi ile aynı veritabanı dosyasını kullanır.
+"""
+
+import os
+import time
+import threading
+
+import config
+import balance_history
+
+# Yeniden deneme ayarları (OUTBOX_MAX_ATTEMPTS, OUTBOX_BACKOFF_BASE, OUTBOX_BACKOFF_MAX,
+# OUTBOX_RETENTION_DAYS) her kullanımda config.current() üzerinden okunur
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    channel TEXT NOT NULL,
+    subject TEXT,
+    body TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',  -- pending, sent, dead
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    sent_at REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at);
+"""
+
+_initialized_paths = set()
+_init_lock = threading.Lock()
+
+def _connect():
+    conn = balance_history.connect()
+    db_path = os.path.abspath(balance_history.BALANCE_DB)
+    if db_path not in _initialized_paths:
+        with _init_lock:
+            if db_path not in _initialized_paths:
+                conn.executescript(SCHEMA)
+                _initialized_paths.add(db_path)
+    return conn
+
+def enqueue(channel, body, idempotency_key, subject=None):
+    """
+    Mesajı kuyruğa ekle
+    Aynı anahtarla daha önce eklenmişse yeni kayıt oluşturulmaz; mevcut kaydın id'si döner.
+    """
+    conn = _connect()
+    now = time.time()
+    conn.execute(
+        "INSERT OR IGNORE INTO outbox (idempotency_key, channel, subject, body, next_attempt_at, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (idempotency_key, channel, subject, body, now, now)
+    )
+    row = conn.execute("SELECT id FROM outbox WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+    return row['id']
+
+def claim_due(channels, lease_seconds, limit=50, created_before=None, include_ids=()):
+    """
+    Zamanı gelmiş bekleyen mesajları gönderim için sahiplen
+    Sahiplenilen mesajın next_attempt_at değeri lease kadar ileri alınır; böylece
+    aynı anda çalışan başka bir süreç aynı mesajı göndermez. Süreç çökerse
+    lease dolduğunda mesaj tekrar denenebilir hale gelir.
+    created_before: verilirse sadece bu zamandan önce eklenen mesajlar (ve include_ids)
+    sahiplenilir; aynı anda çalışan kontrolün yeni eklediği mesajlara dokunulmaz.
+    """
+    if not channels:
+        return []
+
+    conn = _connect()
+    now = time.time()
+    placeholders = ','.join('?' for _ in channels)
+    query = f"SELECT * FROM outbox WHERE status = 'pending' AND next_attempt_at <= ? AND channel IN ({placeholders})"
+    params = [now, *channels]
+    if created_before is not None:
+        include_ids = list(include_ids)
+        id_placeholders = ','.join('?' for _ in include_ids) or 'NULL'
+        query += f" AND (created_at < ? OR id IN ({id_placeholders}))"
+        params += [created_before, *include_ids]
+    rows = conn.execute(query + " ORDER BY id LIMIT ?", (*params, limit)).fetchall()
+
+    claimed = []
+    for row in rows:
+        cursor = conn.execute(
+            "UPDATE outbox SET next_attempt_at = ? WHERE id = ? AND status = 'pending' AND next_attempt_at <= ?",
+            (now + lease_seconds, row['id'], now)
+        )
+        if cursor.rowcount == 1:
+            claimed.append(dict(row))
+    return claimed
+
+def mark_sent(message_id):
+    """Mesajı gönderildi olarak işaretle"""
+    conn = _connect()
+    conn.execute(
+        "UPDATE outbox SET status = 'sent', sent_at = ?, attempts = attempts + 1, last_error = NULL WHERE id = ?",
+        (time.time(), message_id)
+    )
+
+def mark_failed(message_id, error):
+    """
+    Başarısız denemeyi kaydet ve bir sonraki denemeyi planla
+    Bekleme süresi: OUTBOX_BACKOFF_BASE * 2^(deneme-1), en fazla OUTBOX_BACKOFF_MAX.
+    OUTBOX_MAX_ATTEMPTS denemeden sonra mesaj 'dead' olarak işaretlenir.
+    """
+    conn = _connect()
+    row = conn.execute("SELECT attempts, status FROM outbox WHERE id = ?", (message_id,)).fetchone()
+    if row is None or row['status'] != 'pending':
+        return
+
+    settings = config.current()
+    attempts = row['attempts'] + 1
+    if attempts >= settings.outbox_max_attempts:
+        conn.execute(
+            "UPDATE outbox SET status = 'dead', attempts = ?, last_error = ? WHERE id = ?",
+            (attempts, str(error), message_id)
+        )
+        return
+
+    delay = min(settings.outbox_backoff_base * (2 ** (attempts - 1)), settings.outbox_backoff_max)
+    conn.execute(
+        "UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ? AND status = 'pending'",
+        (attempts, time.time() + delay, str(error), message_id)
+    )
+
+def drop_inactive(active_channels):
+    """
+    Artık aktif olmayan (kapatılmış veya kaldırılmış) kanalların bekleyen mesajlarını 'dead' yap
+    Bu mesajlar hiç sahiplenilmeyeceği için aksi halde kuyrukta sonsuza kadar bekler.
+    Dönüş: işaretlenen mesaj sayısı
+    """
+    conn = _connect()
+    active_channels = list(active_channels)
+    query = "UPDATE outbox SET status = 'dead', last_error = 'kanal aktif değil' WHERE status = 'pending'"
+    if active_channels:
+        query += f" AND channel NOT IN ({','.join('?' for _ in active_channels)})"
+    cursor = conn.execute(query, active_channels)
+    return cursor.rowcount
+
+def get_status(message_id):
+    """Mesajın kuyruk durumunu döndür ('pending', 'sent', 'dead' veya None)"""
+    conn = _connect()
+    row = conn.execute("SELECT status FROM outbox WHERE id = ?", (message_id,)).fetchone()
+    return row['status'] if row else None
+
+def pending_count():
+    """Bekleyen (henüz gönderilmemiş) mesaj sayısı"""
+    conn = _connect()
+    return conn.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
+
+def purge(retention_days=None):
+    """Saklama süresi dolan gönderilmiş ve ölü mesajları sil (varsayılan: OUTBOX_RETENTION_DAYS)"""
+    if retention_days is None:
+        retention_days = config.current().outbox_retention_days
+    conn = _connect()
+    cutoff = time.time() - retention_days * 86400
+    conn.execute("DELETE FROM outbox WHERE status != 'pending' AND created_at < ?", (cutoff,))
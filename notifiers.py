@@ -0,0 +1,397 @@
+"""
+Bildirim Kanalları (Notifier Kayıt Defteri)
+Her kanal kendi ayarlarını, mesaj biçimini (render) ve gönderimini (send) tanımlar.
+Mesajlar sadece aktif kanallar için, tek bir bakiye anlık görüntüsünden (snapshot) üretilir.
+
+Yerleşik kanallar: telegram, email, whatsapp
+
+Yeni kanal eklemek için shell_auto_checker.py'yi değiştirmeye gerek yoktur:
+- Paket entry point'i: [project.entry-points."shell_card_checker.notifiers"] slack = "paket.modul:SlackNotifier"
+- veya .env: NOTIFIER_PLUGINS=slack=paket.modul:SlackNotifier,ntfy=ntfy_notifier:Notifier
+
+Eklenti kanalları sadece <KANAL>_ENABLED=true ise import edilir (örn. SLACK_ENABLED=true).
+Kanal sınıfı Notifier'dan türemeli; render() ve send() metodlarını tanımlamalıdır.
+Ayarlar config.current() üzerinden okunur; yerleşik kanallar config.load() sırasında doğrulanır.
+"""
+
+import re
+import importlib
+import threading
+
+import clients
+import config
+
+ENTRY_POINT_GROUP = 'shell_card_checker.notifiers'
+
+def _env_enabled(name):
+    return config.current().enabled(f'{name.upper()}_ENABLED')
+
+def digest_lines(snapshot):
+    """Bildirim özetindeki değişiklik satırları (tek kontrolün bildirimi ise boş)"""
+    digest = snapshot.get('digest')
+    if not digest:
+        return []
+    return [
+        f"{change['checked_at'][11:16]}  {change['delta']:+,.2f} TL → {change['balance']:,.2f} TL"
+        for change in digest['changes']
+    ]
+
+class Notifier:
+    """Bildirim kanalı temel sınıfı"""
+    name = None
+    label = None
+    # Kanal aktifken zorunlu olan ayarlar (ortam değişkeni adları)
+    required = ()
+
+    def __init__(self, name=None):
+        # Eklentilerde kanal adı kayıttaki addan gelir (entry point veya NOTIFIER_PLUGINS)
+        if name:
+            self.name = name
+        self.label = self.label or self.name
+        self.enabled = _env_enabled(self.name)
+
+    def setting(self, key, default=''):
+        return config.current().get(key, default)
+
+    @classmethod
+    def check(cls, cfg):
+        """Kanal aktifken ayar değerlerinin biçimini kontrol et; sorun listesi döndür"""
+        return []
+
+    def missing(self):
+        """Eksik zorunlu ayarların adları"""
+        return [key for key in self.required if not self.setting(key)]
+
+    def invalid(self):
+        """Biçimi hatalı ayarlar (check() sonucu)"""
+        return self.check(config.current())
+
+    def state(self):
+        """'active', 'disabled' veya 'incomplete' (eksik veya hatalı ayar)"""
+        if not self.enabled:
+            return 'disabled'
+        return 'incomplete' if self.missing() or self.invalid() else 'active'
+
+    def render(self, snapshot):
+        """
+        Bakiye anlık görüntüsünden kanal mesajını üret
+        Dönüş: {'body': ..., 'subject': ... veya None}
+        """
+        raise NotImplementedError
+
+    def send(self, message, timeout):
+        """Kuyruktaki mesajı gönder (message: body, subject, idempotency_key); başarıda True"""
+        raise NotImplementedError
+
+class TelegramNotifier(Notifier):
+    name = 'telegram'
+    label = 'Telegram'
+    required = ('TELEGRAM_BOT_TOKEN', 'TELEGRAM_CHAT_ID')
+
+    @classmethod
+    def check(cls, cfg):
+        chat_id = cfg.get('TELEGRAM_CHAT_ID').strip()
+        if chat_id and not (chat_id.lstrip('-').isdigit() or chat_id.startswith('@')):
+            return [f"TELEGRAM_CHAT_ID={chat_id!r} sayı (veya @kanal_adı) olmalı"]
+        return []
+
+    def render(self, snapshot):
+        changes = ''.join(f"\n▫️ {line}" for line in digest_lines(snapshot))
+        body = f"""
+🚗 <b>Shell Kart Bakiye Sorgulama</b>
+
+💳 Kart: <code>{snapshot['card_number']}</code>
+📋 Tip: {snapshot['card_type']}
+💰 Bakiye: <b>{snapshot['balance']:,.2f} TL</b>
+✅ Durum: {snapshot['status']}
+📝 {snapshot['message']}{changes}
+
+⏰ {snapshot['checked_at']}
+    """
+        return {'body': body, 'subject': None}
+
+    def send(self, message, timeout):
+        try:
+            url = f"https://api.telegram.org/bot{self.setting('TELEGRAM_BOT_TOKEN')}/sendMessage"
+            data = {
+                'chat_id': self.setting('TELEGRAM_CHAT_ID'),
+                'text': message['body'],
+                'parse_mode': 'HTML'
+            }
+            session = clients.get_http_session('api.telegram.org')
+            response = session.post(url, data=data, timeout=timeout)
+            return response.status_code == 200
+        except Exception as e:
+            print(f"⚠️  Telegram bildirim hatası: {e}")
+            return False
+
+class EmailNotifier(Notifier):
+    name = 'email'
+    label = 'Email'
+    required = ('EMAIL_FROM', 'EMAIL_TO', 'EMAIL_PASSWORD')
+
+    @classmethod
+    def check(cls, cfg):
+        errors = []
+        port = cfg.get('EMAIL_SMTP_PORT', '587').strip()
+        if not port.isdigit() or not 0 < int(port) < 65536:
+            errors.append(f"EMAIL_SMTP_PORT={port!r} 1-65535 arasında bir port olmalı")
+        for key in ('EMAIL_FROM', 'EMAIL_TO'):
+            value = cfg.get(key).strip()
+            if value and '@' not in value:
+                errors.append(f"{key}={value!r} geçerli bir email adresi değil")
+        return errors
+
+    def render(self, snapshot):
+        row = '<td style="padding: 8px; border: 1px solid #ddd; font-weight: bold;">{}</td>'
+        cell = '<td style="padding: 8px; border: 1px solid #ddd;">{}</td>'
+        balance_cell = ('<td style="padding: 8px; border: 1px solid #ddd; font-size: 18px; '
+                        'color: #28a745; font-weight: bold;">{:,.2f} TL</td>')
+        rows = [
+            (row.format('Kart Numarası:'), cell.format(snapshot['card_number'])),
+            (row.format('Kart Tipi:'), cell.format(snapshot['card_type'])),
+            (row.format('Bakiye:'), balance_cell.format(snapshot['balance'])),
+            (row.format('Durum:'), cell.format(snapshot['status'])),
+            (row.format('Mesaj:'), cell.format(snapshot['message'])),
+            (row.format('Tarih:'), cell.format(snapshot['checked_at'])),
+        ]
+        changes = digest_lines(snapshot)
+        if changes:
+            rows.insert(5, (row.format('Değişiklikler:'), cell.format('<br>'.join(changes))))
+        table = '\n'.join(f"""            <tr>
+                {label}
+                {value}
+            </tr>""" for label, value in rows)
+        body = f"""
+    <html>
+    <body style="font-family: Arial, sans-serif;">
+        <h2>🚗 Shell Kart Bakiye Sorgulama Sonucu</h2>
+        <table style="border-collapse: collapse; width: 100%;">
+{table}
+        </table>
+    </body>
+    </html>
+    """
+        subject = f"Shell Kart Bakiye: {snapshot['balance']:,.2f} TL"
+        if snapshot.get('digest'):
+            digest = snapshot['digest']
+            subject = (f"Shell Kart Bakiye Özeti: {digest['start_balance']:,.2f} TL → "
+                       f"{digest['end_balance']:,.2f} TL")
+        return {'body': body, 'subject': subject}
+
+    def send(self, message, timeout):
+        try:
+            # MIME sadece email gerçekten gönderilirken yüklenir
+            from email.mime.text import MIMEText
+            from email.mime.multipart import MIMEMultipart
+
+            email_from = self.setting('EMAIL_FROM')
+            msg = MIMEMultipart()
+            msg['From'] = email_from
+            msg['To'] = self.setting('EMAIL_TO')
+            msg['Subject'] = message['subject']
+            if message.get('idempotency_key'):
+                # Aynı mesaj tekrar gönderilirse alıcı tarafı Message-ID ile ayıklayabilir
+                import hashlib
+                digest = hashlib.sha1(message['idempotency_key'].encode()).hexdigest()
+                msg['Message-ID'] = f"<{digest}@shell-card-checker>"
+
+            msg.attach(MIMEText(message['body'], 'html', 'utf-8'))
+
+            # Bağlantı ve login yeniden kullanılır (daemon modunda her mesajda tekrarlanmaz)
+            smtp_client = clients.get_smtp_client(
+                self.setting('EMAIL_SMTP_SERVER', 'smtp.gmail.com'),
+                int(self.setting('EMAIL_SMTP_PORT', '587')),
+                email_from,
+                self.setting('EMAIL_PASSWORD'),
+            )
+            smtp_client.send_message(msg, timeout=timeout)
+            return True
+        except Exception as e:
+            print(f"⚠️  Email bildirim hatası: {e}")
+            return False
+
+class WhatsAppNotifier(Notifier):
+    name = 'whatsapp'
+    label = 'WhatsApp'
+    required = ('WHATSAPP_TWILIO_ACCOUNT_SID', 'WHATSAPP_TWILIO_AUTH_TOKEN', 'WHATSAPP_TWILIO_FROM', 'WHATSAPP_TO')
+
+    @classmethod
+    def check(cls, cfg):
+        return [
+            f"{key}={cfg.get(key)!r} 'whatsapp:+' ile başlamalı (örn. whatsapp:+905551234567)"
+            for key in ('WHATSAPP_TWILIO_FROM', 'WHATSAPP_TO')
+            if cfg.get(key) and not cfg.get(key).startswith('whatsapp:+')
+        ]
+
+    def render(self, snapshot):
+        # WhatsApp HTML desteklemez, düz metin
+        changes = ''.join(f"\n• {line}" for line in digest_lines(snapshot))
+        body = f"""🚗 Shell Kart Bakiye Sorgulama
+
+💳 Kart: {snapshot['card_number']}
+📋 Tip: {snapshot['card_type']}
+💰 Bakiye: {snapshot['balance']:,.2f} TL
+✅ Durum: {snapshot['status']}
+📝 {snapshot['message']}{changes}
+
+⏰ {snapshot['checked_at']}"""
+        return {'body': body, 'subject': None}
+
+    def send(self, message, timeout):
+        # Eski kayıtlarda HTML kalmış olabilir (WhatsApp HTML desteklemez)
+        clean_message = re.sub(r'<[^>]+>', '', message['body'])
+        clean_message = clean_message.replace('&nbsp;', ' ').strip()
+
+        try:
+            # Twilio kütüphanesi gerekli: pip install twilio
+            client = clients.get_twilio_client(
+                self.setting('WHATSAPP_TWILIO_ACCOUNT_SID'), self.setting('WHATSAPP_TWILIO_AUTH_TOKEN'), timeout
+            )
+            if client is None:
+                print("⚠️  Twilio kütüphanesi bulunamadı! Kurulum: pip install twilio")
+                return False
+
+            message_obj = client.messages.create(
+                from_=self.setting('WHATSAPP_TWILIO_FROM'),
+                body=clean_message,
+                to=self.setting('WHATSAPP_TO')
+            )
+            return message_obj.sid is not None
+        except Exception as e:
+            print(f"⚠️  WhatsApp bildirim hatası: {e}")
+            return False
+
+# ----------------------------------------------------------------------------
+# Kayıt defteri
+# ----------------------------------------------------------------------------
+
+BUILTIN_NOTIFIERS = {
+    'telegram': TelegramNotifier,
+    'email': EmailNotifier,
+    'whatsapp': WhatsAppNotifier,
+}
+
+class _DisabledPlugin(Notifier):
+    """Eklenti kapalıyken import edilmeden yerine kullanılır"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.enabled = False
+
+_plugin_specs = None
+_instances = {}
+# get() worker thread'lerinden de çağrılır (bildirimler paralel gönderilir)
+_lock = threading.RLock()
+
+def _load_plugin_specs():
+    """{kanal: yükleyici} - yükleyici çağrılınca kanal sınıfı import edilir"""
+    global _plugin_specs
+
+    with _lock:
+        if _plugin_specs is None:
+            _plugin_specs = _read_plugin_specs()
+        return _plugin_specs
+
+def _read_plugin_specs():
+    """Paket entry point'leri ve NOTIFIER_PLUGINS"""
+    specs = {}
+    try:
+        from importlib.metadata import entry_points
+        try:
+            found = entry_points(group=ENTRY_POINT_GROUP)
+        except TypeError:  # Python 3.9
+            found = entry_points().get(ENTRY_POINT_GROUP, [])
+        for entry_point in found:
+            specs[entry_point.name] = entry_point.load
+    except Exception as e:
+        print(f"⚠️  Bildirim eklentileri okunamadı: {e}")
+
+    for item in config.current().get('NOTIFIER_PLUGINS').split(','):
+        if not item.strip():
+            continue
+        name, _, target = item.strip().partition('=')
+        module_name, _, attr = target.partition(':')
+        if not module_name or not attr:
+            print(f"⚠️  Geçersiz NOTIFIER_PLUGINS girdisi: {item} (beklenen: kanal=modul:Sinif)")
+            continue
+        specs[name.strip()] = (lambda m=module_name, a=attr: getattr(importlib.import_module(m), a))
+
+    return specs
+
+def validate(cfg):
+    """
+    Aktif yerleşik kanalların ayarlarını doğrula (eksik kimlik bilgisi, hatalı port vb.)
+    Eklentiler import edilmez; onların eksik ayarları state() ile raporlanır.
+    Dönüş: sorun mesajları listesi
+    """
+    errors = []
+    for name, cls in BUILTIN_NOTIFIERS.items():
+        enabled_key = f'{name.upper()}_ENABLED'
+        if not cfg.enabled(enabled_key):
+            continue
+        missing = [key for key in cls.required if not cfg.get(key).strip()]
+        if missing:
+            errors.append(f"{cls.label} aktif ({enabled_key}=true) ama {', '.join(missing)} eksik")
+        errors.extend(cls.check(cfg))
+    return errors
+
+def channel_names():
+    """Tanımlı tüm kanalların adları (eklentiler import edilmez)"""
+    names = list(BUILTIN_NOTIFIERS)
+    names.extend(name for name in _load_plugin_specs() if name not in BUILTIN_NOTIFIERS)
+    return names
+
+def get(name):
+    """Kanal nesnesini döndür (ilk kullanımda oluşturulur; aynı kanal iki kez oluşturulmaz)"""
+    notifier = _instances.get(name)
+    if notifier is not None:
+        return notifier
+
+    with _lock:
+        if name in _instances:
+            return _instances[name]
+
+        if name in BUILTIN_NOTIFIERS:
+            notifier = BUILTIN_NOTIFIERS[name]()
+        elif name in _load_plugin_specs():
+            if not _env_enabled(name):
+                return _DisabledPlugin(name)
+            try:
+                notifier = _load_plugin_specs()[name]()(name)
+            except Exception as e:
+                print(f"⚠️  {name} bildirim eklentisi yüklenemedi: {e}")
+                return _DisabledPlugin(name)
+        else:
+            raise KeyError(name)
+
+        _instances[name] = notifier
+        return notifier
+
+def active_channels():
+    """Gönderime hazır kanallar"""
+    return [name for name in channel_names() if get(name).state() == 'active']
+
+def reset():
+    """Kanal nesnelerini sıfırla (ayarlar değiştiğinde yeniden oluşturulurlar)"""
+    global _plugin_specs
+    with _lock:
+        _instances.clear()
+        _plugin_specs = None
+
+def status_line(name, status):
+    """Kanal gönderim sonucunu ekrana yazılacak satıra çevir"""
+    notifier = get(name)
+    label = notifier.label
+    if status == 'sent':
+        return f"✅ {label} bildirimi gönderildi"
+    if status == 'failed':
+        return f"⚠️  {label} bildirimi gönderilemedi"
+    if status == 'timeout':
+        return f"⚠️  {label} bildirimi zaman aşımına uğradı"
+    if status == 'incomplete':
+        missing = notifier.missing()
+        if missing:
+            return f"⚠️  {label} bildirimi aktif ama {', '.join(missing)} eksik"
+        return f"⚠️  {label} bildirimi aktif ama ayarları geçersiz: {'; '.join(notifier.invalid())}"
+    return f"ℹ️  {label} bildirimi deaktif ({name.upper()}_ENABLED=false)"
@@ -0,0 +1,226 @@
+"""
+Profil Modu (--profile)
+Yavaşlayan bir çalıştırmayı koda elle ölçüm eklemeden incelemek için:
+- main() (daemon modunda tüm daemon) cProfile ile çalıştırılır; istatistikler pstats
+  dosyasına yazılır ve kümülatif süreye göre en pahalı PROFILE_TOP fonksiyon gösterilir
+- tracemalloc ile her fazın (sayfa parse, CAPTCHA görseli, OCR, sorgu, formatlama,
+  bildirim...) bellek tepe noktası ve en çok bellek ayıran satırları raporlanır
+
+Worker thread'lerinde çalışan adımlar (bkz. run_check_async) kendi profiler'ları ile
+ölçülür ve raporda birleştirilir. Aynı anda çalışan fazların bellek tepe noktaları
+birbirini içerebilir.
+
+Kapalıyken (varsayılan) cProfile/tracemalloc yüklenmez; fazlar tek bir global kontrol yapar.
+
+Kullanım: python3 shell_auto_checker.py --profile [DOSYA]
+          python3 -m pstats profile.pstats   # Kaydedilen istatistikleri incele
+"""
+
+import os
+import sys
+import time
+import threading
+import contextlib
+
+import config
+
+# En çok bellek ayıran satırlar sadece bu fazlar için aranır: iki snapshot karşılaştırmak
+# on binlerce kayıt içinde pahalıdır (faz başına ~1 sn); diğer fazlar için sadece tepe noktası ölçülür
+DETAIL_PHASES = ('page.parse', 'captcha.download', 'ocr', 'inquiry', 'format', 'notify')
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+# Aktif profil oturumu (kapalıyken None)
+_session = None
+
+class ProfileSession:
+    """Bir profil çalıştırmasının cProfile ve tracemalloc ölçümleri"""
+
+    def __init__(self, top=None, sites=None):
+        import tracemalloc
+
+        settings = config.current()
+        # PROFILE_TOP: özetteki fonksiyon sayısı, PROFILE_SITES: faz başına gösterilen bellek satırı
+        self.top = settings.profile_top if top is None else top
+        self.sites = settings.profile_sites if sites is None else sites
+        # Biten çağrıların birikimli istatistikleri; profiler'lar çağrı bitince bırakılır
+        # (daemon modunda her kontrolün worker çağrıları belleği büyütmesin)
+        self.stats = None
+        self.phases = {}
+        self.peak = 0
+        self.overhead = 0.0
+        self._open = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._excluded = {tracemalloc.__file__, __file__}
+
+    def call(self, func, *args):
+        """func'u bu thread'e ait bir profiler ile çalıştır"""
+        if getattr(self._local, 'profiling', False):
+            # Aynı thread'de iç içe profiler açılmaz (dıştaki zaten ölçüyor)
+            return func(*args)
+
+        import cProfile
+
+        profiler = cProfile.Profile()
+        self._local.profiling = True
+        self._local.profiler = profiler
+        try:
+            return profiler.runcall(func, *args)
+        finally:
+            self._local.profiling = False
+            self._local.profiler = None
+            self._collect(profiler)
+
+    def _collect(self, profiler):
+        """Biten çağrının ölçümlerini birikimli istatistiklere ekle"""
+        import pstats
+
+        try:
+            stats = pstats.Stats(profiler, stream=sys.stdout)
+        except TypeError:
+            return  # Hiç fonksiyon çağrısı ölçülmedi
+        with self._lock:
+            if self.stats is None:
+                self.stats = stats
+            else:
+                self.stats.add(stats)
+
+    def _update_peaks(self):
+        """Tepe noktasını açık fazlara dağıt ve sıfırla (iç içe fazlar birbirini bozmasın)"""
+        import tracemalloc
+
+        current, peak = tracemalloc.get_traced_memory()
+        for frame in self._open:
+            frame['peak'] = max(frame['peak'], peak)
+        self.peak = max(self.peak, peak)
+        tracemalloc.reset_peak()
+        return current
+
+    @contextlib.contextmanager
+    def _paused(self):
+        """Bellek analizi süresince bu thread'in profiler'ını durdur (rapora karışmasın)"""
+        profiler = getattr(self._local, 'profiler', None)
+        started = time.perf_counter()
+        if profiler is not None:
+            profiler.disable()
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.enable()
+            with self._lock:
+                self.overhead += time.perf_counter() - started
+
+    @contextlib.contextmanager
+    def memory(self, name):
+        """Fazın bellek tepe noktasını ve (DETAIL_PHASES için) en çok ayıran satırları ölç"""
+        import tracemalloc
+
+        detail = name in DETAIL_PHASES and self.sites > 0
+        before = None
+        if detail:
+            with self._paused():
+                before = tracemalloc.take_snapshot()
+        with self._lock:
+            current = self._update_peaks()
+            frame = {'start': current, 'peak': current}
+            self._open.append(frame)
+        try:
+            yield
+        finally:
+            with self._lock:
+                current = self._update_peaks()
+                self._open.remove(frame)
+            sites = []
+            if detail:
+                with self._paused():
+                    after = tracemalloc.take_snapshot()
+                    sites = self._top_sites(after.compare_to(before, 'lineno'))
+            self._record(name, frame['peak'] - frame['start'], current - frame['start'], sites)
+
+    def _top_sites(self, differences):
+        sites = []
+        # compare_to mutlak farka göre sıralar; serbest bırakılan bellek atlanır
+        for stat in differences:
+            if len(sites) >= self.sites:
+                break
+            filename, lineno = stat.traceback[0].filename, stat.traceback[0].lineno
+            # Profil modunun kendi ayırdığı bellek gösterilmesin
+            if stat.size_diff <= 0 or filename in self._excluded:
+                continue
+            sites.append((f"{os.path.basename(filename)}:{lineno}", stat.size_diff))
+        return sites
+
+    def _record(self, name, peak, net, sites):
+        with self._lock:
+            entry = self.phases.setdefault(name, {'order': len(self.phases), 'count': 0, 'peak': -1})
+            entry['count'] += 1
+            # Daemon modunda faz birden çok kez çalışır; en yüksek tepe noktası saklanır
+            if peak > entry['peak']:
+                entry.update(peak=peak, net=net, sites=sites)
+
+    def report(self, path):
+        """pstats dosyasını yaz, en pahalı fonksiyonları ve faz bellek tablosunu göster"""
+        with self._lock:
+            stats = self.stats
+        if stats is None:
+            print("⚠️  Profil verisi toplanmadı")
+            return
+        try:
+            stats.dump_stats(path)
+            print(f"\n🔬 Profil kaydedildi: {path} (incelemek için: python3 -m pstats {path})")
+        except OSError as e:
+            print(f"⚠️  Profil dosyası yazılamadı: {e}")
+
+        print("\n" + "=" * 60)
+        print(f"🔬 EN PAHALI {self.top} FONKSİYON (kümülatif süre)")
+        print("=" * 60)
+        stats.strip_dirs().sort_stats('cumulative').print_stats(self.top)
+
+        print("=" * 60)
+        print("🧠 BELLEK (tracemalloc, faz başına)")
+        print("=" * 60)
+        print(f"   {'faz':<28} {'adet':>5} {'tepe (KB)':>11} {'net (KB)':>10}")
+        for name, entry in sorted(self.phases.items(), key=lambda item: item[1]['order']):
+            print(f"   {name:<28} {entry['count']:>5} {entry['peak'] / 1024:>11.1f} {entry['net'] / 1024:>+10.1f}")
+            for site, size in entry['sites']:
+                print(f"      {site:<40} {size / 1024:>+10.1f} KB")
+        print(f"   {'toplam tepe':<28} {'':>5} {self.peak / 1024:>11.1f}")
+        print(f"   Bellek analizi {self.overhead:.2f} sn sürdü (fonksiyon istatistiklerine dahil değil)")
+        print("=" * 60)
+
+def active():
+    return _session is not None
+
+def memory(name):
+    """Profil modu açıksa fazın belleğini ölç, değilse hiçbir şey yapma"""
+    if _session is None:
+        return _NULL_CONTEXT
+    return _session.memory(name)
+
+def call(func, *args):
+    """
+    func'u çalıştır; profil modu açıksa bu thread'in profiler'ı ile
+    Worker thread'lerinde çalışan adımlar ana thread'in profiler'ına görünmez.
+    """
+    if _session is None:
+        return func(*args)
+    return _session.call(func, *args)
+
+def run(path, func, *args):
+    """
+    func'u profil modunda çalıştır ve sonunda raporu göster
+    Dönüş: func'un dönüş değeri
+    """
+    global _session
+    import tracemalloc
+
+    tracemalloc.start()
+    _session = ProfileSession()
+    try:
+        return _session.call(func, *args)
+    finally:
+        session, _session = _session, None
+        session.report(path or config.current().profile_file)
+        tracemalloc.stop()
@@ -18,6 +18,16 @@ cd "$WORK_DIR" || {
 LOG_FILE="$WORK_DIR/cron.log"
 TIMESTAMP=$(date '+%Y-%m-%d %H:%M:%S')
 
+# cron.log sınırsız büyümesin: 5 MB'ı aşınca sıkıştırıp arşivle (son 3 arşiv saklanır)
+# Makine tarafından okunabilir kayıtlar runs.jsonl'dedir: python3 shell_auto_checker.py log
+CRON_LOG_MAX_BYTES=$((5 * 1024 * 1024))
+if [ -f "$LOG_FILE" ] && [ "$(wc -c < "$LOG_FILE")" -ge "$CRON_LOG_MAX_BYTES" ]; then
+    for i in 2 1; do
+        [ -f "$LOG_FILE.$i.gz" ] && mv -f "$LOG_FILE.$i.gz" "$LOG_FILE.$((i + 1)).gz"
+    done
+    gzip -c "$LOG_FILE" > "$LOG_FILE.1.gz" && : > "$LOG_FILE"
+fi
+
 # Log fonksiyonu (hem ekranda göster hem dosyaya yaz)
 log() {
     echo "$1" | tee -a "$LOG_FILE"
@@ -92,38 +102,13 @@ if [ -n "$VENV_DIR" ] && [ -z "${VENV_ALREADY_ACTIVATED:-}" ]; then
     log "✅ Sanal ortam aktifleştirildi"
 fi
 
-# Python script'ini çalıştır (5 defa deneme ile)
-MAX_RETRIES=5
-RETRY_COUNT=0
-EXIT_CODE=1
-
+# Python script'ini çalıştır
+# Yeniden deneme politikası Python içinde (RETRY_MAX_ATTEMPTS, varsayılan 5):
+# her deneme için yeni yorumlayıcı, import ve TLS bağlantısı gerekmez
 set -o pipefail  # Pipe'daki hataları yakala
 
-while [ $RETRY_COUNT -lt $MAX_RETRIES ]; do
-    RETRY_COUNT=$((RETRY_COUNT + 1))
-    
-    if [ $RETRY_COUNT -gt 1 ]; then
-        log ""
-        log "🔄 Yeniden deneme $RETRY_COUNT/$MAX_RETRIES..."
-        log "========================================"
-        # Kısa bir bekleme (yeni CAPTCHA için)
-        sleep 2
-    fi
-    
-    # Python script'ini çalıştır (hem ekranda göster hem log'a yaz)
-    python3 shell_auto_checker.py 2>&1 | tee -a "$LOG_FILE"
-    EXIT_CODE=$?
-    
-    # Başarılı olursa döngüden çık
-    if [ $EXIT_CODE -eq 0 ]; then
-        break
-    fi
-    
-    # Son deneme değilse devam et
-    if [ $RETRY_COUNT -lt $MAX_RETRIES ]; then
-        log "⚠️  Deneme $RETRY_COUNT başarısız, yeniden deneniyor..."
-    fi
-done
+python3 shell_auto_checker.py 2>&1 | tee -a "$LOG_FILE"
+EXIT_CODE=$?
 
 set +o pipefail  # Pipefail'i kapat
 
@@ -134,13 +119,9 @@ fi
 
 # Çıkış kodu kontrolü
 if [ $EXIT_CODE -eq 0 ]; then
-    if [ $RETRY_COUNT -gt 1 ]; then
-        log "[$TIMESTAMP] ✅ Bakiye kontrolü başarıyla tamamlandı ($RETRY_COUNT deneme sonrası)"
-    else
-        log "[$TIMESTAMP] ✅ Bakiye kontrolü başarıyla tamamlandı"
-    fi
+    log "[$TIMESTAMP] ✅ Bakiye kontrolü başarıyla tamamlandı"
 else
-    log "[$TIMESTAMP] ❌ Bakiye kontrolü $MAX_RETRIES deneme sonrası başarısız oldu"
+    log "[$TIMESTAMP] ❌ Bakiye kontrolü başarısız oldu"
 fi
 
 log "========================================"
@@ -0,0 +1,299 @@
+"""
+Yapılandırılmış Çalıştırma Günlüğü (JSONL)
+Her kontrol için tek satırlık bir JSON kaydı yazar: run id, faz süreleri,
+sonuç, bakiye ve bakiye farkı. Dosya boyut veya yaş sınırını aşınca
+gzip ile sıkıştırılıp döndürülür (rotation); en yeni RUN_LOG_BACKUPS arşiv saklanır.
+
+Sorgulama: python3 shell_auto_checker.py log [--since TARİH] [--until TARİH] [--outcome ok,network]
+Kayıtlar satır satır akış halinde okunur; dosyanın tamamı belleğe alınmaz.
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import uuid
+import argparse
+import contextlib
+from datetime import datetime
+
+import config
+import profiling
+import tracing
+
+# Dosya yolu import anında okunur (yeniden başlatma gerekir); döndürme ayarları
+# (RUN_LOG_MAX_BYTES, RUN_LOG_MAX_AGE_DAYS, RUN_LOG_BACKUPS) her yazmada config'den okunur
+RUN_LOG_FILE = os.getenv('RUN_LOG_FILE', 'runs.jsonl')
+
+class RunRecord:
+    """Tek bir kontrolün ölçümleri"""
+
+    def __init__(self, card_number):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.card_number = card_number
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.phases = {}
+        self.fields = {}
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Faz süresini ölç (aynı faz birden fazla denemede çalışırsa süreler toplanır)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + (time.perf_counter() - started)
+
+    def annotate(self, **fields):
+        self.fields.update(fields)
+
+    def to_dict(self, outcome):
+        record = {
+            'ts': datetime.fromtimestamp(self.started_at).strftime('%Y-%m-%dT%H:%M:%S'),
+            'started_at': round(self.started_at, 3),
+            'run_id': self.run_id,
+            'card_number': self.card_number,
+            'outcome': outcome,
+            'duration': round(time.perf_counter() - self._started, 3),
+            'phases': {name: round(seconds, 3) for name, seconds in self.phases.items()},
+        }
+        record.update(self.fields)
+        return record
+
+# Şu an çalışan kontrol (kontroller sırayla çalışır: cron veya daemon)
+_current = None
+
+def start_run(card_number):
+    global _current
+    _current = RunRecord(card_number)
+    return _current
+
+def current():
+    return _current
+
+@contextlib.contextmanager
+def phase(name, parent=None):
+    """
+    Aktif kontrol varsa faz süresini ölç, yoksa hiçbir şey yapma
+    Ölçüm (tracing) açıksa faz aynı zamanda bir span olarak kaydedilir;
+    profil modunda (--profile) fazın bellek kullanımı da ölçülür.
+    parent: faz başka bir thread'de çalışıyorsa ebeveyn span
+    """
+    record = _current
+    if record is None:
+        with profiling.memory(name), tracing.span(name, parent=parent):
+            yield
+        return
+    # Bellek ölçümü en dışta: snapshot süresi faz süresine eklenmez
+    with profiling.memory(name), record.phase(name), tracing.span(name, parent=parent):
+        yield
+
+def annotate(**fields):
+    if _current is not None:
+        _current.annotate(**fields)
+
+def record_error(kind):
+    """Başarısız bir denemenin hata türünü aktif kayda ekle"""
+    if _current is not None:
+        _current.fields.setdefault('errors', []).append(kind)
+
+def finish_run(outcome, path=None):
+    """Aktif kontrolü sonlandır ve kaydı günlüğe yaz"""
+    global _current
+    record = _current
+    _current = None
+    if record is None:
+        return None
+
+    data = record.to_dict(outcome)
+    try:
+        append(data, path)
+    except Exception as e:
+        print(f"⚠️  Çalıştırma günlüğü yazılamadı: {e}")
+    return data
+
+# ----------------------------------------------------------------------------
+# Yazma ve döndürme
+# ----------------------------------------------------------------------------
+
+@contextlib.contextmanager
+def _locked(path):
+    """cron ve daemon aynı anda yazarsa döndürme/yazma çakışmasın"""
+    try:
+        import fcntl
+    except ImportError:  # Windows
+        yield
+        return
+
+    with open(path + '.lock', 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _first_record_time(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.loads(f.readline()).get('started_at')
+    except Exception:
+        return None
+
+def _needs_rotation(path):
+    settings = config.current()
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return False
+    if size == 0:
+        return False
+    if size >= settings.run_log_max_bytes:
+        return True
+    first = _first_record_time(path)
+    return first is not None and time.time() - first >= settings.run_log_max_age_days * 86400
+
+def rotate(path=None):
+    """Günlüğü sıkıştırarak arşivle ve eski arşivleri sil"""
+    import gzip
+    import shutil
+
+    path = path or RUN_LOG_FILE
+    archive = f"{path}.{datetime.now().strftime('%Y%m%d-%H%M%S')}.gz"
+    with open(path, 'rb') as src, gzip.open(archive, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(path)
+
+    backups = config.current().run_log_backups
+    for old in archives(path)[:-backups or None]:
+        try:
+            os.remove(old)
+        except OSError:
+            pass
+    return archive
+
+def archives(path=None):
+    """Arşiv dosyalarını eskiden yeniye döndür (isimdeki zaman damgasına göre)"""
+    path = path or RUN_LOG_FILE
+    return sorted(glob.glob(glob.escape(path) + '.*.gz'))
+
+def append(record, path=None):
+    path = path or RUN_LOG_FILE
+    line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+    with _locked(path):
+        if _needs_rotation(path):
+            rotate(path)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+# ----------------------------------------------------------------------------
+# Sorgulama
+# ----------------------------------------------------------------------------
+
+def _archive_end_time(archive):
+    """Arşivin döndürüldüğü zaman; içindeki tüm kayıtlar bundan eskidir"""
+    stamp = archive.rsplit('.', 2)[-2]
+    try:
+        return datetime.strptime(stamp, '%Y%m%d-%H%M%S').timestamp()
+    except ValueError:
+        return None
+
+def iter_records(since=None, until=None, outcomes=None, path=None):
+    """Filtreye uyan kayıtları akış halinde (eskiden yeniye) döndür"""
+    import gzip
+
+    path = path or RUN_LOG_FILE
+    sources = []
+    for archive in archives(path):
+        end_time = _archive_end_time(archive)
+        if since is not None and end_time is not None and end_time < since:
+            continue  # Arşivin tamamı aralığın dışında, açmaya gerek yok
+        sources.append((archive, gzip.open))
+    if os.path.exists(path):
+        sources.append((path, open))
+
+    # Ucuz ön filtre: JSON'u çözmeden önce satırda sonuç değeri geçiyor mu
+    needles = [f'"outcome":"{outcome}"' for outcome in outcomes] if outcomes else None
+
+    for source, opener in sources:
+        with opener(source, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if needles and not any(needle in line for needle in needles):
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                started = record.get('started_at', 0)
+                if since is not None and started < since:
+                    continue
+                if until is not None and started > until:
+                    # Kayıtlar zamana göre sıralı: bu dosyada daha fazla eşleşme yok
+                    break
+                yield record
+
+def _parse_time(value):
+    """'YYYY-MM-DD', 'YYYY-MM-DD HH:MM' veya göreli süre ('7d', '12h', '30m')"""
+    units = {'d': 86400, 'h': 3600, 'm': 60}
+    if value[-1:] in units and value[:-1].isdigit():
+        return time.time() - int(value[:-1]) * units[value[-1]]
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"Geçersiz tarih: {value}")
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='shell_auto_checker.py log', description="Çalıştırma günlüğünü sorgula")
+    parser.add_argument('--since', type=_parse_time, help="Başlangıç (örn. 2025-11-01 veya 7d)")
+    parser.add_argument('--until', type=_parse_time, help="Bitiş (örn. '2025-11-15 18:00')")
+    parser.add_argument('--outcome', help="Virgülle ayrılmış sonuçlar (ok, network, token, captcha, rejected, error)")
+    parser.add_argument('--json', action='store_true', help="Kayıtları ham JSON satırları olarak yazdır")
+    parser.add_argument('--file', default=None, help=f"Günlük dosyası (varsayılan: {RUN_LOG_FILE})")
+    args = parser.parse_args(argv)
+
+    outcomes = [item.strip() for item in args.outcome.split(',')] if args.outcome else None
+    durations = []
+    counts = {}
+
+    for record in iter_records(args.since, args.until, outcomes, args.file):
+        durations.append(record.get('duration', 0.0))
+        counts[record.get('outcome')] = counts.get(record.get('outcome'), 0) + 1
+
+        if args.json:
+            print(json.dumps(record, ensure_ascii=False))
+            continue
+
+        balance = record.get('balance')
+        delta = record.get('balance_delta')
+        balance_text = f"{balance:>12,.2f}" if balance is not None else f"{'-':>12}"
+        delta_text = f"{delta:>+10,.2f}" if delta is not None else f"{'-':>10}"
+        print(f"{record.get('ts')}  {record.get('run_id')}  {record.get('outcome'):<9} "
+              f"{record.get('duration', 0):>7.2f} sn  {balance_text}  {delta_text}")
+
+    if args.json:
+        return 0
+
+    if not durations:
+        print("ℹ️  Eşleşen kayıt bulunamadı")
+        return 0
+
+    durations.sort()
+    summary = ', '.join(f"{outcome}: {count}" for outcome, count in sorted(counts.items()))
+    print("-" * 72)
+    print(f"📊 {len(durations)} kayıt ({summary})")
+    print(f"⏱️  Süre: ortalama {sum(durations) / len(durations):.2f} sn, "
+          f"p50 {_percentile(durations, 0.5):.2f} sn, p95 {_percentile(durations, 0.95):.2f} sn, "
+          f"en uzun {durations[-1]:.2f} sn")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,36 +5,48 @@ Bu script Shell Türkiye kart bakiyesini otomatik olarak kontrol eder
 OCR ile CAPTCHA'yı otomatik çözer (%90+ başarı oranı)
 
 Kullanım: python3 shell_auto_checker.py [kart_numarası]
+         python3 shell_auto_checker.py --daemon [--interval SANİYE | --adaptive]
 """
 
-import requests
-from bs4 import BeautifulSoup
 import time
 import sys
+import signal
+import argparse
+import threading
+import concurrent.futures
 import re
 import json
+import io
 import os
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import importlib.util
 from datetime import datetime
 
-# .env dosyası desteği
-try:
-    from dotenv import load_dotenv
-    load_dotenv()  # .env dosyasını yükle
-except ImportError:
-    print("⚠️  python-dotenv paketi bulunamadı!")
-    print("   Kurulum için: pip install python-dotenv")
-    print("   .env dosyası yüklenemedi, environment variable'lar kullanılacak")
-
-# OCR için gerekli kütüphaneler
-try:
-    import pytesseract
-    from PIL import Image, ImageEnhance, ImageFilter
-    OCR_AVAILABLE = True
-except ImportError:
-    OCR_AVAILABLE = False
+import config
+
+# .env, ayarlarını import anında okuyan modüllerden (BALANCE_DB, RUN_LOG_FILE) önce yüklenir
+config.preload()
+
+import balance_history
+import clients
+import debug_store
+import html_extract
+import notification_digest
+import notification_outbox
+import notifiers
+import profiling
+import run_log
+import status_server
+import tracing
+
+# Not: requests, bs4, smtplib/email, pytesseract ve PIL gibi ağır bağımlılıklar
+# modül seviyesinde değil, ihtiyaç duyulan fonksiyonun içinde import edilir.
+# Böylece soğuk başlangıç hızlı kalır (örn. EMAIL_ENABLED=false iken SMTP yüklenmez).
+# Başlangıç süresi bütçesi için: python3 check_startup.py
+
+# OCR için gerekli kütüphaneler (sadece varlık kontrolü, import solve_captcha_ocr içinde)
+OCR_AVAILABLE = (importlib.util.find_spec('pytesseract') is not None
+                 and importlib.util.find_spec('PIL') is not None)
+if not OCR_AVAILABLE:
     # Sadece ilk çalıştırmada göster (tekrar tekrar göstermemek için)
     if not hasattr(sys, '_ocr_warning_shown'):
         print("⚠️  OCR kütüphaneleri bulunamadı!")
@@ -46,148 +58,230 @@ except ImportError:
         sys._ocr_warning_shown = True
 
 # ============================================================================
-# BİLDİRİM AYARLARI
+# AYARLAR
 # ============================================================================
-# Telegram bildirim ayarları
-TELEGRAM_ENABLED = os.getenv('TELEGRAM_ENABLED', 'false').lower() == 'true'
-TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN', '')  # Örnek: '123456789:ABCdefGHIjklMNOpqrsTUVwxyz'
-TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID', '')  # Örnek: '123456789'
-
-# Email bildirim ayarları
-EMAIL_ENABLED = os.getenv('EMAIL_ENABLED', 'false').lower() == 'true'
-EMAIL_SMTP_SERVER = os.getenv('EMAIL_SMTP_SERVER', 'smtp.gmail.com')
-EMAIL_SMTP_PORT = int(os.getenv('EMAIL_SMTP_PORT', '587'))
-EMAIL_FROM = os.getenv('EMAIL_FROM', '')  # Örnek: 'your-email@gmail.com'
-EMAIL_TO = os.getenv('EMAIL_TO', '')  # Örnek: 'recipient@example.com'
-EMAIL_PASSWORD = os.getenv('EMAIL_PASSWORD', '')  # Gmail için App Password gerekli
-
-# WhatsApp bildirim ayarları (Twilio WhatsApp API)
-WHATSAPP_ENABLED = os.getenv('WHATSAPP_ENABLED', 'false').lower() == 'true'
-WHATSAPP_TWILIO_ACCOUNT_SID = os.getenv('WHATSAPP_TWILIO_ACCOUNT_SID', '')
-WHATSAPP_TWILIO_AUTH_TOKEN = os.getenv('WHATSAPP_TWILIO_AUTH_TOKEN', '')
-WHATSAPP_TWILIO_FROM = os.getenv('WHATSAPP_TWILIO_FROM', '')  # Twilio WhatsApp numarası (whatsapp:+14155238886 formatında)
-WHATSAPP_TO = os.getenv('WHATSAPP_TO', '')  # Alıcı numara (whatsapp:+905551234567 formatında)
-
-# Kart numarası
-CARD_NUMBER = os.getenv('CARD_NUMBER', '')  # Shell kart numarası
-
-def send_telegram_notification(message):
-    """Telegram bildirimi gönder"""
-    if not TELEGRAM_ENABLED:
-        return False
-    
-    if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
-        return False
-    
+# Tüm ayarlar config.py'de doğrulanır ve config.current() ile okunur
+# (CARD_NUMBER, SHELL_*, CAPTCHA_CODE, NOTIFY_*, RETRY_*, DAEMON_*).
+# Bildirim kanallarının ayarları (TELEGRAM_*, EMAIL_*, WHATSAPP_*) notifiers.py içinde okunur.
+
+# Daemon modunda .env değişikliklerinin kontrol edilme sıklığı (saniye)
+CONFIG_POLL_INTERVAL = 5
+
+# run_check_async() adımlarını çalıştıran thread havuzu (ilk kontrolde oluşturulur)
+_PIPELINE_EXECUTOR = None
+
+# libc malloc_trim (düşük bellek modunda ilk kullanımda aranır; bulunamazsa False)
+_MALLOC_TRIM = None
+
+class CheckError(Exception):
+    """Bakiye kontrolü başarısız oldu (yeniden denenmez)"""
+    kind = 'error'
+    retryable = False
+
+class NetworkError(CheckError):
+    """Shell sitesine bağlanılamadı veya istek zaman aşımına uğradı"""
+    kind = 'network'
+    retryable = True
+
+class TokenMissingError(CheckError):
+    """Sayfada DNTCaptcha token'ları veya CAPTCHA görseli bulunamadı"""
+    kind = 'token'
+    retryable = True
+
+class CaptchaUnsolvedError(CheckError):
+    """CAPTCHA otomatik çözülemedi ve manuel giriş yapılamıyor"""
+    kind = 'captcha'
+    retryable = True
+
+class InquiryRejectedError(CheckError):
+    """Sorgu reddedildi (genelde yanlış CAPTCHA) veya geçersiz yanıt alındı"""
+    kind = 'rejected'
+    retryable = True
+
+def _deliver_outbox_message(message, timeout, parent_span=None):
+    """Kuyruktaki tek bir mesajı gönder ve sonucu kuyruğa işle"""
+    channel = message['channel']
+    with tracing.span(f'notify.{channel}', parent=parent_span, attempts=message['attempts']) as span:
+        sent = _send_outbox_message(message, timeout)
+        span.set_attribute('sent', sent)
+    return sent
+
+def _send_outbox_message(message, timeout):
     try:
-        url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-        data = {
-            'chat_id': TELEGRAM_CHAT_ID,
-            'text': message,
-            'parse_mode': 'HTML'
-        }
-        response = requests.post(url, data=data, timeout=10)
-        return response.status_code == 200
+        sent = notifiers.get(message['channel']).send(message, timeout)
+    except KeyError:
+        sent = False  # Kanal artık tanımlı değil (eklenti kaldırılmış)
     except Exception as e:
-        print(f"⚠️  Telegram bildirim hatası: {e}")
-        return False
+        notification_outbox.mark_failed(message['id'], e)
+        raise
+    
+    # Zaman aşımından sonra biten gönderim de burada doğru şekilde işaretlenir
+    if sent:
+        notification_outbox.mark_sent(message['id'])
+    else:
+        notification_outbox.mark_failed(message['id'], 'gönderilemedi')
+    return sent
 
-def send_email_notification(subject, message):
-    """Email bildirimi gönder"""
-    if not EMAIL_ENABLED or not EMAIL_FROM or not EMAIL_TO or not EMAIL_PASSWORD:
-        return False
+def deliver_outbox(channel_timeout=None, total_timeout=None, created_before=None, include_ids=()):
+    """
+    Kuyrukta zamanı gelmiş mesajları aktif kanallara aynı anda gönder
+    Yavaş bir kanal (örn. SMTP) diğerlerini bekletmez.
+    created_before/include_ids: bkz. notification_outbox.claim_due
     
+    Dönüş: {mesaj_id: durum} - durum: 'sent', 'failed', 'timeout'
+    """
+    settings = config.current()
+    channel_timeout = settings.notify_channel_timeout if channel_timeout is None else channel_timeout
+    total_timeout = settings.notify_total_timeout if total_timeout is None else total_timeout
+    messages = notification_outbox.claim_due(
+        notifiers.active_channels(), lease_seconds=channel_timeout + total_timeout,
+        created_before=created_before, include_ids=include_ids
+    )
+    results = {}
+    
+    if not messages:
+        return results
+    
+    # Kanallar aynı anda başladığı için kanal süresi ile toplam süre aynı saatten sayılır
+    wait_timeout = min(channel_timeout, total_timeout)
+    parent_span = tracing.current_span()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=min(len(messages), 4), thread_name_prefix='notify')
     try:
-        msg = MIMEMultipart()
-        msg['From'] = EMAIL_FROM
-        msg['To'] = EMAIL_TO
-        msg['Subject'] = subject
-        
-        msg.attach(MIMEText(message, 'html', 'utf-8'))
-        
-        server = smtplib.SMTP(EMAIL_SMTP_SERVER, EMAIL_SMTP_PORT)
-        server.starttls()
-        server.login(EMAIL_FROM, EMAIL_PASSWORD)
-        server.send_message(msg)
-        server.quit()
+        futures = {
+            executor.submit(profiling.call, _deliver_outbox_message, message, channel_timeout, parent_span): message
+            for message in messages
+        }
+        done, _ = concurrent.futures.wait(futures, timeout=wait_timeout)
         
-        return True
-    except Exception as e:
-        print(f"⚠️  Email bildirim hatası: {e}")
-        return False
+        for future, message in futures.items():
+            if future not in done:
+                results[message['id']] = 'timeout'
+                continue
+            try:
+                results[message['id']] = 'sent' if future.result() else 'failed'
+            except Exception as e:
+                print(f"⚠️  {message['channel']} bildirim hatası: {e}")
+                results[message['id']] = 'failed'
+    finally:
+        # Zaman aşımına uğrayan gönderimleri bekleme; soket timeout'u ile kendiliğinden biterler
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    return results
 
-def send_whatsapp_notification(message):
-    """WhatsApp bildirimi gönder (Twilio)"""
-    if not WHATSAPP_ENABLED:
-        return False
+def dispatch_notifications(snapshot, idempotency_key, created_before=None):
+    """
+    Bildirimleri kalıcı kuyruğa yaz ve aktif tüm kanallara aynı anda gönder
+    Mesajlar sadece aktif kanallar için, aynı bakiye anlık görüntüsünden üretilir.
+    Gönderilemeyen mesajlar kuyrukta kalır ve sonraki çalıştırmada tekrar denenir.
+    created_before: verilirse kuyruktaki eski mesajlardan sadece bu zamandan önce eklenenler denenir
     
-    if not WHATSAPP_TWILIO_ACCOUNT_SID or not WHATSAPP_TWILIO_AUTH_TOKEN or not WHATSAPP_TWILIO_FROM or not WHATSAPP_TO:
-        return False
+    Dönüş: {kanal: durum} - durum: 'sent', 'failed', 'timeout', 'disabled', 'incomplete'
+    """
+    results = {}
+    message_ids = {}
+    
+    for channel in notifiers.channel_names():
+        notifier = notifiers.get(channel)
+        state = notifier.state()
+        if state != 'active':
+            results[channel] = state
+            continue
+        
+        rendered = notifier.render(snapshot)
+        message_ids[channel] = notification_outbox.enqueue(
+            channel, rendered['body'], f"{idempotency_key}:{channel}", subject=rendered.get('subject')
+        )
     
-    # HTML tag'lerini temizle (WhatsApp HTML desteklemez)
-    import re
-    clean_message = re.sub(r'<[^>]+>', '', message)
-    clean_message = clean_message.replace('&nbsp;', ' ')
-    clean_message = clean_message.strip()
+    delivery = deliver_outbox(created_before=created_before, include_ids=message_ids.values())
     
+    for channel, message_id in message_ids.items():
+        if message_id in delivery:
+            results[channel] = delivery[message_id]
+        else:
+            # Daha önce gönderilmiş (aynı idempotency anahtarı) veya başka bir süreç tarafından sahiplenilmiş
+            results[channel] = 'sent' if notification_outbox.get_status(message_id) == 'sent' else 'failed'
+    
+    retried = len(delivery) - len([mid for mid in message_ids.values() if mid in delivery])
+    if retried:
+        print(f"📤 Kuyruktaki {retried} eski bildirim de tekrar denendi")
+    
+    return results
+
+def retry_pending_notifications(created_before=None):
+    """
+    Önceki çalıştırmalardan kalan bildirimleri bakiye sorgulamadan gönder
+    created_before: sorgu ile aynı anda çalışırken kontrol başladıktan sonra eklenen
+    mesajlar atlanır; onları kontrolün kendi gönderimi sahiplenir.
+    """
     try:
-        # Twilio kütüphanesi gerekli: pip install twilio
-        try:
-            from twilio.rest import Client
-        except ImportError:
-            print("⚠️  Twilio kütüphanesi bulunamadı! Kurulum: pip install twilio")
-            return False
+        if not notification_outbox.pending_count():
+            return
         
-        client = Client(WHATSAPP_TWILIO_ACCOUNT_SID, WHATSAPP_TWILIO_AUTH_TOKEN)
+        dropped = notification_outbox.drop_inactive(notifiers.active_channels())
+        if dropped:
+            print(f"\n🗑️  Aktif olmayan kanallara ait {dropped} bildirim kuyruktan çıkarıldı")
+            if not notification_outbox.pending_count():
+                return
         
-        message_obj = client.messages.create(
-            from_=WHATSAPP_TWILIO_FROM,
-            body=clean_message,
-            to=WHATSAPP_TO
-        )
-        
-        return message_obj.sid is not None
+        print("\n📤 Bekleyen bildirimler gönderiliyor...")
+        delivery = deliver_outbox(created_before=created_before)
+        sent = sum(1 for status in delivery.values() if status == 'sent')
+        remaining = notification_outbox.pending_count()
+        print(f"📤 {sent}/{len(delivery)} bildirim gönderildi, kuyrukta {remaining} bekleyen var")
+        notification_outbox.purge()
     except Exception as e:
-        print(f"⚠️  WhatsApp bildirim hatası: {e}")
-        return False
+        print(f"⚠️  Bildirim kuyruğu işlenemedi: {e}")
 
-def get_last_balance(card_number):
-    """Son bakiyeyi dosyadan oku"""
-    balance_file = f"balance_{card_number}.json"
-    
-    if not os.path.exists(balance_file):
+def flush_digests(now=None, created_before=None):
+    """
+    Süresi dolan bildirim özetlerini gönder (NOTIFY_DIGEST_MINUTES)
+    Özet kapatıldıysa bekleyen değişiklikler de hemen gönderilir.
+    created_before: bkz. retry_pending_notifications
+    Dönüş: bir sonraki özetin gönderileceği zaman (bekleyen yoksa None)
+    """
+    window = config.current().notify_digest_minutes
+    try:
+        for card_number, window_start in notification_digest.due_windows(window, now):
+            built = notification_digest.build_snapshot(card_number, window_start)
+            if built is None:
+                continue
+            snapshot, idempotency_key, last_id = built
+            
+            print(f"\n📨 Bildirim özeti gönderiliyor ({len(snapshot['digest']['changes'])} değişiklik)...")
+            notify_results = dispatch_notifications(snapshot, idempotency_key, created_before)
+            # Mesajlar kuyruğa yazıldı; gönderilemeyenler outbox'tan tekrar denenir
+            notification_digest.clear(card_number, window_start, last_id)
+            
+            for channel, status in notify_results.items():
+                print(notifiers.status_line(channel, status))
+        return notification_digest.next_due(window)
+    except Exception as e:
+        print(f"⚠️  Bildirim özeti gönderilemedi: {e}")
         return None
-    
+
+def get_last_balance(card_number):
+    """Son bakiyeyi geçmiş deposundan oku"""
     try:
-        with open(balance_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data.get('balance')
-    except Exception:
+        reading = balance_history.last_reading(card_number)
+        return reading['balance'] if reading else None
+    except Exception as e:
+        print(f"⚠️  Son bakiye okunamadı: {e}")
         return None
 
 def save_balance(card_number, balance, card_type, status):
-    """Bakiyeyi dosyaya kaydet"""
-    balance_file = f"balance_{card_number}.json"
-    
-    data = {
-        'card_number': card_number,
-        'balance': balance,
-        'card_type': card_type,
-        'status': status,
-        'last_check': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        'timestamp': time.time()
-    }
-    
+    """Bakiyeyi geçmiş deposuna ekle (önceki kayıtlar korunur)"""
     try:
-        with open(balance_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        balance_history.append_reading(card_number, balance, card_type, status)
         return True
     except Exception as e:
         print(f"⚠️  Bakiye kaydedilemedi: {e}")
         return False
 
 def format_balance_result(card_number, result_data):
-    """Bakiye sonuçlarını formatla ve göster"""
+    """
+    Bakiye sonuçlarını göster ve anlık görüntü (snapshot) olarak döndür
+    Kanal mesajları bu görüntüden sadece aktif kanallar için üretilir (bkz. notifiers.py).
+    """
     if not result_data or not isinstance(result_data, dict):
         return None
     
@@ -196,6 +290,7 @@ def format_balance_result(card_number, result_data):
     card_type = result_data.get('cardTypeName', 'Bilinmiyor')
     balance = result_data.get('balanceAmount', 0)
     status = result_data.get('cardStatusName', 'Bilinmiyor')
+    checked_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     
     # Ekranda göster
     print("\n" + "=" * 60)
@@ -206,68 +301,9 @@ def format_balance_result(card_number, result_data):
     print(f"💰 Bakiye: {balance:,.2f} TL")
     print(f"✅ Durum: {status}")
     print(f"📝 Mesaj: {message}")
-    print(f"⏰ Tarih: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"⏰ Tarih: {checked_at}")
     print("=" * 60)
     
-    # HTML formatı (bildirimler için)
-    html_message = f"""
-    <html>
-    <body style="font-family: Arial, sans-serif;">
-        <h2>🚗 Shell Kart Bakiye Sorgulama Sonucu</h2>
-        <table style="border-collapse: collapse; width: 100%;">
-            <tr>
-                <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold;">Kart Numarası:</td>
-                <td style="padding: 8px; border: 1px solid #ddd;">{card_number}</td>
-            </tr>
-            <tr>
-                <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold;">Kart Tipi:</td>
-                <td style="padding: 8px; border: 1px solid #ddd;">{card_type}</td>
-            </tr>
-            <tr>
-                <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold;">Bakiye:</td>
-                <td style="padding: 8px; border: 1px solid #ddd; font-size: 18px; color: #28a745; font-weight: bold;">{balance:,.2f} TL</td>
-            </tr>
-            <tr>
-                <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold;">Durum:</td>
-                <td style="padding: 8px; border: 1px solid #ddd;">{status}</td>
-            </tr>
-            <tr>
-                <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold;">Mesaj:</td>
-                <td style="padding: 8px; border: 1px solid #ddd;">{message}</td>
-            </tr>
-            <tr>
-                <td style="padding: 8px; border: 1px solid #ddd; font-weight: bold;">Tarih:</td>
-                <td style="padding: 8px; border: 1px solid #ddd;">{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</td>
-            </tr>
-        </table>
-    </body>
-    </html>
-    """
-    
-    # Telegram formatı
-    telegram_message = f"""
-🚗 <b>Shell Kart Bakiye Sorgulama</b>
-
-💳 Kart: <code>{card_number}</code>
-📋 Tip: {card_type}
-💰 Bakiye: <b>{balance:,.2f} TL</b>
-✅ Durum: {status}
-📝 {message}
-
-⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-    """
-    
-    # WhatsApp formatı (HTML tag'leri olmadan)
-    whatsapp_message = f"""🚗 Shell Kart Bakiye Sorgulama
-
-💳 Kart: {card_number}
-📋 Tip: {card_type}
-💰 Bakiye: {balance:,.2f} TL
-✅ Durum: {status}
-📝 {message}
-
-⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"""
-    
     return {
         'success': success,
         'card_number': card_number,
@@ -275,15 +311,14 @@ def format_balance_result(card_number, result_data):
         'balance': balance,
         'status': status,
         'message': message,
-        'html': html_message,
-        'telegram': telegram_message,
-        'whatsapp': whatsapp_message
+        'checked_at': checked_at,
     }
 
-def solve_captcha_ocr(captcha_file):
+def solve_captcha_ocr(captcha_image):
     """
     CAPTCHA'yı OCR ile otomatik çöz
     4 farklı yöntem dener ve en iyi sonucu döndürür
+    captcha_image: görsel byte'larını içeren BytesIO (veya dosya yolu)
     """
     if not OCR_AVAILABLE:
         return None
@@ -291,99 +326,213 @@ def solve_captcha_ocr(captcha_file):
     print("\n🤖 CAPTCHA otomatik çözülüyor (OCR)...")
     
     try:
-        # Görseli yükle
-        img = Image.open(captcha_file)
-        
-        results = []
-        
-        # Yöntem 1: Orijinal görsel (basit)
-        print("   📝 Yöntem 1: Orijinal görsel...")
-        try:
-            text1 = pytesseract.image_to_string(img, config='--psm 7 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ')
-            text1 = re.sub(r'[^0-9A-Z]', '', text1.upper().strip())
-            if text1 and len(text1) >= 4:
-                results.append(('Orijinal', text1))
-                print(f"      ✅ Bulundu: {text1}")
-        except Exception as e:
-            print(f"      ❌ Hata: {e}")
+        import pytesseract
+        from PIL import Image, ImageEnhance, ImageFilter
         
-        # Yöntem 2: Grayscale + Kontrast artırma
-        print("   📝 Yöntem 2: Grayscale + Kontrast...")
-        try:
-            gray = img.convert('L')
-            enhancer = ImageEnhance.Contrast(gray)
-            enhanced = enhancer.enhance(2.0)
-            text2 = pytesseract.image_to_string(enhanced, config='--psm 7 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ')
-            text2 = re.sub(r'[^0-9A-Z]', '', text2.upper().strip())
-            if text2 and len(text2) >= 4:
-                results.append(('Grayscale+Kontrast', text2))
-                print(f"      ✅ Bulundu: {text2}")
-        except Exception as e:
-            print(f"      ❌ Hata: {e}")
-        
-        # Yöntem 3: Binary threshold (siyah-beyaz)
-        print("   📝 Yöntem 3: Binary threshold...")
-        try:
-            gray = img.convert('L')
-            # Threshold değerini ayarla
-            threshold = 128
-            binary = gray.point(lambda p: p > threshold and 255)
-            text3 = pytesseract.image_to_string(binary, config='--psm 7 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ')
-            text3 = re.sub(r'[^0-9A-Z]', '', text3.upper().strip())
-            if text3 and len(text3) >= 4:
-                results.append(('Binary', text3))
-                print(f"      ✅ Bulundu: {text3}")
-        except Exception as e:
-            print(f"      ❌ Hata: {e}")
-        
-        # Yöntem 4: Noise reduction + resize
-        print("   📝 Yöntem 4: Noise reduction + Resize...")
-        try:
-            # Görseli büyüt (OCR için daha iyi)
-            large = img.resize((img.width * 3, img.height * 3), Image.LANCZOS)
-            gray = large.convert('L')
-            # Noise reduction
-            denoised = gray.filter(ImageFilter.MedianFilter(size=3))
-            enhancer = ImageEnhance.Contrast(denoised)
-            enhanced = enhancer.enhance(2.5)
-            text4 = pytesseract.image_to_string(enhanced, config='--psm 7 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ')
-            text4 = re.sub(r'[^0-9A-Z]', '', text4.upper().strip())
-            if text4 and len(text4) >= 4:
-                results.append(('NoiseReduction+Resize', text4))
-                print(f"      ✅ Bulundu: {text4}")
-        except Exception as e:
-            print(f"      ❌ Hata: {e}")
-        
-        # En iyi sonucu seç (en uzun ve geçerli olan)
-        if results:
-            # Sonuçları uzunluk ve geçerliliğe göre sırala
-            valid_results = []
-            for method, text in results:
-                # 4-8 karakter arası olmalı (genelde CAPTCHA'lar bu uzunlukta)
-                if 4 <= len(text) <= 8:
-                    valid_results.append((method, text, len(text)))
+        # Görseli yükle (bir yöntem hata verse de görsel kapatılır)
+        with Image.open(captcha_image) as img:
+            results = []
             
-            if valid_results:
-                # En uzun ve geçerli olanı seç
-                best = max(valid_results, key=lambda x: x[2])
-                print(f"\n✅ En iyi sonuç ({best[0]}): {best[1]}")
-                return best[1]
-            else:
-                # Geçerli sonuç yoksa ilkini dene
-                print(f"\n⚠️  Geçerli sonuç bulunamadı, ilk sonuç deneniyor: {results[0][1]}")
-                return results[0][1]
-        else:
-            print("\n❌ Hiçbir yöntemle CAPTCHA çözülemedi")
-            return None
+            # Yöntem 1: Orijinal görsel (basit)
+            print("   📝 Yöntem 1: Orijinal görsel...")
+            with tracing.span('ocr.original'):
+                try:
+                    text1 = pytesseract.image_to_string(img, config='--psm 7 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+                    text1 = re.sub(r'[^0-9A-Z]', '', text1.upper().strip())
+                    if text1 and len(text1) >= 4:
+                        results.append(('Orijinal', text1))
+                        print(f"      ✅ Bulundu: {text1}")
+                except Exception as e:
+                    print(f"      ❌ Hata: {e}")
+            
+            # Yöntem 2: Grayscale + Kontrast artırma
+            print("   📝 Yöntem 2: Grayscale + Kontrast...")
+            with tracing.span('ocr.grayscale_contrast'):
+                try:
+                    gray = img.convert('L')
+                    enhancer = ImageEnhance.Contrast(gray)
+                    enhanced = enhancer.enhance(2.0)
+                    text2 = pytesseract.image_to_string(enhanced, config='--psm 7 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+                    text2 = re.sub(r'[^0-9A-Z]', '', text2.upper().strip())
+                    if text2 and len(text2) >= 4:
+                        results.append(('Grayscale+Kontrast', text2))
+                        print(f"      ✅ Bulundu: {text2}")
+                except Exception as e:
+                    print(f"      ❌ Hata: {e}")
+            
+            # Yöntem 3: Binary threshold (siyah-beyaz)
+            print("   📝 Yöntem 3: Binary threshold...")
+            with tracing.span('ocr.binary'):
+                try:
+                    gray = img.convert('L')
+                    # Threshold değerini ayarla
+                    threshold = 128
+                    binary = gray.point(lambda p: p > threshold and 255)
+                    text3 = pytesseract.image_to_string(binary, config='--psm 7 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+                    text3 = re.sub(r'[^0-9A-Z]', '', text3.upper().strip())
+                    if text3 and len(text3) >= 4:
+                        results.append(('Binary', text3))
+                        print(f"      ✅ Bulundu: {text3}")
+                except Exception as e:
+                    print(f"      ❌ Hata: {e}")
+            
+            # Yöntem 4: Noise reduction + resize
+            print("   📝 Yöntem 4: Noise reduction + Resize...")
+            with tracing.span('ocr.denoise_resize'):
+                try:
+                    # Görseli büyüt (OCR için daha iyi)
+                    large = img.resize((img.width * 3, img.height * 3), Image.LANCZOS)
+                    gray = large.convert('L')
+                    # Noise reduction
+                    denoised = gray.filter(ImageFilter.MedianFilter(size=3))
+                    enhancer = ImageEnhance.Contrast(denoised)
+                    enhanced = enhancer.enhance(2.5)
+                    text4 = pytesseract.image_to_string(enhanced, config='--psm 7 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+                    text4 = re.sub(r'[^0-9A-Z]', '', text4.upper().strip())
+                    if text4 and len(text4) >= 4:
+                        results.append(('NoiseReduction+Resize', text4))
+                        print(f"      ✅ Bulundu: {text4}")
+                except Exception as e:
+                    print(f"      ❌ Hata: {e}")
             
+            # En iyi sonucu seç (en uzun ve geçerli olan)
+            if results:
+                # Sonuçları uzunluk ve geçerliliğe göre sırala
+                valid_results = []
+                for method, text in results:
+                    # 4-8 karakter arası olmalı (genelde CAPTCHA'lar bu uzunlukta)
+                    if 4 <= len(text) <= 8:
+                        valid_results.append((method, text, len(text)))
+                
+                if valid_results:
+                    # En uzun ve geçerli olanı seç
+                    best = max(valid_results, key=lambda x: x[2])
+                    print(f"\n✅ En iyi sonuç ({best[0]}): {best[1]}")
+                    return best[1]
+                else:
+                    # Geçerli sonuç yoksa ilkini dene
+                    print(f"\n⚠️  Geçerli sonuç bulunamadı, ilk sonuç deneniyor: {results[0][1]}")
+                    return results[0][1]
+            else:
+                print("\n❌ Hiçbir yöntemle CAPTCHA çözülemedi")
+                return None
+                
     except Exception as e:
         print(f"\n❌ OCR hatası: {e}")
         return None
 
-def get_page_and_captcha():
-    """Sayfayı yükle, token'ları al ve CAPTCHA'yı göster"""
+def read_body(response):
+    """
+    stream=True ile açılmış yanıtın gövdesini parçalar halinde oku
+    SHELL_MAX_RESPONSE_KB aşılırsa okuma kesilir ve NetworkError fırlatılır;
+    beklenmedik büyüklükteki bir sayfa belleğe tamamen alınmaz.
+    """
+    max_bytes = config.current().shell_max_response_kb * 1024
+    length = response.headers.get('Content-Length', '')
+    if length.isdigit() and int(length) > max_bytes:
+        response.close()
+        raise NetworkError(f"Yanıt çok büyük ({int(length) // 1024} KB > {max_bytes // 1024} KB)")
     
-    session = requests.Session()
+    chunks = []
+    size = 0
+    for chunk in response.iter_content(chunk_size=16 * 1024):
+        size += len(chunk)
+        if size > max_bytes:
+            response.close()
+            raise NetworkError(f"Yanıt çok büyük (> {max_bytes // 1024} KB)")
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+def body_text(response, body):
+    """Gövdeyi yanıtın karakter kümesiyle çöz (response.text ile aynı, ikinci kopya tutulmaz)"""
+    return body.decode(response.encoding or 'utf-8', errors='replace')
+
+def peak_rss_mb():
+    """Sürecin şimdiye kadarki en yüksek RSS'i (MB; ölçülemiyorsa None)"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    
+    # Linux'ta KB, macOS'ta byte
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor
+
+def _malloc_trim():
+    """glibc'de boşalan heap sayfalarını işletim sistemine geri ver (diğer sistemlerde no-op)"""
+    global _MALLOC_TRIM
+    if _MALLOC_TRIM is None:
+        try:
+            import ctypes
+            _MALLOC_TRIM = ctypes.CDLL('libc.so.6').malloc_trim
+        except (OSError, AttributeError):
+            _MALLOC_TRIM = False
+    if _MALLOC_TRIM:
+        _MALLOC_TRIM(0)
+
+def release_memory():
+    """
+    Düşük bellek modunda (LOW_MEMORY=true) faz sonunda serbest kalan belleği bırak
+    Parse ağaçları ve görsel tamponları faz bitince referanssız kalır; burada döngüsel
+    referanslar toplanır ve boş heap sayfaları işletim sistemine geri verilir.
+    """
+    if not config.current().low_memory:
+        return
+    
+    import gc
+    
+    gc.collect()
+    _malloc_trim()
+
+def save_debug_html(kind, response, text):
+    """Beklenmeyen sayfayı sıkıştırılmış debug deposuna kaydet (aynı sayfa bir kez saklanır)"""
+    try:
+        path, is_new = debug_store.save(kind, text, {
+            'url': response.url,
+            'status_code': response.status_code,
+            'content_type': response.headers.get('Content-Type', ''),
+        })
+        if is_new:
+            print(f"🐛 HTML kaydedildi: {path}")
+        else:
+            print(f"🐛 Aynı HTML daha önce kaydedilmiş: {path}")
+    except Exception as e:
+        print(f"⚠️  Debug HTML kaydedilemedi: {e}")
+
+def new_shell_session():
+    """
+    Shell sitesi için paylaşılan keep-alive HTTP oturumu
+    Daemon modunda kontroller arasında aynı bağlantı havuzu kullanılır (DNS/TCP/TLS tekrarlanmaz).
+    Süreçteki ilk kullanımda kaydedilmiş çerezler SHELL_COOKIE_FILE'dan yüklenir.
+    """
+    from urllib.parse import urlsplit
+    
+    settings = config.current()
+    session = clients.get_http_session(urlsplit(settings.shell_base_url).netloc)
+    if settings.shell_cookie_file and not getattr(session, 'cookies_loaded', False):
+        session.cookies_loaded = True
+        loaded = clients.load_cookies(session, settings.shell_cookie_file, settings.shell_session_cookie_ttl)
+        if loaded:
+            print(f"🍪 {loaded} kayıtlı çerez yüklendi")
+    else:
+        session.cookies.clear_expired_cookies()
+    return session
+
+def save_shell_cookies(session):
+    """Başarılı kontrolden sonra çerezleri sonraki çalıştırma için sakla"""
+    cookie_file = config.current().shell_cookie_file
+    if not cookie_file:
+        return
+    try:
+        clients.save_cookies(session, cookie_file)
+    except OSError as e:
+        print(f"⚠️  Çerezler kaydedilemedi: {e}")
+
+def get_page_and_captcha(session=None):
+    """Sayfayı yükle, token'ları al ve CAPTCHA'yı göster"""
+    if session is None:
+        session = new_shell_session()
+    base_url = config.current().shell_base_url
     
     headers = {
         'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/26.1 Safari/605.1.15',
@@ -401,81 +550,77 @@ def get_page_and_captcha():
     # Sayfayı yükle
     print("\n📄 Sayfa yükleniyor...")
     try:
-        response = session.get(
-            'https://sfs.turkiyeshell.com/bakiye-sorgula',
-            headers=headers,
-            timeout=30
-        )
+        with tracing.span('page.get') as span:
+            response = session.get(
+                f'{base_url}/bakiye-sorgula',
+                headers=headers,
+                timeout=30,
+                stream=True
+            )
+            span.set_attribute('http.status_code', response.status_code)
+            body = read_body(response)
+            span.set_attribute('bytes', len(body))
         response.raise_for_status()
         print("✅ Sayfa yüklendi")
         
     except Exception as e:
         print(f"❌ Hata: {e}")
-        return None, None
+        raise NetworkError(f"Sayfa yüklenemedi: {e}") from e
     
-    # HTML'i parse et
-    soup = BeautifulSoup(response.text, 'html.parser')
+    # HTML'i tek geçişte parse et (token'lar ve CAPTCHA görseli birlikte)
+    html = body_text(response, body)
+    del body
+    with profiling.memory('page.parse'), tracing.span('page.parse', backend=html_extract.get_backend()):
+        fields = html_extract.extract_page_fields(html)
     
     # Token'ları bul
-    captcha_token = None
-    captcha_text = None
-    
-    for input_tag in soup.find_all('input'):
-        name = input_tag.get('name', '')
-        if name == 'DNTCaptchaToken':
-            captcha_token = input_tag.get('value')
-            print(f"✅ CAPTCHA Token: {captcha_token[:30]}...")
-        elif name == 'DNTCaptchaText':
-            captcha_text = input_tag.get('value')
-            print(f"✅ CAPTCHA Text: {captcha_text[:30]}...")
+    captcha_token = fields['captcha_token']
+    captcha_text = fields['captcha_text']
+    
+    if captcha_token:
+        print(f"✅ CAPTCHA Token: {captcha_token[:30]}...")
+    if captcha_text:
+        print(f"✅ CAPTCHA Text: {captcha_text[:30]}...")
     
     if not captcha_token or not captcha_text:
         print("❌ Token'lar bulunamadı!")
         # Debug için sayfayı kaydet
-        debug_file = f"debug_shell_page_{int(time.time())}.html"
-        with open(debug_file, 'w', encoding='utf-8') as f:
-            f.write(response.text)
-        print(f"🐛 HTML kaydedildi: {debug_file}")
-        return None, None
-    
-    # CAPTCHA görselini bul ve indir
-    captcha_img_url = None
-    
-    # Tüm img taglerini kontrol et
-    for img in soup.find_all('img'):
-        src = img.get('src', '')
-        alt = img.get('alt', '')
-        
-        if 'captcha' in src.lower() or 'captcha' in alt.lower():
-            captcha_img_url = src
-            break
+        save_debug_html('page', response, html)
+        raise TokenMissingError("Sayfada DNTCaptcha token'ları bulunamadı")
+    
+    # Sayfa metni artık gerekmiyor; CAPTCHA indirilirken bellekte tutulmaz
+    del html
+    
+    # CAPTCHA görselini indir
+    captcha_img_url = fields['captcha_img_url']
+    captcha_image = None
     
     if captcha_img_url:
         # CAPTCHA'yı indir
         if not captcha_img_url.startswith('http'):
-            captcha_img_url = 'https://sfs.turkiyeshell.com' + captcha_img_url
+            captcha_img_url = base_url + captcha_img_url
         
         print(f"\n🖼️  CAPTCHA indiriliyor: {captcha_img_url}")
         
         try:
-            img_response = session.get(captcha_img_url, headers=headers, timeout=30)
+            with profiling.memory('captcha.download'), tracing.span('captcha.download') as span:
+                img_response = session.get(captcha_img_url, headers=headers, timeout=30, stream=True)
+                span.set_attribute('http.status_code', img_response.status_code)
+                image_bytes = read_body(img_response)
+                span.set_attribute('bytes', len(image_bytes))
             img_response.raise_for_status()
             
-            captcha_filename = f"captcha_{int(time.time())}.png"
-            with open(captcha_filename, 'wb') as f:
-                f.write(img_response.content)
-            
-            print(f"✅ CAPTCHA kaydedildi: {captcha_filename}")
-            print(f"\n📁 CAPTCHA'yı açmak için:")
-            print(f"   open {captcha_filename}")
+            # Görsel diske yazılmaz; OCR doğrudan bellekteki byte'ları okur
+            captcha_image = io.BytesIO(image_bytes)
+            print(f"✅ CAPTCHA indirildi ({len(image_bytes)} byte)")
             
         except Exception as e:
             print(f"⚠️  CAPTCHA indirilemedi: {e}")
     else:
         print("\n⚠️  CAPTCHA görseli bulunamadı")
         print("Tüm görsel URL'leri:")
-        for idx, img in enumerate(soup.find_all('img'), 1):
-            print(f"   {idx}. {img.get('src', 'N/A')}")
+        for idx, src in enumerate(fields['img_srcs'], 1):
+            print(f"   {idx}. {src or 'N/A'}")
     
     # Cookie'leri al
     cookies = session.cookies.get_dict()
@@ -485,10 +630,11 @@ def get_page_and_captcha():
         'captcha_text': captcha_text,
         'cookies': cookies,
         'session': session
-    }, captcha_filename if captcha_img_url else None
+    }, captcha_image
 
 def check_balance(card_number, captcha_input, tokens):
     """Bakiye sorgula"""
+    base_url = config.current().shell_base_url
     
     print("\n" + "=" * 60)
     print(f"💳 Kart Sorgulanıyor: {card_number}")
@@ -514,21 +660,25 @@ def check_balance(card_number, captcha_input, tokens):
         'Cache-Control': 'no-cache',
         'Sec-Fetch-Mode': 'cors',
         'Accept-Encoding': 'gzip, deflate, br',
-        'Origin': 'https://sfs.turkiyeshell.com',
+        'Origin': base_url,
         'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/26.1 Safari/605.1.15',
         'Sec-Fetch-Dest': 'empty',
         'X-Requested-With': 'XMLHttpRequest',
         'Priority': 'u=3, i',
-        'Referer': 'https://sfs.turkiyeshell.com/bakiye-sorgula',
+        'Referer': f'{base_url}/bakiye-sorgula',
     }
     
     try:
-        response = tokens['session'].post(
-            'https://sfs.turkiyeshell.com/account/balanceinquiry',
-            data=data,
-            headers=headers,
-            timeout=30
-        )
+        with tracing.span('inquiry.post') as span:
+            response = tokens['session'].post(
+                f'{base_url}/account/balanceinquiry',
+                data=data,
+                headers=headers,
+                timeout=30,
+                stream=True
+            )
+            span.set_attribute('http.status_code', response.status_code)
+            body = read_body(response)
         
         print(f"\n📡 Response Status: {response.status_code}")
         print(f"📡 Response Headers: {dict(list(response.headers.items())[:5])}")
@@ -538,66 +688,57 @@ def check_balance(card_number, captcha_input, tokens):
         
         if 'json' in content_type:
             # JSON yanıt
-            result = response.json()
+            with tracing.span('inquiry.parse', content_type='json'):
+                result = json.loads(body)
             print("\n✅ JSON Yanıt Alındı:")
             print(json.dumps(result, indent=2, ensure_ascii=False))
             return result
         else:
             # HTML yanıt
             print("\n📄 HTML Yanıt:")
-            soup = BeautifulSoup(response.text, 'html.parser')
             
-            # Bakiye bilgisini bul
+            # Bakiye bilgisini bul (metin tek geçişte çıkarılır ve taranır)
             print("\nSayfada arama yapılıyor...")
+            html = body_text(response, body)
+            with tracing.span('inquiry.parse', content_type='html'):
+                text_content, balance_text = html_extract.extract_balance(html)
             
-            # Bakiye text'i bul
-            text_content = soup.get_text()
-            
-            # Bakiye pattern'leri
-            balance_patterns = [
-                r'Bakiyeniz[:\s]+([0-9.,]+\s*TL)',
-                r'bakiye[:\s]+([0-9.,]+)',
-                r'Balance[:\s]+([0-9.,]+)',
-                r'([0-9]+)\s*TL',
-            ]
-            
-            found = False
-            for pattern in balance_patterns:
-                match = re.search(pattern, text_content, re.I)
-                if match:
-                    print(f"✅ Bakiye bulundu: {match.group(0)}")
-                    found = True
-                    break
-            
-            if not found:
+            if balance_text:
+                print(f"✅ Bakiye bulundu: {balance_text}")
+            else:
                 print("\n⚠️  Bakiye bilgisi bulunamadı")
                 print("\nSayfa içeriği (ilk 500 karakter):")
                 print(text_content[:500])
             
             # Debug için HTML'i kaydet
-            debug_file = f"debug_response_{int(time.time())}.html"
-            with open(debug_file, 'w', encoding='utf-8') as f:
-                f.write(response.text)
-            print(f"\n🐛 Yanıt HTML'i kaydedildi: {debug_file}")
+            print("")
+            save_debug_html('response', response, html)
             
             return None
         
     except Exception as e:
+        import requests
+        
         print(f"\n❌ Hata: {e}")
+        if isinstance(e, CheckError):
+            raise
+        if isinstance(e, requests.exceptions.RequestException):
+            raise NetworkError(f"Bakiye sorgusu gönderilemedi: {e}") from e
         return None
 
-def main():
+def resolve_card_number(card_arg=None):
+    """Kart numarasını belirle"""
     # Kart numarası - öncelik sırası: .env > komut satırı argümanı > kullanıcı inputu > varsayılan
     card_number = None
     
     # 1. Önce .env dosyasından oku
-    if CARD_NUMBER:
-        card_number = CARD_NUMBER.strip()
+    if config.current().card_number:
+        card_number = config.current().card_number
         print(f"💳 Kart numarası .env dosyasından alındı: {card_number}")
     
     # 2. .env'de yoksa komut satırı argümanından al
-    if not card_number and len(sys.argv) > 1:
-        card_number = sys.argv[1].strip()
+    if not card_number and card_arg:
+        card_number = card_arg.strip()
         print(f"💳 Kart numarası komut satırından alındı: {card_number}")
     
     # 3. Hiçbiri yoksa kullanıcıdan sor
@@ -612,193 +753,586 @@ def main():
         card_number = "2400030848"
         print(f"💳 Varsayılan kart numarası kullanılıyor: {card_number}")
     
-    # Token'ları al
-    tokens, captcha_file = get_page_and_captcha()
+    return card_number
+
+def open_captcha_viewer(captcha_file):
+    """CAPTCHA dosyasını sistemin görüntüleyicisiyle açmayı dene (platform bağımsız)"""
+    import subprocess
+    import platform
     
-    if not tokens:
-        print("\n❌ Token'lar alınamadı, işlem iptal edildi")
-        return 1
+    system = platform.system()
     
-    if not captcha_file:
-        print("\n❌ CAPTCHA dosyası bulunamadı, işlem iptal edildi")
-        return 1
+    try:
+        if system == 'Darwin':  # macOS
+            subprocess.run(['open', captcha_file], check=False)
+            return True
+        elif system == 'Linux':  # Linux/Raspberry Pi
+            # GUI varsa xdg-open kullan
+            try:
+                subprocess.run(['xdg-open', captcha_file], check=False, timeout=2)
+                return True
+            except:
+                # GUI yoksa sadece dosya yolunu göster
+                pass
+        elif system == 'Windows':
+            subprocess.run(['start', captcha_file], check=False, shell=True)
+            return True
+    except Exception:
+        pass
     
-    # CAPTCHA'yı otomatik çöz
-    captcha_input = None
-    captcha_solved = False
+    return False
+
+def prompt_captcha_manually(captcha_image):
+    """
+    CAPTCHA kodunu kullanıcıdan iste
+    Görsel sadece burada, kullanıcı görebilsin diye geçici bir dosyaya yazılır
+    ve kod girildikten sonra (hata olsa bile) silinir.
+    """
+    # Non-interactive mod (cron/daemon): dosya yazmaya gerek yok
+    if not sys.stdin.isatty():
+        print("❌ Non-interactive modda manuel CAPTCHA girişi yapılamaz")
+        raise CaptchaUnsolvedError("CAPTCHA otomatik çözülemedi")
     
-    if OCR_AVAILABLE:
-        captcha_input = solve_captcha_ocr(captcha_file)
-        
-        if captcha_input:
-            captcha_solved = True
-            print(f"\n✅ CAPTCHA otomatik çözüldü: {captcha_input}")
-            print(f"✅ Otomatik olarak kullanılıyor, bakiye sorgulanıyor...")
-            
-            # CAPTCHA dosyasını sil
-            try:
-                if os.path.exists(captcha_file):
-                    os.remove(captcha_file)
-                    print(f"🗑️  CAPTCHA dosyası silindi: {captcha_file}")
-            except Exception as e:
-                print(f"⚠️  CAPTCHA dosyası silinemedi: {e}")
-        else:
-            print("\n⚠️  Otomatik çözme başarısız, manuel giriş gerekiyor")
-    else:
-        print("\n⚠️  OCR kütüphaneleri yüklü değil, manuel giriş gerekiyor")
+    import tempfile
     
-    # Otomatik çözme başarısızsa veya OCR yoksa manuel giriş
-    if not captcha_input:
-        # CAPTCHA dosyasını açmayı dene (platform bağımsız)
-        import subprocess
-        import platform
-        
-        captcha_opened = False
-        system = platform.system()
-        
-        try:
-            if system == 'Darwin':  # macOS
-                subprocess.run(['open', captcha_file], check=False)
-                captcha_opened = True
-            elif system == 'Linux':  # Linux/Raspberry Pi
-                # GUI varsa xdg-open kullan
-                try:
-                    subprocess.run(['xdg-open', captcha_file], check=False, timeout=2)
-                    captcha_opened = True
-                except:
-                    # GUI yoksa sadece dosya yolunu göster
-                    pass
-            elif system == 'Windows':
-                subprocess.run(['start', captcha_file], check=False, shell=True)
-                captcha_opened = True
-        except Exception:
-            pass
+    fd, captcha_file = tempfile.mkstemp(prefix='captcha_', suffix='.png')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(captcha_image.getvalue())
         
-        if captcha_opened:
+        if open_captcha_viewer(captcha_file):
             print(f"\n✅ CAPTCHA otomatik açıldı")
         else:
-            print(f"\n📁 CAPTCHA dosyası: {os.path.abspath(captcha_file)}")
+            print(f"\n📁 CAPTCHA dosyası: {captcha_file}")
             print(f"   Dosyayı manuel olarak açabilirsiniz")
         
         print("\n" + "=" * 60)
         
-        # Interaktif mod kontrolü
-        if sys.stdin.isatty():
-            try:
-                captcha_input = input("🔐 CAPTCHA kodunu girin: ").strip()
-            except (EOFError, KeyboardInterrupt):
-                print("\n❌ CAPTCHA girilmedi, işlem iptal edildi")
-                return 1
+        try:
+            captcha_input = input("🔐 CAPTCHA kodunu girin: ").strip()
+        except (EOFError, KeyboardInterrupt):
+            print("\n❌ CAPTCHA girilmedi, işlem iptal edildi")
+            raise CheckError("CAPTCHA girilmedi")
+    finally:
+        try:
+            os.remove(captcha_file)
+        except OSError:
+            pass
+    
+    if not captcha_input:
+        print("❌ CAPTCHA girilmedi, işlem iptal edildi")
+        raise CheckError("CAPTCHA girilmedi")
+    
+    return captcha_input
+
+def _pipeline_executor():
+    """
+    Asenkron kontrol hattının worker thread'leri
+    Süreç boyunca aynı thread'ler kullanılır; daemon modunda SQLite bağlantıları
+    (thread başına önbellekte) her kontrolde yeniden açılmaz.
+    """
+    global _PIPELINE_EXECUTOR
+    if _PIPELINE_EXECUTOR is None:
+        _PIPELINE_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix='pipeline')
+    return _PIPELINE_EXECUTOR
+
+async def _in_worker(phase_name, func, *args):
+    """
+    Engelleyici bir adımı (requests, SQLite, SMTP) worker thread'inde çalıştır
+    Faz süresi run_log'a yazılır; span'ler kontrolün span ağacında kalır.
+    """
+    import asyncio
+    
+    parent = tracing.current_span()
+    
+    def call():
+        with run_log.phase(phase_name, parent=parent):
+            return func(*args)
+    
+    return await asyncio.get_running_loop().run_in_executor(_pipeline_executor(), profiling.call, call)
+
+async def run_check_async(card_number, session=None):
+    """
+    Tek bir bakiye kontrolü yap (sayfa, CAPTCHA, sorgu, kayıt, bildirim)
+    Adımlar worker thread'lerinde çalışır; birbirini beklemesi gerekmeyen işler aynı anda yürür:
+    - Son bakiye, sayfa ve sorgu istekleri sürerken geçmiş deposundan okunur
+    - Bakiye kaydı ile bildirim gönderimi birlikte yapılır
+    Başarısızlıkta CheckError alt sınıflarından birini fırlatır.
+    Dönüş: formatlanmış bakiye sonucu
+    """
+    import asyncio
+    
+    # Bakiye değişikliği kararı için gereken son bakiye ağ istekleriyle aynı anda okunur
+    last_balance_task = asyncio.ensure_future(_in_worker('history', get_last_balance, card_number))
+    
+    # Token'ları al
+    try:
+        tokens, captcha_image = await _in_worker('page', get_page_and_captcha, session)
+    except CheckError:
+        print("\n❌ Token'lar alınamadı, işlem iptal edildi")
+        raise
+    finally:
+        release_memory()
+    
+    if not captcha_image:
+        print("\n❌ CAPTCHA görseli bulunamadı, işlem iptal edildi")
+        raise TokenMissingError("CAPTCHA görseli bulunamadı veya indirilemedi")
+    
+    try:
+        # CAPTCHA'yı otomatik çöz
+        captcha_input = None
+        captcha_solved = False
+        
+        if config.current().captcha_code:
+            captcha_input = config.current().captcha_code
+            print(f"\n🔐 Sabit CAPTCHA kodu kullanılıyor (CAPTCHA_CODE): {captcha_input}")
+        elif OCR_AVAILABLE:
+            captcha_input = await _in_worker('ocr', solve_captcha_ocr, captcha_image)
+            release_memory()
+            
+            if captcha_input:
+                captcha_solved = True
+                print(f"\n✅ CAPTCHA otomatik çözüldü: {captcha_input}")
+                print(f"✅ Otomatik olarak kullanılıyor, bakiye sorgulanıyor...")
+            else:
+                print("\n⚠️  Otomatik çözme başarısız, manuel giriş gerekiyor")
         else:
-            # Non-interactive mod - CAPTCHA dosyasını göster ve hata ver
-            print("❌ CAPTCHA dosyası: " + captcha_file)
-            print("❌ Non-interactive modda manuel CAPTCHA girişi yapılamaz")
-            return 1
+            print("\n⚠️  OCR kütüphaneleri yüklü değil, manuel giriş gerekiyor")
         
+        # Otomatik çözme başarısızsa veya OCR yoksa manuel giriş
+        # (input() ana thread'de kalır; Ctrl+C worker thread'inde takılı kalmasın)
         if not captcha_input:
-            print("❌ CAPTCHA girilmedi, işlem iptal edildi")
-            return 1
+            captcha_input = prompt_captcha_manually(captcha_image)
+    finally:
+        # Görsel tamponu sorgu sürerken bellekte tutulmaz (OCR/manuel giriş hata verse de)
+        captcha_image.close()
     
     # Bakiye sorgula
-    result_data = check_balance(card_number, captcha_input, tokens)
+    try:
+        result_data = await _in_worker('inquiry', check_balance, card_number, captcha_input, tokens)
+    finally:
+        release_memory()
     
     # Sonuçları formatla ve göster
-    if result_data and isinstance(result_data, dict):
-        if result_data.get('result'):
-            # Başarılı durum
-            formatted_result = format_balance_result(card_number, result_data)
-            
-            if formatted_result:
-                # Son bakiyeyi kontrol et
-                last_balance = get_last_balance(card_number)
-                current_balance = formatted_result['balance']
-                balance_changed = False
-                
-                if last_balance is not None:
-                    if abs(last_balance - current_balance) > 0.01:  # 0.01 TL'den fazla fark varsa değişiklik say
-                        balance_changed = True
-                        difference = current_balance - last_balance
-                        print(f"\n📊 Bakiye Değişikliği Tespit Edildi!")
-                        print(f"   Önceki Bakiye: {last_balance:,.2f} TL")
-                        print(f"   Yeni Bakiye: {current_balance:,.2f} TL")
-                        print(f"   Fark: {difference:+,.2f} TL")
-                    else:
-                        print(f"\n📊 Bakiye Değişmedi: {current_balance:,.2f} TL (Son kontrol: {last_balance:,.2f} TL)")
-                else:
-                    print(f"\n📊 İlk Bakiye Kaydı: {current_balance:,.2f} TL")
-                
-                # Bakiyeyi kaydet
-                save_balance(
+    if not result_data or not isinstance(result_data, dict):
+        print("\n❌ Geçersiz yanıt alındı")
+        if result_data:
+            print(f"Yanıt: {result_data}")
+        raise InquiryRejectedError("Geçersiz yanıt alındı")
+    
+    if not result_data.get('result'):
+        # Başarısız durum - mesajı göster
+        print("\n" + "=" * 60)
+        print("❌ İŞLEM BAŞARISIZ")
+        print("=" * 60)
+        message = result_data.get('message', 'Bilinmeyen hata')
+        print(f"📝 Hata Mesajı: {message}")
+        print("=" * 60)
+        raise InquiryRejectedError(message)
+    
+    # Başarılı durum
+    with profiling.memory('format'):
+        formatted_result = format_balance_result(card_number, result_data)
+    
+    if formatted_result:
+        # Son bakiyeyi kontrol et
+        last_balance = await last_balance_task
+        current_balance = formatted_result['balance']
+        balance_changed = False
+        
+        if last_balance is not None:
+            if abs(last_balance - current_balance) > 0.01:  # 0.01 TL'den fazla fark varsa değişiklik say
+                balance_changed = True
+                difference = current_balance - last_balance
+                print(f"\n📊 Bakiye Değişikliği Tespit Edildi!")
+                print(f"   Önceki Bakiye: {last_balance:,.2f} TL")
+                print(f"   Yeni Bakiye: {current_balance:,.2f} TL")
+                print(f"   Fark: {difference:+,.2f} TL")
+            else:
+                print(f"\n📊 Bakiye Değişmedi: {current_balance:,.2f} TL (Son kontrol: {last_balance:,.2f} TL)")
+        else:
+            print(f"\n📊 İlk Bakiye Kaydı: {current_balance:,.2f} TL")
+        
+        run_log.annotate(
+            balance=current_balance,
+            balance_delta=round(current_balance - last_balance, 2) if last_balance is not None else None,
+        )
+        
+        # Bakiyeyi kaydet (bildirim kaydı beklemez; karar yukarıda verildi)
+        persist = _in_worker(
+            'persist',
+            save_balance,
+            card_number,
+            current_balance,
+            formatted_result['card_type'],
+            formatted_result['status']
+        )
+        
+        digest_minutes = config.current().notify_digest_minutes
+        
+        # Sadece bakiye değiştiyse bildirim gönder
+        if balance_changed and digest_minutes:
+            # Art arda değişiklikler tek özet mesajda birleştirilir
+            _, flush_at = await asyncio.gather(
+                persist,
+                _in_worker(
+                    'notify',
+                    notification_digest.add,
                     card_number,
+                    last_balance,
                     current_balance,
                     formatted_result['card_type'],
-                    formatted_result['status']
-                )
-                
-                # Sadece bakiye değiştiyse bildirim gönder
-                if balance_changed or last_balance is None:
-                    # Bildirim gönder
-                    print("\n📨 Bildirimler gönderiliyor...")
-                    
-                    # Telegram bildirimi
-                    if TELEGRAM_ENABLED:
-                        if TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
-                            if send_telegram_notification(formatted_result['telegram']):
-                                print("✅ Telegram bildirimi gönderildi")
-                            else:
-                                print("⚠️  Telegram bildirimi gönderilemedi")
-                        else:
-                            print("⚠️  Telegram bildirimi aktif ama TELEGRAM_BOT_TOKEN veya TELEGRAM_CHAT_ID eksik")
-                    else:
-                        print("ℹ️  Telegram bildirimi deaktif (TELEGRAM_ENABLED=false)")
-                    
-                    # Email bildirimi
-                    if EMAIL_ENABLED:
-                        if EMAIL_FROM and EMAIL_TO and EMAIL_PASSWORD:
-                            subject = f"Shell Kart Bakiye: {formatted_result['balance']:,.2f} TL"
-                            if send_email_notification(subject, formatted_result['html']):
-                                print("✅ Email bildirimi gönderildi")
-                            else:
-                                print("⚠️  Email bildirimi gönderilemedi")
-                        else:
-                            print("⚠️  Email bildirimi aktif ama EMAIL_FROM, EMAIL_TO veya EMAIL_PASSWORD eksik")
-                    else:
-                        print("ℹ️  Email bildirimi deaktif (EMAIL_ENABLED=false)")
-                    
-                    # WhatsApp bildirimi
-                    if WHATSAPP_ENABLED:
-                        if WHATSAPP_TO:
-                            if send_whatsapp_notification(formatted_result['whatsapp']):
-                                print("✅ WhatsApp bildirimi gönderildi")
-                            else:
-                                print("⚠️  WhatsApp bildirimi gönderilemedi")
-                        else:
-                            print("⚠️  WhatsApp bildirimi aktif ama WHATSAPP_TO eksik")
-                    else:
-                        print("ℹ️  WhatsApp bildirimi deaktif (WHATSAPP_ENABLED=false)")
-                else:
-                    # Bakiye değişmedi, sadece log
-                    print("\n📝 Bakiye değişmediği için bildirim gönderilmedi (sadece log)")
-            else:
-                print("\n⚠️  Sonuçlar formatlanamadı")
+                    formatted_result['status'],
+                    digest_minutes
+                ),
+            )
+            flush_time = datetime.fromtimestamp(flush_at).strftime('%H:%M')
+            print(f"\n📨 Değişiklik bildirim özetine eklendi (özet gönderimi: {flush_time})")
+        elif balance_changed or last_balance is None:
+            # Bildirim gönder
+            print("\n📨 Bildirimler gönderiliyor...")
+            
+            idempotency_key = f"{card_number}:{int(time.time())}:{current_balance:.2f}"
+            _, notify_results = await asyncio.gather(
+                persist,
+                _in_worker('notify', dispatch_notifications, formatted_result, idempotency_key),
+            )
+            
+            for channel, status in notify_results.items():
+                print(notifiers.status_line(channel, status))
         else:
-            # Başarısız durum - mesajı göster
-            print("\n" + "=" * 60)
-            print("❌ İŞLEM BAŞARISIZ")
-            print("=" * 60)
-            message = result_data.get('message', 'Bilinmeyen hata')
-            print(f"📝 Hata Mesajı: {message}")
-            print("=" * 60)
+            await persist
+            # Bakiye değişmedi, sadece log
+            print("\n📝 Bakiye değişmediği için bildirim gönderilmedi (sadece log)")
     else:
-        print("\n❌ Geçersiz yanıt alındı")
-        if result_data:
-            print(f"Yanıt: {result_data}")
+        print("\n⚠️  Sonuçlar formatlanamadı")
+    
+    release_memory()
+    return formatted_result
+
+def run_check(card_number, session=None):
+    """
+    run_check_async() için senkron sarmalayıcı (CLI, yeniden deneme ve daemon bunu kullanır)
+    Başarısızlıkta CheckError alt sınıflarından birini fırlatır.
+    Dönüş: formatlanmış bakiye sonucu
+    """
+    import asyncio
+    
+    return asyncio.run(run_check_async(card_number, session))
+
+def retry_delay(attempt):
+    """
+    attempt. başarısız denemeden sonra beklenecek süre (saniye)
+    Üstel artış + jitter: aynı anda başlayan süreçler aynı anda tekrar denemez.
+    """
+    import random
+    
+    settings = config.current()
+    delay = min(settings.retry_backoff_base * (2 ** (attempt - 1)), settings.retry_backoff_max)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+def run_with_retries(card_number, max_attempts=None, stop_event=None):
+    """
+    Bakiye kontrolünü yeniden deneme politikasıyla çalıştır
+    Sadece yeniden denenebilir hatalar (ağ, eksik token, çözülemeyen CAPTCHA,
+    reddedilen sorgu) tekrar denenir. Tüm denemeler (ve daemon modunda tüm kontroller)
+    aynı HTTP oturumunu kullanır, böylece TLS bağlantısı yeniden kurulmaz.
+    
+    Dönüş: (formatlanmış sonuç veya None, son hata veya None, deneme sayısı)
+    """
+    if max_attempts is None:
+        max_attempts = config.current().retry_max_attempts
+    session = new_shell_session()
+    last_error = None
+    attempt = 0
+    
+    try:
+        for attempt in range(1, max_attempts + 1):
+            if attempt > 1:
+                print("")
+                print(f"🔄 Yeniden deneme {attempt}/{max_attempts}...")
+                print("=" * 40)
+                # Yeniden denemede yeni token/CAPTCHA alınır; başarısız denemenin çerezleri taşınmaz
+                session.cookies.clear()
+            
+            try:
+                result = run_check(card_number, session)
+                save_shell_cookies(session)
+                return result, None, attempt
+            except CheckError as e:
+                last_error = e
+                run_log.record_error(e.kind)
+                if not e.retryable:
+                    break
+                if attempt < max_attempts:
+                    delay = retry_delay(attempt)
+                    print(f"⚠️  Deneme {attempt} başarısız ({e.kind}: {e}), {delay:.1f} sn sonra yeniden denenecek...")
+                    if stop_event is not None:
+                        if stop_event.wait(delay):
+                            break  # Daemon durduruluyor
+                    else:
+                        time.sleep(delay)
+    except BaseException:
+        # Yarım kalmış istekten kalan bağlantılar havuzda tutulmasın
+        session.close()
+        raise
+    
+    return None, last_error, attempt
+
+def main(card_arg=None, stop_event=None):
+    card_number = resolve_card_number(card_arg)
+    record = run_log.start_run(card_number)
+    tracing.tracer.start_trace()
+    outcome = 'error'
+    
+    try:
+        # Önceki çalıştırmalardan kalan bildirimler (bakiye tekrar sorgulanmaz) sorgu ile
+        # aynı anda gönderilir; erişilemeyen bir kanal kontrolü zaman aşımı kadar geciktirmez
+        parent = tracing.current_span()
+        
+        def drain_outbox():
+            # Bu kontrolün kuyruğa yazacağı mesajlar sahiplenilmez (sonucu kontrol kendisi raporlar)
+            with run_log.phase('outbox', parent=parent):
+                flush_digests(created_before=record.started_at)
+                retry_pending_notifications(created_before=record.started_at)
+        
+        pending = _pipeline_executor().submit(profiling.call, drain_outbox)
+        try:
+            formatted_result, error, attempts = run_with_retries(card_number, stop_event=stop_event)
+        finally:
+            pending.result()
+        run_log.annotate(attempts=attempts)
+        outcome = 'ok' if formatted_result is not None else (error.kind if error else 'error')
+    finally:
+        spans = tracing.tracer.finish_trace({'run_id': record.run_id, 'card_number': card_number, 'outcome': outcome})
+        peak_rss = peak_rss_mb()
+        if peak_rss is not None:
+            run_log.annotate(peak_rss_mb=round(peak_rss, 1))
+        data = run_log.finish_run(outcome)
+        status_server.metrics.record_run(data)
+    
+    settings = config.current()
+    if peak_rss is not None and (settings.low_memory or settings.rss_budget_mb):
+        print(f"\n🧠 En yüksek RSS: {peak_rss:.1f} MB")
+        if settings.rss_budget_mb and peak_rss > settings.rss_budget_mb:
+            print(f"⚠️  RSS bütçesi aşıldı ({peak_rss:.1f} MB > {settings.rss_budget_mb:g} MB, RSS_BUDGET_MB)")
+    
+    # Sürenin nereye gittiğini göster (ölçüm kapalıyken sadece kaba fazlar)
+    if data:
+        tracing.print_summary(data['duration'], data['phases'], spans)
+    
+    if formatted_result is None:
+        print("\n" + "=" * 60)
+        print(f"❌ Bakiye kontrolü {attempts} deneme sonrası başarısız oldu ({error.kind if error else 'error'})")
+        print("=" * 60)
+        return 1
     
     print("\n" + "=" * 60)
-    print("✅ İŞLEM TAMAMLANDI")
+    if attempts > 1:
+        print(f"✅ İŞLEM TAMAMLANDI ({attempts} deneme sonrası)")
+    else:
+        print("✅ İŞLEM TAMAMLANDI")
     print("=" * 60)
     
-    return 0 if (result_data and isinstance(result_data, dict) and result_data.get('result')) else 1
+    return 0
+
+def apply_config(new_config):
+    """
+    Yeni ayarlara geç
+    Config tek bir referans olarak değiştirilir; bildirim kanalları ve bağlantılar
+    (HTTP oturumları, SMTP, Twilio) bir sonraki kullanımda yeni ayarlarla oluşturulur.
+    """
+    config.set_current(new_config)
+    notifiers.reset()
+    clients.close_all()
+    print(f"🔄 {new_config.source} yeniden yüklendi, yeni ayarlar kullanılıyor")
+    config.print_warnings(new_config)
+
+def run_daemon(card_arg=None, interval=None, adaptive=None, status_port=None):
+    """
+    Süreç içi zamanlayıcı ile sürekli çalış
+    Import'lar ve istemciler her kontrolde yeniden yüklenmez.
+    .env değişirse daemon yeniden başlatılmadan yeni ayarlara geçilir (geçersizse eskiler kalır).
+    interval/adaptive verilmezse .env'deki DAEMON_INTERVAL/DAEMON_ADAPTIVE kullanılır.
+    status_port (veya STATUS_SERVER_PORT) verilirse /balance, /healthz ve /metrics sunulur.
+    adaptive açıksa aralık sabit değil, bakiye değişikliklerinin geçmişine göre seçilir.
+    NOTIFY_DIGEST_MINUTES açıksa bildirim özeti, penceresi dolunca kontroller arasında gönderilir.
+    SIGTERM/SIGINT geldiğinde mevcut kontrol bittikten sonra temiz kapanır.
+    """
+    stop_event = threading.Event()
+    
+    def handle_signal(signum, frame):
+        print(f"\n🛑 Sinyal alındı ({signal.Signals(signum).name}), daemon durduruluyor...")
+        stop_event.set()
+    
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    
+    # systemd/journald altında çıktının anında görünmesi için
+    try:
+        sys.stdout.reconfigure(line_buffering=True)
+    except AttributeError:
+        pass
+    
+    watcher = config.ConfigWatcher(config.current())
+    scheduler = None
+    
+    settings = config.current()
+    status_port = settings.status_server_port if status_port is None else status_port
+    server = None
+    if status_port:
+        try:
+            server = status_server.start(settings.status_server_host, status_port, settings.status_health_max_age)
+        except OSError as e:
+            # Port kullanımdaysa kontroller yine de çalışmalı
+            print(f"⚠️  Durum sunucusu başlatılamadı ({settings.status_server_host}:{status_port}): {e}")
+    
+    def use_adaptive():
+        return adaptive if adaptive is not None else config.current().daemon_adaptive
+    
+    def fixed_interval():
+        return interval if interval is not None else config.current().daemon_interval
+    
+    def new_scheduler():
+        import adaptive_scheduler
+        # Kart numarası önceliği resolve_card_number ile aynı (kullanıcıya sorulmaz)
+        card_number = config.current().card_number or (card_arg or '').strip() or None
+        created = adaptive_scheduler.AdaptiveScheduler(card_number)
+        print(f"🧭 Uyarlanabilir zamanlayıcı: {created.min_interval}-{created.max_interval} sn, "
+              f"günlük en fazla {created.daily_budget} kontrol")
+        return created
+    
+    if use_adaptive():
+        print(f"🔁 Daemon modu başlatıldı (uyarlanabilir aralık, PID: {os.getpid()})")
+    else:
+        print(f"🔁 Daemon modu başlatıldı (aralık: {fixed_interval()} sn, PID: {os.getpid()})")
+    
+    # Yeniden başlatmada ilk kontrol de zamanlayıcıya sorulur (son kontrol çalıştırma
+    # günlüğünden okunur); çökme döngüsü Shell sitesine art arda istek göndermez
+    initial_wait = 0
+    if use_adaptive():
+        try:
+            scheduler = new_scheduler()
+            initial_wait, decision = scheduler.initial_wait()
+            if initial_wait > 0:
+                scheduler.log(decision)
+        except Exception as e:
+            print(f"⚠️  Zamanlayıcı hatası: {e}")
+            scheduler = None
+    
+    while not stop_event.is_set():
+        started = time.monotonic()
+        started_at = time.time()
+        skip_check = initial_wait > 0
+        if not skip_check:
+            try:
+                exit_code = main(card_arg, stop_event)
+                if exit_code != 0:
+                    print(f"⚠️  Kontrol başarısız oldu (çıkış kodu: {exit_code})")
+            except Exception as e:
+                # Tek bir kontroldeki hata daemon'u durdurmamalı
+                print(f"❌ Beklenmeyen hata: {e}")
+        
+        next_interval = fixed_interval()
+        if skip_check:
+            next_interval, initial_wait = initial_wait, 0
+        elif use_adaptive():
+            try:
+                if scheduler is None:
+                    # Az önce biten kontrol çalıştırma günlüğünden okunur; tekrar eklenmez
+                    scheduler = new_scheduler()
+                else:
+                    scheduler.record_check(started_at)
+                decision = scheduler.decide(started_at)
+                scheduler.log(decision)
+                next_interval = decision['interval']
+            except Exception as e:
+                # Zamanlayıcı hatası kontrolleri durdurmamalı; sabit aralıkla devam et
+                print(f"⚠️  Zamanlayıcı hatası: {e}")
+        
+        # Aralık kontrolün başından sayılır, böylece kontroller kaymaz
+        deadline = started + next_interval
+        # Bildirim özeti, sonraki kontrol beklenmeden penceresi dolunca gönderilir
+        try:
+            digest_due = notification_digest.next_due(config.current().notify_digest_minutes)
+        except Exception as e:
+            print(f"⚠️  Bildirim özeti okunamadı: {e}")
+            digest_due = None
+        if not stop_event.is_set():
+            next_run = datetime.fromtimestamp(started_at + next_interval).strftime('%Y-%m-%d %H:%M:%S')
+            print(f"⏳ Sonraki kontrol: {next_run}")
+        
+        # Beklerken .env değişikliklerini yokla
+        while not stop_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if stop_event.wait(min(CONFIG_POLL_INTERVAL, remaining)):
+                break
+            if digest_due is not None and time.time() >= digest_due:
+                digest_due = flush_digests()
+            new_config = watcher.poll()
+            if new_config is None:
+                continue
+            apply_config(new_config)
+            # SCHEDULER_* ayarları sonraki kontrolden sonra kurulan zamanlayıcıda geçerli olur
+            scheduler = None
+            if not use_adaptive() and fixed_interval() != next_interval:
+                next_interval = fixed_interval()
+                deadline = started + next_interval
+                next_run = datetime.fromtimestamp(started_at + next_interval).strftime('%Y-%m-%d %H:%M:%S')
+                print(f"⏳ Sonraki kontrol (yeni aralık {next_interval} sn): {next_run}")
+    
+    if server is not None:
+        server.shutdown()
+    clients.close_all()
+    print("👋 Daemon durduruldu")
+    return 0
+
+def parse_args(argv=None):
+    """Komut satırı argümanlarını işle"""
+    parser = argparse.ArgumentParser(description="Shell Kart Bakiye Kontrol")
+    parser.add_argument('card_number', nargs='?', help="Kart numarası (.env'de CARD_NUMBER yoksa)")
+    parser.add_argument('--daemon', action='store_true', help="Sürekli çalış (cron yerine süreç içi zamanlayıcı)")
+    parser.add_argument('--drain-outbox', action='store_true',
+                        help="Bakiye sorgulamadan sadece kuyrukta bekleyen bildirimleri gönder")
+    parser.add_argument('--interval', type=int,
+                        help="Daemon modunda kontroller arası süre, saniye (varsayılan: .env'deki DAEMON_INTERVAL)")
+    parser.add_argument('--adaptive', action='store_true', default=None,
+                        help="Daemon modunda aralığı bakiye değişikliklerinin saatlerine göre ayarla (DAEMON_ADAPTIVE=true ile aynı)")
+    parser.add_argument('--status-port', type=int,
+                        help="Daemon modunda durum sunucusunun portu (varsayılan: .env'deki STATUS_SERVER_PORT, 0: kapalı)")
+    parser.add_argument('--trace', action='store_true',
+                        help="Ayrıntılı süre ölçümünü aç ve TRACE_FILE dosyasına yaz (TRACE_ENABLED=true ile aynı)")
+    parser.add_argument('--profile', nargs='?', const='', metavar='DOSYA',
+                        help="cProfile ve tracemalloc ile çalıştır, istatistikleri pstats dosyasına yaz "
+                             "(varsayılan: .env'deki PROFILE_FILE)")
+    return parser.parse_args(argv)
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    # Alt komut: çalıştırma günlüğünü sorgula (ağır modüller yüklenmez)
+    if len(sys.argv) > 1 and sys.argv[1] == 'log':
+        sys.exit(run_log.main(sys.argv[2:]))
+    
+    args = parse_args()
+    try:
+        config.print_warnings(config.current())
+    except config.ConfigError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+    if args.trace:
+        tracing.enable()
+    if args.drain_outbox:
+        flush_digests()
+        retry_pending_notifications()
+        sys.exit(0 if notification_outbox.pending_count() == 0 else 1)
+    if args.daemon:
+        if args.interval is not None and args.interval <= 0:
+            print("❌ --interval pozitif bir sayı olmalı")
+            sys.exit(2)
+        if args.profile is not None:
+            sys.exit(profiling.run(args.profile, run_daemon, args.card_number, args.interval, args.adaptive, args.status_port))
+        sys.exit(run_daemon(args.card_number, args.interval, args.adaptive, args.status_port))
+    if args.profile is not None:
+        sys.exit(profiling.run(args.profile, main, args.card_number))
+    sys.exit(main(args.card_number))
\ No newline at end of file
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Durum Sunucusu (HTTP)
+Daemon modunda isteğe bağlı, hafif bir HTTP sunucusu. Shell sitesine istek atmaz;
+tüm yanıtlar yerel bakiye deposundan ve daemon'un kendi ölçümlerinden üretilir.
+
+- GET /balance[?card=KART]  Son bakiyeler (JSON)
+- GET /healthz              Son başarılı kontrolün yaşı; eskiyse 503
+- GET /metrics              Prometheus metin formatı: kontrol sayıları, faz süreleri, hata türleri
+
+Varsayılan olarak sadece 127.0.0.1'i dinler. Açmak için .env: STATUS_SERVER_PORT=9108
+veya: python3 shell_auto_checker.py --daemon --status-port 9108
+
+Cron ile çalışanlar için tek başına da çalışabilir (metrikler runs.jsonl'den doldurulur):
+    python3 status_server.py --port 9108
+"""
+
+import sys
+import json
+import time
+import argparse
+import threading
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs
+
+import config
+
+# .env, ayarlarını import anında okuyan modüllerden (BALANCE_DB, RUN_LOG_FILE) önce yüklenir
+config.preload()
+
+import balance_history
+import notification_outbox
+import run_log
+
+# Süre histogramlarının sınırları (saniye)
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * len(DURATION_BUCKETS)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.total += 1
+        self.sum += value
+        for index, bound in enumerate(DURATION_BUCKETS):
+            if value <= bound:
+                self.counts[index] += 1
+
+class Metrics:
+    """Kontrol sonuçlarından üretilen süreç içi sayaçlar (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.runs = {}
+        self.errors = {}
+        self.run_duration = _Histogram()
+        self.phases = {}
+        self.last_run = None
+        self.last_success = None
+        # Tek başına çalışırken günlükten okunan son kaydın başlangıç zamanı
+        self.log_cursor = 0.0
+
+    def record_run(self, data):
+        """run_log.finish_run() kaydını sayaçlara ekle"""
+        if not data:
+            return
+        with self._lock:
+            outcome = data.get('outcome', 'error')
+            self.runs[outcome] = self.runs.get(outcome, 0) + 1
+            for kind in data.get('errors', []):
+                self.errors[kind] = self.errors.get(kind, 0) + 1
+            self.run_duration.observe(data.get('duration', 0.0))
+            for name, seconds in data.get('phases', {}).items():
+                self.phases.setdefault(name, _Histogram()).observe(seconds)
+            started = data.get('started_at', time.time())
+            self.last_run = started
+            if outcome == 'ok':
+                self.last_success = started
+
+    def update_from_run_log(self, since):
+        """
+        Tek başına çalışırken günlüğe son okumadan beri eklenen kayıtları sayaçlara ekle
+        since sadece ilk okumada kullanılır; sayaçlar sonra hiç azalmaz (Prometheus counter),
+        eski kayıtlar pencereden çıksa veya günlük döndürülse bile.
+        """
+        cursor = max(since, self.log_cursor)
+        for record in run_log.iter_records(since=cursor):
+            started = record.get('started_at', 0)
+            if started <= self.log_cursor:
+                continue
+            self.record_run(record)
+            self.log_cursor = started
+
+    def render(self):
+        """Prometheus metin formatı"""
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name, hist, labels=''):
+            prefix = f"{labels}," if labels else ''
+            for bound, count in zip(DURATION_BUCKETS, hist.counts):
+                lines.append(f'{name}_bucket{{{prefix}le="{bound:g}"}} {count}')
+            lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {hist.total}')
+            suffix = f"{{{labels}}}" if labels else ''
+            lines.append(f"{name}_sum{suffix} {hist.sum:.6f}")
+            lines.append(f"{name}_count{suffix} {hist.total}")
+
+        with self._lock:
+            metric('shell_checker_runs_total', 'counter', "Tamamlanan kontroller (sonuca göre)")
+            for outcome, count in sorted(self.runs.items()):
+                lines.append(f'shell_checker_runs_total{{outcome="{outcome}"}} {count}')
+
+            metric('shell_checker_attempt_errors_total', 'counter', "Başarısız denemeler (hata türüne göre)")
+            for kind, count in sorted(self.errors.items()):
+                lines.append(f'shell_checker_attempt_errors_total{{kind="{kind}"}} {count}')
+
+            metric('shell_checker_run_duration_seconds', 'histogram', "Kontrol süresi")
+            histogram('shell_checker_run_duration_seconds', self.run_duration)
+
+            metric('shell_checker_phase_duration_seconds', 'histogram', "Faz süreleri")
+            for name, hist in sorted(self.phases.items()):
+                histogram('shell_checker_phase_duration_seconds', hist, f'phase="{name}"')
+
+            metric('shell_checker_last_run_timestamp_seconds', 'gauge', "Son kontrolün başlangıç zamanı")
+            lines.append(f"shell_checker_last_run_timestamp_seconds {self.last_run or 0:.3f}")
+            metric('shell_checker_last_success_timestamp_seconds', 'gauge', "Son başarılı kontrolün zamanı")
+            lines.append(f"shell_checker_last_success_timestamp_seconds {self.last_success or 0:.3f}")
+            metric('shell_checker_start_time_seconds', 'gauge', "Sürecin başlangıç zamanı")
+            lines.append(f"shell_checker_start_time_seconds {self.started_at:.3f}")
+
+        metric('shell_checker_balance_tl', 'gauge', "Kartın son bilinen bakiyesi (TL)")
+        for reading in balance_history.latest_readings():
+            lines.append(f'shell_checker_balance_tl{{card="{reading["card_number"]}"}} {reading["balance"]:.2f}')
+
+        metric('shell_checker_outbox_pending', 'gauge', "Gönderilmeyi bekleyen bildirimler")
+        lines.append(f"shell_checker_outbox_pending {notification_outbox.pending_count()}")
+
+        return '\n'.join(lines) + '\n'
+
+# Süreç genelinde tek ölçüm nesnesi (main() her kontrolden sonra günceller)
+metrics = Metrics()
+
+def _reading_to_json(reading, now):
+    return {
+        'card_number': reading['card_number'],
+        'balance': reading['balance'],
+        'card_type': reading['card_type'],
+        'status': reading['status'],
+        'since': datetime.fromtimestamp(reading['timestamp']).isoformat(timespec='seconds'),
+        'last_checked': datetime.fromtimestamp(reading['last_seen_ts']).isoformat(timespec='seconds'),
+        'age_seconds': round(now - reading['last_seen_ts']),
+    }
+
+def balance_payload(card_number=None):
+    """/balance yanıtı: (HTTP durum kodu, gövde)"""
+    now = time.time()
+    if card_number:
+        reading = balance_history.last_reading(card_number)
+        if reading is None:
+            return 404, {'error': f"{card_number} için kayıt yok"}
+        return 200, _reading_to_json(reading, now)
+    return 200, {'cards': [_reading_to_json(reading, now) for reading in balance_history.latest_readings()]}
+
+def health_payload(max_age):
+    """
+    /healthz yanıtı: son başarılı kontrol max_age saniyeden eskiyse 503
+    Son başarı, daemon'un sayaçlarından veya (daha yeniyse) bakiye deposundan alınır;
+    böylece cron ile yazılan kontroller de sayılır.
+    """
+    now = time.time()
+    last_success = metrics.last_success or 0
+    for reading in balance_history.latest_readings():
+        last_success = max(last_success, reading['last_seen_ts'])
+
+    if not last_success:
+        return 503, {'status': 'no_data', 'max_age_seconds': max_age}
+    age = now - last_success
+    body = {
+        'status': 'ok' if age <= max_age else 'stale',
+        'last_success': datetime.fromtimestamp(last_success).isoformat(timespec='seconds'),
+        'last_success_age_seconds': round(age),
+        'max_age_seconds': max_age,
+    }
+    return (200 if body['status'] == 'ok' else 503), body
+
+def start(host, port, health_max_age, metrics_source=None):
+    """
+    Sunucuyu arka plan thread'inde başlat
+    İstekler tek thread'de sırayla işlenir (SQLite bağlantısı yeniden kullanılır).
+    metrics_source: her /metrics isteğinde Metrics döndüren fonksiyon (varsayılan: süreç sayaçları)
+    Dönüş: server - durdurmak için server.shutdown()
+    """
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        # Yavaş bir istemci diğer istekleri uzun süre bekletmesin
+        timeout = 5
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body, content_type):
+            data = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.send_header('Cache-Control', 'no-store')
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_json(self, status, payload):
+            self._send(status, json.dumps(payload, ensure_ascii=False), 'application/json; charset=utf-8')
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            try:
+                if url.path == '/balance':
+                    card = parse_qs(url.query).get('card', [None])[0]
+                    self._send_json(*balance_payload(card))
+                elif url.path == '/healthz':
+                    self._send_json(*health_payload(health_max_age))
+                elif url.path == '/metrics':
+                    source = metrics_source() if metrics_source else metrics
+                    self._send(200, source.render(), 'text/plain; version=0.0.4; charset=utf-8')
+                else:
+                    self._send_json(404, {'error': 'bulunamadı', 'paths': ['/balance', '/healthz', '/metrics']})
+            except Exception as e:
+                self._send_json(500, {'error': str(e)})
+
+    server = HTTPServer((host, port), Handler)
+    thread = threading.Thread(target=server.serve_forever, name='status-server', daemon=True)
+    thread.start()
+    print(f"📡 Durum sunucusu: http://{host}:{server.server_address[1]} (/balance, /healthz, /metrics)")
+    return server
+
+def main(argv=None):
+    try:
+        # Sadece sunucunun ayarları doğrulanır; ilgisiz bir kanal ayarı sunucuyu durdurmaz
+        settings = config.load_status_server()
+    except config.ConfigError as e:
+        print(f"❌ {e}")
+        return 2
+
+    parser = argparse.ArgumentParser(description="Bakiye durum sunucusu (tek başına)")
+    parser.add_argument('--host', default=settings.host)
+    parser.add_argument('--port', type=int, default=settings.port or 9108)
+    parser.add_argument('--max-age', type=int, default=settings.health_max_age,
+                        help="Son başarılı kontrol bundan eskiyse /healthz 503 döner (saniye)")
+    parser.add_argument('--since-days', type=float, default=7,
+                        help="Başlangıçta sayaçlara eklenecek çalıştırma günlüğü geçmişi (gün)")
+    args = parser.parse_args(argv)
+
+    since = time.time() - args.since_days * 86400
+    standalone = Metrics()
+
+    def from_run_log():
+        # Kontrolleri başka bir süreç (cron) yaptığı için her istekte günlükteki yeni kayıtlar eklenir
+        standalone.update_from_run_log(since)
+        return standalone
+
+    server = start(args.host, args.port, args.max_age, from_run_log)
+    print(f"   Bakiye deposu: {settings.balance_db}, çalıştırma günlüğü: {settings.run_log_file}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""
+Hafif Zaman Ölçüm (Span) API'si
+Bir kontrolün süresinin nerede harcandığını gösterir: sayfa GET, CAPTCHA indirme,
+OCR, balanceinquiry POST, bildirim gönderimi...
+
+Kullanım:
+    with tracing.span('page.get', url=url):
+        ...
+
+TRACE_ENABLED=false (varsayılan) iken span() paylaşılan bir no-op nesne döndürür;
+ek maliyet tek bir global kontrolden ibarettir.
+TRACE_ENABLED=true iken span'ler TRACE_FILE dosyasına yazılır:
+- TRACE_FORMAT=jsonl: her span için bir JSON satırı
+- TRACE_FORMAT=otlp: her kontrol için OpenTelemetry OTLP/JSON uyumlu bir satır
+  (resourceSpans > scopeSpans > spans); OTel collector'ın file receiver'ı ile okunabilir
+Ayarlar her kontrolün başında (start_trace) config'den okunur; daemon yeniden yüklenen
+.env'deki değişikliği bir sonraki kontrolde uygular.
+"""
+
+import os
+import json
+import time
+import threading
+
+import config
+
+SERVICE_NAME = 'shell-card-checker'
+
+class _NoopSpan:
+    """Ölçüm kapalıyken kullanılan boş span"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+class Span:
+    """Süresi ölçülen tek bir işlem"""
+
+    def __init__(self, tracer, name, attributes, parent=None):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.span_id = os.urandom(8).hex()
+        self.parent = parent
+        self.parent_id = None
+        self.depth = 0
+        self.start_ns = 0
+        self.end_ns = 0
+        self.status = 'ok'
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        # Başka bir thread'de açılan span'ler (örn. bildirimler) ebeveyni açıkça alır
+        parent = self.parent or (stack[-1] if stack else None)
+        if parent is not None:
+            self.parent_id = parent.span_id
+            self.depth = parent.depth + 1
+        stack.append(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        if exc_type is not None:
+            self.status = 'error'
+            self.attributes['error'] = exc_type.__name__
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        self.tracer._record(self)
+        return False
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    @property
+    def duration(self):
+        return (self.end_ns - self.start_ns) / 1e9
+
+class Tracer:
+    """Bir kontrolün span'lerini toplar ve dışa aktarır"""
+
+    def __init__(self, enabled=None, path=None, fmt=None):
+        # None olan ayarlar start_trace()'te config'den (TRACE_*) alınır
+        self.forced = (enabled, path, fmt)
+        self.enabled = bool(enabled)
+        self.path = path
+        self.format = fmt
+        self.trace_id = None
+        self.spans = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def start_trace(self):
+        """Yeni bir kontrol için izlemeyi başlat"""
+        enabled, path, fmt = self.forced
+        settings = config.current()
+        self.enabled = settings.trace_enabled if enabled is None else enabled
+        self.path = path or settings.trace_file
+        self.format = fmt or settings.trace_format
+        self.trace_id = os.urandom(16).hex()
+        with self._lock:
+            self.spans = []
+
+    def finish_trace(self, attributes=None):
+        """Toplanan span'leri dosyaya yaz ve döndür"""
+        with self._lock:
+            spans, self.spans = self.spans, []
+        if self.enabled and spans:
+            try:
+                self._export(spans, attributes or {})
+            except Exception as e:
+                print(f"⚠️  Trace dosyası yazılamadı: {e}")
+        return spans
+
+    def _export(self, spans, attributes):
+        if self.format == 'otlp':
+            lines = [json.dumps(self._to_otlp(spans, attributes), ensure_ascii=False)]
+        else:
+            lines = [
+                json.dumps({
+                    'trace_id': self.trace_id,
+                    'span_id': span.span_id,
+                    'parent_span_id': span.parent_id,
+                    'name': span.name,
+                    'start_time_unix_nano': span.start_ns,
+                    'end_time_unix_nano': span.end_ns,
+                    'duration_ms': round(span.duration * 1000, 3),
+                    'status': span.status,
+                    'attributes': {**attributes, **span.attributes},
+                }, ensure_ascii=False, default=str)
+                for span in spans
+            ]
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def _to_otlp(self, spans, attributes):
+        def otlp_attributes(values):
+            result = []
+            for key, value in values.items():
+                if isinstance(value, bool):
+                    typed = {'boolValue': value}
+                elif isinstance(value, int):
+                    typed = {'intValue': str(value)}
+                elif isinstance(value, float):
+                    typed = {'doubleValue': value}
+                else:
+                    typed = {'stringValue': str(value)}
+                result.append({'key': key, 'value': typed})
+            return result
+
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': otlp_attributes({'service.name': SERVICE_NAME, **attributes})},
+                'scopeSpans': [{
+                    'scope': {'name': 'tracing'},
+                    'spans': [{
+                        'traceId': self.trace_id,
+                        'spanId': span.span_id,
+                        'parentSpanId': span.parent_id or '',
+                        'name': span.name,
+                        'kind': 1,  # SPAN_KIND_INTERNAL
+                        'startTimeUnixNano': str(span.start_ns),
+                        'endTimeUnixNano': str(span.end_ns),
+                        'attributes': otlp_attributes(span.attributes),
+                        'status': {'code': 2 if span.status == 'error' else 1},
+                    } for span in spans],
+                }],
+            }],
+        }
+
+    def span(self, name, parent=None, **attributes):
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, attributes, parent)
+
+    def current_span(self):
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+# Süreç genelinde tek tracer
+tracer = Tracer()
+
+def span(name, parent=None, **attributes):
+    """Kısa yol: tracer.span(); ölçüm kapalıyken no-op döner"""
+    if not tracer.enabled:
+        return _NOOP_SPAN
+    return Span(tracer, name, attributes, parent)
+
+def current_span():
+    """Bu thread'de açık olan en içteki span (ölçüm kapalıysa None)"""
+    if not tracer.enabled:
+        return None
+    return tracer.current_span()
+
+def enable(path=None, fmt=None):
+    """Ölçümü çalışma anında aç (örn. --trace argümanı; TRACE_ENABLED'ı ezer)"""
+    _, forced_path, forced_fmt = tracer.forced
+    tracer.forced = (True, path or forced_path, fmt or forced_fmt)
+    tracer.enabled = True
+    if path:
+        tracer.path = path
+    if fmt:
+        tracer.format = fmt
+
+def print_summary(total_seconds, phases, spans=None):
+    """
+    Kontrol sonunda sürenin nereye gittiğini gösteren tablo
+    phases: {faz: saniye} (her zaman toplanan kaba fazlar)
+    spans: ölçüm açıksa ayrıntılı span listesi
+    """
+    rows = {}
+    if spans:
+        # Aynı isimli span'ler (örn. her denemedeki page.get) toplanır; sıra ilk başlama
+        # zamanına göre, girinti span derinliğine göre
+        for item in spans:
+            row = rows.setdefault(item.name, {'start': item.start_ns, 'depth': item.depth, 'count': 0, 'seconds': 0.0})
+            row['start'] = min(row['start'], item.start_ns)
+            row['count'] += 1
+            row['seconds'] += item.duration
+    else:
+        for order, (name, seconds) in enumerate(phases.items()):
+            rows[name] = {'start': order, 'depth': 0, 'count': 1, 'seconds': seconds}
+
+    if not rows:
+        return
+
+    print("\n" + "=" * 60)
+    print("⏱️  SÜRE DAĞILIMI")
+    print("=" * 60)
+    print(f"   {'faz':<28} {'adet':>5} {'süre (ms)':>11} {'oran':>7}")
+    for name, row in sorted(rows.items(), key=lambda item: item[1]['start']):
+        label = '  ' * row['depth'] + name
+        share = (row['seconds'] / total_seconds * 100) if total_seconds else 0.0
+        print(f"   {label:<28} {row['count']:>5} {row['seconds'] * 1000:>11.1f} {share:>6.1f}%")
+    print(f"   {'toplam':<28} {'':>5} {total_seconds * 1000:>11.1f}")
+    print("=" * 60)